@@ -0,0 +1,131 @@
+"""列式归档的写入与按列扫描基准
+
+生成若干天、每天每台主机一次的巡检历史，分别写入列式归档与现有的JSON报告格式，
+比较读取全部主机 memory.usage_percent 的耗时与磁盘占用。
+
+    python benchmarks/archive_scan.py
+    python benchmarks/archive_scan.py --hosts 5000 --days 365 --compress
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server.archive import ArchiveWriter, ArchiveReader  # noqa: E402
+from server.models import InspectionResult, SystemInfo, CPUInfo, MemoryInfo, DiskInfo  # noqa: E402
+
+
+def make_result(host: str, timestamp: datetime, rng: random.Random) -> InspectionResult:
+    total = 64 * 1024 ** 3
+    used = int(total * rng.uniform(0.2, 0.95))
+    return InspectionResult.model_construct(
+        host=host,
+        timestamp=timestamp,
+        system=SystemInfo.model_construct(
+            os_name="CentOS Linux", os_version="7", kernel_version="3.10.0-1160.el7.x86_64",
+            hostname=host, uptime="10 days", boot_time="2024-01-01 00:00:00"
+        ),
+        cpu=CPUInfo.model_construct(
+            cpu_count=32, cpu_usage=rng.uniform(0, 100),
+            load_average=[rng.uniform(0, 8) for _ in range(3)], cpu_model="Intel Xeon"
+        ),
+        memory=MemoryInfo.model_construct(
+            total=total, available=total - used, used=used, free=total - used,
+            usage_percent=used / total * 100, swap_total=0, swap_used=0, swap_free=0
+        ),
+        disks=[
+            DiskInfo.model_construct(
+                device=f"/dev/sd{c}", mountpoint=mount, filesystem="xfs", total=10 ** 12,
+                used=10 ** 11, free=9 * 10 ** 11, usage_percent=rng.uniform(0, 100), disk_type=kind
+            )
+            for c, mount, kind in (("a", "/", "root"), ("b", "/data", "data"))
+        ],
+        errors=[],
+    )
+
+
+def dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for directory, _, names in os.walk(path) for name in names
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列式归档基准")
+    parser.add_argument('--hosts', type=int, default=5000, help='主机数 (默认: 5000)')
+    parser.add_argument('--days', type=int, default=30, help='天数，每天每台主机一条结果 (默认: 30)')
+    parser.add_argument('--json-days', type=int, default=3, help='写成JSON报告对比的天数 (默认: 3)')
+    parser.add_argument('--compress', action='store_true', help='归档写为压缩格式')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    hosts = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(args.hosts)]
+    start = datetime(2024, 1, 1, 2, 0, 0)
+    workdir = tempfile.mkdtemp(prefix="archive_bench_")
+    try:
+        archive_root = os.path.join(workdir, "archive")
+        writer = ArchiveWriter(archive_root, compress=args.compress)
+        json_paths = []
+        build = write = 0.0
+        for day in range(args.days):
+            timestamp = start + timedelta(days=day)
+            started = time.perf_counter()
+            results = [make_result(host, timestamp, rng) for host in hosts]
+            build += time.perf_counter() - started
+
+            started = time.perf_counter()
+            for result in results:
+                writer.add(result)
+            writer.flush()
+            write += time.perf_counter() - started
+
+            if day < args.json_days:
+                path = os.path.join(workdir, f"report_{day}.json")
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump([r.model_dump(mode="json") for r in results], f, ensure_ascii=False, indent=2)
+                json_paths.append(path)
+
+        rows = args.hosts * args.days
+        print(f"{args.hosts} 台主机 × {args.days} 天 = {rows} 条结果 (生成 {build:.1f}s)")
+        print(f"归档写入: {write:.2f}s ({write / rows * 1e6:.1f} µs/条)")
+        archive_size = dir_size(archive_root)
+        print(f"归档大小: {archive_size / 1024 ** 2:.1f} MB ({archive_size / rows:.0f} B/条)")
+
+        reader = ArchiveReader(archive_root)
+        started = time.perf_counter()
+        data = reader.read(["memory.usage_percent"])
+        mean = float(data["memory.usage_percent"].mean())
+        scan = time.perf_counter() - started
+        print(f"归档扫描 memory.usage_percent: {scan * 1000:.0f} ms ({len(data['memory.usage_percent'])} 行, 均值 {mean:.1f})")
+
+        started = time.perf_counter()
+        data = reader.read(["timestamp", "memory.usage_percent"], hosts=[hosts[0]])
+        single = time.perf_counter() - started
+        print(f"归档扫描单台主机: {single * 1000:.0f} ms ({len(data['timestamp'])} 行)")
+
+        if json_paths:
+            json_size = sum(os.path.getsize(path) for path in json_paths)
+            started = time.perf_counter()
+            values = []
+            for path in json_paths:
+                with open(path, 'r', encoding='utf-8') as f:
+                    values += [r["memory"]["usage_percent"] for r in json.load(f) if r.get("memory")]
+            per_day = (time.perf_counter() - started) / len(json_paths)
+            print(f"JSON报告: {json_size / len(json_paths) / 1024 ** 2:.1f} MB/天, "
+                  f"读取 memory.usage_percent {per_day * 1000:.0f} ms/天 "
+                  f"(按 {args.days} 天推算 {per_day * args.days:.1f}s)")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
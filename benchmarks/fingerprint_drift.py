@@ -0,0 +1,140 @@
+"""配置指纹索引的增量更新与漂移查询基准
+
+生成一批主机的巡检结果（少数主机内核、挂载或服务与其余不同），比较用倒排索引与
+逐台扫描结果回答"哪些主机内核不同于多数派""哪些主机缺少某服务"的耗时，并检查两者结果一致。
+
+    python benchmarks/fingerprint_drift.py
+    python benchmarks/fingerprint_drift.py --hosts 50000 --rounds 3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server.fingerprints import FingerprintIndex, SECTIONS  # noqa: E402
+from server.models import (  # noqa: E402
+    InspectionResult, SystemInfo, CPUInfo, DiskInfo, NetworkInfo, ServiceInfo
+)
+
+SERVICES = ["sshd.service", "crond.service", "chronyd.service", "rsyslog.service",
+            "auditd.service", "node_exporter.service", "firewalld.service", "tuned.service"]
+
+
+def make_result(host: str, rng: random.Random) -> InspectionResult:
+    kernel = "3.10.0-1160.el7.x86_64" if rng.random() > 0.03 else rng.choice(
+        ["3.10.0-1062.el7.x86_64", "3.10.0-957.el7.x86_64"]
+    )
+    mounts = [("/", "xfs", "root"), ("/data", "xfs", "data")]
+    if rng.random() < 0.02:
+        mounts.append(("/data2", "ext4", "data"))
+    services = [name for name in SERVICES if rng.random() > 0.01]
+    return InspectionResult.model_construct(
+        host=host,
+        timestamp=datetime(2024, 1, 1),
+        system=SystemInfo.model_construct(
+            os_name="CentOS Linux", os_version="7", kernel_version=kernel,
+            hostname=host, uptime="10 days", boot_time=""
+        ),
+        cpu=CPUInfo.model_construct(cpu_count=32, cpu_usage=10.0, load_average=[1, 1, 1],
+                                    cpu_model=rng.choice(["Intel Xeon Gold 6230", "Intel Xeon Gold 6230",
+                                                          "AMD EPYC 7742"])),
+        memory=None,
+        disks=[
+            DiskInfo.model_construct(device="/dev/sda", mountpoint=mount, filesystem=fs, total=1, used=0,
+                                     free=1, usage_percent=0.0, disk_type=kind)
+            for mount, fs, kind in mounts
+        ],
+        network=NetworkInfo.model_construct(
+            interfaces=[], vips=[], routing_table=[],
+            bonds=[{"name": "Ethernet Channel Bonding Driver", "mode": "1" if rng.random() > 0.01 else "4",
+                    "status": "Active"}]
+        ),
+        processes=None,
+        services=[
+            ServiceInfo.model_construct(name=name, status="running", enabled=True, description="")
+            for name in services
+        ],
+        errors=[],
+    )
+
+
+def scan_kernel_drift(results):
+    """不用索引：逐台取内核版本，找出多数派后再筛一遍"""
+    counts = Counter(r.system.kernel_version for r in results if r.system)
+    majority = counts.most_common(1)[0][0]
+    return sorted(r.host for r in results if r.system and r.system.kernel_version != majority)
+
+
+def scan_missing(results, service: str):
+    return sorted(
+        r.host for r in results
+        if r.services is not None and not any(s.name == service and s.enabled for s in r.services)
+    )
+
+
+def best_of(fn, repeat: int = 5):
+    best = float("inf")
+    value = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="配置指纹索引基准")
+    parser.add_argument('--hosts', type=int, default=10000, help='主机数 (默认: 10000)')
+    parser.add_argument('--rounds', type=int, default=2, help='重复写入的轮数，模拟周期性巡检 (默认: 2)')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    hosts = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(args.hosts)]
+    results = [make_result(host, rng) for host in hosts]
+
+    index = FingerprintIndex()
+    started = time.perf_counter()
+    for result in results:
+        index.update(result)
+    first = time.perf_counter() - started
+    print(f"{args.hosts} 台主机首次建立索引: {first * 1000:.0f} ms ({first / args.hosts * 1e6:.1f} µs/台)")
+
+    for round_no in range(1, args.rounds):
+        # 后续轮次只有约1%的主机配置变化
+        results = [make_result(r.host, rng) if rng.random() < 0.01 else r for r in results]
+        started = time.perf_counter()
+        for result in results:
+            index.update(result)
+        elapsed = time.perf_counter() - started
+        print(f"第 {round_no + 1} 轮增量更新: {elapsed * 1000:.0f} ms ({elapsed / args.hosts * 1e6:.1f} µs/台)")
+
+    overview = index.overview()["sections"]
+    print("各段指纹数: " + ", ".join(f"{name}={overview[name]['fingerprints']}" for name in SECTIONS))
+
+    queries = [
+        ("内核漂移", lambda: scan_kernel_drift(results),
+         lambda: sorted(item["host"] for item in index.drift("kernel", limit=args.hosts)["hosts"])),
+        ("缺少 sshd", lambda: scan_missing(results, "sshd.service"),
+         lambda: index.hosts_by_item("services", "sshd.service", missing=True)),
+    ]
+    mismatched = False
+    for name, scan, lookup in queries:
+        scan_time, expected = best_of(scan)
+        index_time, actual = best_of(lookup)
+        if expected != actual:
+            mismatched = True
+        print(f"{name}: {len(actual)} 台，扫描 {scan_time * 1000:.2f} ms，索引 {index_time * 1000:.3f} ms "
+              f"({scan_time / index_time:.0f}x)")
+    if mismatched:
+        print("索引与扫描结果不一致")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""命令行与服务端的启动导入耗时基准
+
+每个场景在新的解释器中运行多次，取墙钟时间中位数，并用 -X importtime 列出累计耗时最高的模块。
+命令行场景还会检查不应在启动时导入的重量级模块，出现时以非零状态退出，便于在CI中发现启动回退。
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 10 --max-ms 400
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 场景：名称 -> 在新解释器中执行的代码
+SCENARIOS = {
+    "cli --help": "import sys; sys.argv = ['cli.py', '--help']; import cli\ntry:\n    cli.main()\nexcept SystemExit:\n    pass",
+    "cli 单机巡检启动": "import cli; cli.CLIInspector()",
+    "server.main": "import server.main",
+}
+
+# 单机巡检启动时不应导入的模块（只在批量汇总、告警、Web服务中使用）
+CLI_FORBIDDEN = [
+    "numpy", "fastapi", "uvicorn", "urllib.request",
+    "server.aggregation", "server.alerts", "server.archive", "server.journal", "server.store",
+]
+
+CHECK_CODE = (
+    "import sys, cli; cli.CLIInspector(); "
+    f"print(','.join(m for m in {CLI_FORBIDDEN!r} if m in sys.modules))"
+)
+
+
+# 单台主机的批量巡检汇总同样不应导入全量统计与指纹模块（汇总会写出报告文件，在临时目录中运行）
+SUMMARY_FORBIDDEN = ["numpy", "server.aggregation", "server.fingerprints"]
+
+SUMMARY_CODE = (
+    f"import sys; sys.path.insert(0, {ROOT!r}); "
+    "import contextlib, io, cli; from datetime import datetime; "
+    "from server.models import InspectionResult; inspector = cli.CLIInspector(); "
+    "result = InspectionResult(host='10.0.0.1', timestamp=datetime.now()); "
+    "\nwith contextlib.redirect_stdout(io.StringIO()):\n    inspector._generate_summary_report([result])\n"
+    f"print(','.join(m for m in {SUMMARY_FORBIDDEN!r} if m in sys.modules))"
+)
+
+
+def run(code: str, importtime: bool = False, cwd: str = ROOT) -> subprocess.CompletedProcess:
+    args = [sys.executable]
+    if importtime:
+        args += ["-X", "importtime"]
+    return subprocess.run(
+        args + ["-c", code], cwd=cwd, capture_output=True, text=True, check=True
+    )
+
+
+def wall_time(code: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        run(code)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def top_imports(code: str, count: int):
+    """解析 -X importtime 输出，返回累计耗时最高的导入（顶层及其直接导入）"""
+    entries = []
+    for line in run(code, importtime=True).stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # 只统计两层，避免深层子模块刷屏
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth > 1:
+            continue
+        entries.append((int(cumulative) / 1000, "  " * depth + name.strip()))
+    entries.sort(reverse=True)
+    return entries[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动导入耗时基准")
+    parser.add_argument('--runs', type=int, default=5, help='每个场景运行次数 (默认: 5)')
+    parser.add_argument('--top', type=int, default=5, help='列出耗时最高的导入数 (默认: 5)')
+    parser.add_argument('--max-ms', type=float, help='单机巡检启动耗时上限 (毫秒)，超过时以非零状态退出')
+    args = parser.parse_args()
+
+    baseline = wall_time("pass", args.runs)
+    print(f"解释器空启动: {baseline:.0f} ms\n")
+
+    failed = False
+    for name, code in SCENARIOS.items():
+        elapsed = wall_time(code, args.runs)
+        print(f"{name}: {elapsed:.0f} ms (扣除空启动 {elapsed - baseline:.0f} ms)")
+        for cumulative, module in top_imports(code, args.top):
+            print(f"  {cumulative:8.1f} ms  {module}")
+        if name == "cli 单机巡检启动" and args.max_ms is not None and elapsed - baseline > args.max_ms:
+            print(f"  ❌ 超过上限 {args.max_ms:.0f} ms")
+            failed = True
+        print()
+
+    loaded = run(CHECK_CODE).stdout.strip()
+    if loaded:
+        print(f"❌ 单机巡检启动时导入了不必要的模块: {loaded}")
+        failed = True
+    else:
+        print("✅ 单机巡检启动未导入批量汇总、告警与Web服务相关模块")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loaded = run(SUMMARY_CODE, cwd=tmp).stdout.strip()
+    if loaded:
+        print(f"❌ 单台主机的巡检汇总导入了不必要的模块: {loaded}")
+        failed = True
+    else:
+        print("✅ 单台主机的巡检汇总未导入全量统计与指纹模块")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""重构前巡检器中的解析逻辑（去掉SSH调用后的等价实现），仅供 parser_bench.py 对比结果与耗时
+
+原实现中逐项执行的命令（网卡速率、挂载点文件系统类型、服务是否开机启动）在这里改为查表，
+并统计原实现需要执行的远程命令数。
+"""
+import re
+from typing import Dict, List, Any, Tuple
+
+
+def legacy_parse_size(size_str: str) -> int:
+    size_str = size_str.upper()
+    if 'T' in size_str:
+        return int(float(size_str.replace('T', '')) * 1024**4)
+    elif 'G' in size_str:
+        return int(float(size_str.replace('G', '')) * 1024**3)
+    elif 'M' in size_str:
+        return int(float(size_str.replace('M', '')) * 1024**2)
+    elif 'K' in size_str:
+        return int(float(size_str.replace('K', '')) * 1024)
+    else:
+        return int(size_str)
+
+
+def legacy_ip_addr(ip_output: str, speeds: Dict[str, str]) -> Tuple[Dict[str, Any], int]:
+    """speeds 为网卡 -> cat /sys/class/net/<网卡>/speed 的输出（缺省为 Unknown）"""
+    interfaces = []
+    vips = []
+    commands = 0
+    lines = [l.rstrip() for l in ip_output.split('\n')]
+
+    current_header = None
+    current_block_lines = []
+
+    def flush_block():
+        nonlocal current_header, current_block_lines, commands
+        if not current_header:
+            return
+        header = current_header
+        lines_block = current_block_lines
+
+        try:
+            header_parts = header.split(':', 2)
+            interface_name = header_parts[1].strip()
+        except Exception:
+            interface_name = header.split()[1].rstrip(':') if len(header.split()) > 1 else 'unknown'
+
+        if interface_name == 'lo':
+            current_header = None
+            current_block_lines = []
+            return
+
+        ip_address = ""
+        netmask = ""
+        mac_address = ""
+        status = "UP" if (' state UP ' in header or header.strip().endswith('state UP')) else "DOWN"
+
+        for line in lines_block:
+            s = line.strip()
+            if s.startswith('link/ether'):
+                parts = s.split()
+                if len(parts) >= 2:
+                    mac_address = parts[1]
+            elif s.startswith('inet '):
+                ip_info = s.split()[1]
+                if '/' in ip_info:
+                    ip_address, netmask = ip_info.split('/', 1)
+
+        interface_type = "physical"
+        if interface_name.startswith('bond'):
+            interface_type = "bond"
+        elif interface_name.startswith('veth') or interface_name.startswith('docker'):
+            interface_type = "virtual"
+
+        commands += 1
+        speed_val = speeds.get(interface_name, "Unknown")
+        speed = speed_val if speed_val and speed_val != "Unknown" else None
+
+        interfaces.append({
+            "name": interface_name,
+            "ip_address": ip_address,
+            "netmask": netmask,
+            "mac_address": mac_address,
+            "interface_type": interface_type,
+            "status": status,
+            "speed": speed
+        })
+
+        current_header = None
+        current_block_lines = []
+
+    for line in lines:
+        if not line:
+            if current_header is not None:
+                flush_block()
+            continue
+        if line[0].isdigit() and ':' in line.split(' ', 1)[0]:
+            if current_header is not None:
+                flush_block()
+            current_header = line
+            current_block_lines = []
+        else:
+            if current_header is not None:
+                current_block_lines.append(line)
+
+    if current_header is not None:
+        flush_block()
+
+    for line in lines:
+        s = line.strip()
+        if s.startswith('inet') and 'secondary' in s:
+            parts = s.split()
+            if len(parts) >= 2:
+                vips.append({
+                    "ip": parts[1].split('/')[0],
+                    "type": "keepalived",
+                    "interface": "secondary"
+                })
+
+    return {"interfaces": interfaces, "vips": vips}, commands + 1
+
+
+def legacy_bonding(bond_info: str) -> List[Dict[str, Any]]:
+    bonds = []
+    if bond_info and bond_info != '':
+        bond_blocks = bond_info.split('\n\n')
+        for block in bond_blocks:
+            if 'Bonding Mode' in block:
+                bond_name = block.split('\n')[0].split(':')[0]
+                mode_match = re.search(r'Bonding Mode: (\d+)', block)
+                mode = mode_match.group(1) if mode_match else "Unknown"
+                bonds.append({
+                    "name": bond_name,
+                    "mode": mode,
+                    "status": "Active" if "Currently Active Slave" in block else "Inactive"
+                })
+    return bonds
+
+
+def legacy_routes(route_output: str) -> List[Dict[str, str]]:
+    routing_table = []
+
+    def parse_route(line: str):
+        parts = line.split()
+        if len(parts) >= 3:
+            routing_table.append({
+                "destination": parts[0],
+                "gateway": parts[2] if len(parts) > 2 else "",
+                "interface": parts[-1] if len(parts) > 2 else ""
+            })
+
+    for line in route_output.split('\n'):
+        parse_route(line)
+    return routing_table
+
+
+def legacy_df(df_output: str, fs_types: Dict[str, str]) -> Tuple[List[Dict[str, Any]], int]:
+    """df_output 为 df -h 的输出，fs_types 为挂载点 -> df -T 得到的文件系统类型"""
+    lines = df_output.split('\n')[1:]
+    commands = 1
+    disks = []
+    for line in lines:
+        if line.strip():
+            parts = line.split()
+            if len(parts) >= 6:
+                device = parts[0]
+                mountpoint = parts[5]
+
+                skip_mountpoints = set([
+                    '/dev', '/proc', '/sys', '/run', '/dev/shm', '/sys/fs/cgroup', '/var/run', '/tmp'
+                ])
+                if mountpoint in skip_mountpoints or mountpoint.startswith('/run/') or mountpoint.startswith('/run/user/'):
+                    continue
+
+                commands += 1
+                fs_type = fs_types[mountpoint]
+
+                if fs_type in ['tmpfs', 'devtmpfs', 'overlay', 'squashfs']:
+                    continue
+
+                total_str = parts[1]
+                used_str = parts[2]
+                available_str = parts[3]
+                usage_percent = float(parts[4].rstrip('%'))
+
+                total = legacy_parse_size(total_str)
+                used = legacy_parse_size(used_str)
+                free = legacy_parse_size(available_str)
+
+                if mountpoint == "/":
+                    disk_type = "root"
+                elif mountpoint.startswith('/data') or mountpoint.startswith('/storage'):
+                    disk_type = "data"
+                else:
+                    disk_type = "other"
+
+                if disk_type not in ["root", "data"]:
+                    continue
+
+                disks.append({
+                    "device": device,
+                    "mountpoint": mountpoint,
+                    "filesystem": fs_type,
+                    "total": total,
+                    "used": used,
+                    "free": free,
+                    "usage_percent": usage_percent,
+                    "disk_type": disk_type
+                })
+    return disks, commands
+
+
+def legacy_ps(ps_output: str) -> List[Dict[str, Any]]:
+    processes = []
+    try:
+        lines = ps_output.split('\n')[1:]
+        for line in lines:
+            if line.strip():
+                parts = line.split(None, 10)
+                if len(parts) >= 11:
+                    processes.append({
+                        "pid": int(parts[1]),
+                        "name": parts[10][:50],
+                        "cpu_percent": float(parts[2]),
+                        "memory_percent": float(parts[3]),
+                        "status": parts[7],
+                        "command": parts[10]
+                    })
+    except:
+        pass
+    return processes
+
+
+def legacy_systemctl(systemctl_output: str, enabled_states: Dict[str, str]) -> Tuple[List[Dict[str, Any]], int]:
+    """enabled_states 为服务 -> systemctl is-enabled 的输出"""
+    services = []
+    commands = 1
+    lines = systemctl_output.split('\n')[1:]
+    for line in lines:
+        if line.strip() and not line.startswith('UNIT'):
+            parts = line.split()
+            if len(parts) >= 4:
+                service_name = parts[0]
+                status = parts[2]
+                commands += 1
+                enabled = enabled_states.get(service_name, "unknown").strip() == "enabled"
+                services.append({
+                    "name": service_name,
+                    "status": status,
+                    "enabled": enabled,
+                    "description": " ".join(parts[3:]) if len(parts) > 3 else ""
+                })
+    return services, commands
@@ -0,0 +1,308 @@
+"""巡检命令输出解析的微基准
+
+对 benchmarks/corpus 下录制的命令输出，以及在内存中生成的大型主机（5万条路由的路由器、
+2000块veth网卡的Kubernetes节点），分别运行重构前的解析逻辑（legacy_parsers.py）与
+server/parsers.py，检查结果完全一致，并比较耗时与需要执行的远程命令数。
+
+    python benchmarks/parser_bench.py
+    python benchmarks/parser_bench.py --profile router --repeat 10
+    python benchmarks/parser_bench.py --write-corpus   # 把生成的大型主机输出写入 corpus 目录
+
+每个主机目录包含 ip_addr.txt、ip_route.txt、bonding.txt、df.txt（df -hT）、ps.txt、systemctl.txt。
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(ROOT, "benchmarks", "corpus")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from server.parsers import (  # noqa: E402
+    parse_ip_addr, parse_speeds, parse_bonding, parse_routes, parse_df, parse_ps,
+    parse_systemctl, mark_enabled
+)
+from legacy_parsers import (  # noqa: E402
+    legacy_ip_addr, legacy_bonding, legacy_routes, legacy_df, legacy_ps, legacy_systemctl
+)
+
+FILES = ("ip_addr", "ip_route", "bonding", "df", "ps", "systemctl")
+
+PS_HEADER = "USER       PID %CPU %MEM    VSZ   RSS TTY      STAT START   TIME COMMAND"
+SYSTEMCTL_HEADER = "UNIT                     LOAD   ACTIVE SUB     DESCRIPTION"
+DF_HEADER = "Filesystem              Type      Size  Used Avail Use% Mounted on"
+
+
+def _mac(rng: random.Random) -> str:
+    return ":".join(f"{rng.randrange(256):02x}" for _ in range(6))
+
+
+def _interface(index: int, name: str, rng: random.Random, inets: List[str], master: str = "") -> List[str]:
+    flags = "<BROADCAST,MULTICAST,UP,LOWER_UP>"
+    lines = [
+        f"{index}: {name}: {flags} mtu 1500 qdisc noqueue {master}state UP group default qlen 1000",
+        f"    link/ether {_mac(rng)} brd ff:ff:ff:ff:ff:ff",
+    ]
+    for inet in inets:
+        lines.append(f"    {inet}")
+        lines.append("       valid_lft forever preferred_lft forever")
+    return lines
+
+
+def _loopback() -> List[str]:
+    return [
+        "1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN group default qlen 1000",
+        "    link/loopback 00:00:00:00:00:00 brd 00:00:00:00:00:00",
+        "    inet 127.0.0.1/8 scope host lo",
+        "       valid_lft forever preferred_lft forever",
+    ]
+
+
+def _df_line(device: str, fs: str, size: str, used: str, avail: str, percent: int, mount: str) -> str:
+    return f"{device:<23} {fs:<9} {size:>5} {used:>5} {avail:>5} {percent:>3}% {mount}"
+
+
+def _ps(rng: random.Random, count: int, commands: List[str]) -> str:
+    lines = [PS_HEADER]
+    for i in range(count):
+        command = commands[i % len(commands)]
+        lines.append(
+            f"root     {1000 + i:>5} {rng.uniform(0, 99):4.1f} {rng.uniform(0, 9):4.1f} "
+            f"{rng.randrange(10 ** 5, 10 ** 7):>7} {rng.randrange(10 ** 3, 10 ** 6):>6} ?        "
+            f"Ssl  Mar02   {rng.randrange(600)}:{rng.randrange(60):02d} {command} --id={i}"
+        )
+    return "\n".join(lines)
+
+
+def _systemctl(names: List[str]) -> str:
+    # 与巡检命令一致，只取 head -20
+    lines = [SYSTEMCTL_HEADER]
+    for name in names[:19]:
+        lines.append(f"{name + '.service':<24} loaded active running {name} daemon")
+    return "\n".join(lines)
+
+
+def make_router(rng: random.Random, routes: int = 50000) -> Dict[str, str]:
+    """边界路由器：48个口、两组bond、keepalived VIP、BGP学到的大量路由"""
+    ip_lines = _loopback()
+    index = 2
+    for i in range(48):
+        master = f"master bond{i % 2} " if i < 4 else ""
+        inets = [] if master else [f"inet 10.{i}.0.1/24 brd 10.{i}.0.255 scope global eth{i}"]
+        ip_lines += _interface(index, f"eth{i}", rng, inets, master)
+        index += 1
+    for b in range(2):
+        inets = [f"inet 192.168.{b}.2/24 brd 192.168.{b}.255 scope global bond{b}"]
+        inets += [
+            f"inet 192.168.{b}.{100 + v}/24 scope global secondary bond{b}" for v in range(100)
+        ]
+        ip_lines += _interface(index, f"bond{b}", rng, inets)
+        index += 1
+
+    route_lines = ["default via 192.168.0.1 dev bond0 proto static metric 100 "]
+    for i in range(routes):
+        route_lines.append(
+            f"10.{64 + i // 65536}.{i // 256 % 256}.{i % 256}/32 via 192.168.{i % 2}.1 "
+            f"dev bond{i % 2} proto bird metric 32 "
+        )
+
+    bond_blocks = []
+    for b in range(2):
+        bond_blocks.append(
+            "Ethernet Channel Bonding Driver: v3.7.1 (April 27, 2011)\n\n"
+            f"Bonding Mode: IEEE 802.3ad Dynamic link aggregation\nTransmit Hash Policy: layer3+4 (1)\n"
+            f"MII Status: up\n\nSlave Interface: eth{2 * b}\nMII Status: up\nSpeed: 25000 Mbps\n\n"
+            f"Slave Interface: eth{2 * b + 1}\nMII Status: up\nSpeed: 25000 Mbps\n"
+        )
+
+    df_lines = [
+        DF_HEADER,
+        _df_line("devtmpfs", "devtmpfs", "16G", "0", "16G", 0, "/dev"),
+        _df_line("tmpfs", "tmpfs", "16G", "0", "16G", 0, "/dev/shm"),
+        _df_line("tmpfs", "tmpfs", "16G", "9.6M", "16G", 1, "/run"),
+        _df_line("/dev/sda2", "xfs", "100G", "12G", "89G", 12, "/"),
+        _df_line("/dev/sda1", "xfs", "1014M", "226M", "789M", 23, "/boot"),
+    ]
+    return {
+        "ip_addr": "\n".join(ip_lines),
+        "ip_route": "\n".join(route_lines),
+        "bonding": "\n".join(bond_blocks),
+        "df": "\n".join(df_lines),
+        "ps": _ps(rng, 19, ["/usr/sbin/bird -c /etc/bird.conf", "/usr/sbin/keepalived -D"]),
+        "systemctl": _systemctl(["bird", "keepalived", "sshd", "chronyd", "rsyslog", "crond"]),
+    }
+
+
+def make_k8s_node(rng: random.Random, pods: int = 2000) -> Dict[str, str]:
+    """Kubernetes节点：每个Pod一块veth与一条/32路由、大量overlay与tmpfs挂载"""
+    ip_lines = _loopback()
+    ip_lines += _interface(2, "eth0", rng, ["inet 10.30.0.15/16 brd 10.30.255.255 scope global eth0"])
+    ip_lines += _interface(3, "docker0", rng, ["inet 172.17.0.1/16 brd 172.17.255.255 scope global docker0"])
+    ip_lines += _interface(4, "cni0", rng, ["inet 10.244.1.1/24 brd 10.244.1.255 scope global cni0"])
+    route_lines = [
+        "default via 10.30.0.1 dev eth0 proto dhcp metric 100 ",
+        "10.30.0.0/16 dev eth0 proto kernel scope link src 10.30.0.15 ",
+    ]
+    for i in range(pods):
+        name = f"veth{rng.getrandbits(32):08x}@if3"
+        ip_lines += _interface(5 + i, name, rng, [], "master cni0 ")
+        ip_lines.append(f"    link-netns cni-{rng.getrandbits(64):016x}")
+        route_lines.append(f"10.244.{1 + i // 250}.{2 + i % 250} dev {name.split('@')[0]} scope link ")
+
+    df_lines = [
+        DF_HEADER,
+        _df_line("devtmpfs", "devtmpfs", "63G", "0", "63G", 0, "/dev"),
+        _df_line("tmpfs", "tmpfs", "63G", "0", "63G", 0, "/dev/shm"),
+        _df_line("/dev/nvme0n1p2", "xfs", "200G", "121G", "80G", 61, "/"),
+        _df_line("/dev/nvme1n1", "xfs", "1.8T", "930G", "870G", 52, "/data"),
+    ]
+    for i in range(pods // 4):
+        container = f"{rng.getrandbits(128):032x}"
+        df_lines.append(_df_line("overlay", "overlay", "200G", "121G", "80G", 61,
+                                 f"/var/lib/docker/overlay2/{container}/merged"))
+        df_lines.append(_df_line("shm", "tmpfs", "64M", "0", "64M", 0,
+                                 f"/var/lib/docker/containers/{container}/mounts/shm"))
+        df_lines.append(_df_line("tmpfs", "tmpfs", "170M", "12K", "170M", 1,
+                                 f"/var/lib/kubelet/pods/{rng.getrandbits(128):032x}/volumes/token"))
+    return {
+        "ip_addr": "\n".join(ip_lines),
+        "ip_route": "\n".join(route_lines),
+        "bonding": "",
+        "df": "\n".join(df_lines),
+        "ps": _ps(rng, 19, ["/usr/bin/kubelet --config=/var/lib/kubelet/config.yaml", "/usr/bin/containerd"]),
+        "systemctl": _systemctl(["kubelet", "containerd", "docker", "sshd", "chronyd", "crond"]),
+    }
+
+
+GENERATED = {"router": make_router, "k8s_node": make_k8s_node}
+
+
+def load_corpus() -> Dict[str, Dict[str, str]]:
+    profiles = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        directory = os.path.join(CORPUS_DIR, name)
+        if not os.path.isdir(directory):
+            continue
+        outputs = {}
+        for key in FILES:
+            path = os.path.join(directory, f"{key}.txt")
+            with open(path, 'r', encoding='utf-8') as f:
+                outputs[key] = f.read()
+        profiles[name] = outputs
+    return profiles
+
+
+def write_corpus(name: str, outputs: Dict[str, str]):
+    directory = os.path.join(CORPUS_DIR, name)
+    os.makedirs(directory, exist_ok=True)
+    for key, text in outputs.items():
+        with open(os.path.join(directory, f"{key}.txt"), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def speed_of(name: str) -> str:
+    """模拟 /sys/class/net/<网卡>/speed：虚拟网卡无速率"""
+    return "Unknown" if name.startswith(("veth", "docker", "cni", "bond")) else "10000"
+
+
+def cases(outputs: Dict[str, str]) -> List[tuple]:
+    """(解析器, 输出行数, 旧实现, 新实现, 旧命令数, 新命令数)"""
+    ip_text = outputs["ip_addr"]
+    names = [interface["name"] for interface in parse_ip_addr(ip_text)["interfaces"]]
+    speeds = {name: speed_of(name) for name in names}
+    # 新实现批量读取速率的命令输出
+    speed_output = "\n".join(f"{name}\t{speeds[name]}" for name in names)
+
+    def new_ip():
+        info = parse_ip_addr(ip_text)
+        parsed = parse_speeds(speed_output)
+        for interface in info["interfaces"]:
+            interface["speed"] = parsed.get(interface["name"])
+        return info
+
+    df_text = outputs["df"]
+    # 旧实现执行 df -h，再对每个挂载点执行 df -T
+    df_rows = [line.split() for line in df_text.split('\n')]
+    df_h = "\n".join(" ".join([row[0]] + row[2:]) for row in df_rows if len(row) >= 7)
+    fs_types = {row[6]: row[1] for row in df_rows[1:] if len(row) >= 7}
+
+    sys_text = outputs["systemctl"]
+    services = [service["name"] for service in parse_systemctl(sys_text)]
+    states = {name: ("enabled" if i % 3 else "disabled") for i, name in enumerate(services)}
+    enabled_output = "\n".join(f"{name}\t{states[name]}" for name in services)
+
+    # 旧解析器拿到的是逐个服务执行 is-enabled 的结果，新解析器要拆分批量命令的输出，
+    # 纯解析耗时略高，换来的是远程命令从每服务一条减少为一条
+    def new_services():
+        units = parse_systemctl(sys_text)
+        mark_enabled(units, enabled_output)
+        return units
+
+    ip_legacy_commands = legacy_ip_addr(ip_text, speeds)[1]
+    df_legacy_commands = legacy_df(df_h, fs_types)[1]
+    sys_legacy_commands = legacy_systemctl(sys_text, states)[1]
+    return [
+        ("ip_addr", ip_text, lambda: legacy_ip_addr(ip_text, speeds)[0], new_ip,
+         ip_legacy_commands, 2 if names else 1),
+        ("bonding", outputs["bonding"], lambda: legacy_bonding(outputs["bonding"]),
+         lambda: parse_bonding(outputs["bonding"]), 1, 1),
+        ("ip_route", outputs["ip_route"], lambda: legacy_routes(outputs["ip_route"]),
+         lambda: parse_routes(outputs["ip_route"]), 1, 1),
+        ("df", df_text, lambda: legacy_df(df_h, fs_types)[0], lambda: parse_df(df_text),
+         df_legacy_commands, 1),
+        ("ps", outputs["ps"], lambda: legacy_ps(outputs["ps"]), lambda: parse_ps(outputs["ps"]), 1, 1),
+        ("systemctl", sys_text, lambda: legacy_systemctl(sys_text, states)[0], new_services,
+         sys_legacy_commands, 2 if services else 1),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="命令输出解析基准")
+    parser.add_argument('--profile', action='append', help='只运行指定主机（可多次指定）')
+    parser.add_argument('--repeat', type=int, default=5, help='每项取最快一次的重复次数 (默认: 5)')
+    parser.add_argument('--seed', type=int, default=1, help='生成大型主机输出的随机种子')
+    parser.add_argument('--write-corpus', action='store_true', help='把生成的大型主机输出写入 corpus 目录')
+    args = parser.parse_args()
+
+    profiles = load_corpus()
+    for name, make in GENERATED.items():
+        if name not in profiles:
+            profiles[name] = make(random.Random(args.seed))
+            if args.write_corpus:
+                write_corpus(name, profiles[name])
+    if args.profile:
+        profiles = {name: profiles[name] for name in args.profile}
+
+    mismatched = []
+    print(f"{'主机':<10} {'解析器':<10} {'行数':>7} {'旧(ms)':>9} {'新(ms)':>9} {'加速':>6} {'远程命令':>12}")
+    for name, outputs in profiles.items():
+        for parser_name, text, legacy, new, old_commands, new_commands in cases(outputs):
+            if legacy() != new():
+                mismatched.append(f"{name}/{parser_name}")
+            old_time = best_of(legacy, args.repeat)
+            new_time = best_of(new, args.repeat)
+            speedup = old_time / new_time if new_time > 0 else float("inf")
+            print(f"{name:<10} {parser_name:<10} {text.count(chr(10)) + 1:>7} {old_time * 1000:>9.3f} "
+                  f"{new_time * 1000:>9.3f} {speedup:>5.1f}x {old_commands:>5} -> {new_commands:<4}")
+
+    if mismatched:
+        print(f"结果不一致: {', '.join(mismatched)}")
+        sys.exit(1)
+    print("新旧解析结果一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""最新状态存储的内存占用基准
+
+生成合成巡检结果，分别以Pydantic模型和 CompactResult 保存，比较每台主机的内存占用、
+还原模型的耗时以及一次完整GC的耗时。
+
+    python benchmarks/store_memory.py --hosts 20000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.models import (
+    InspectionResult, SystemInfo, CPUInfo, MemoryInfo,
+    DiskInfo, NetworkInfo, NetworkInterface
+)
+from server.compact import CompactResult
+from server.store import ResultStore
+
+KERNELS = ["5.15.0-91-generic", "5.15.0-94-generic", "4.18.0-513.el8.x86_64", "6.1.0-17-amd64"]
+OS_NAMES = ["Ubuntu 22.04.3 LTS", "CentOS Linux 8", "Debian GNU/Linux 12 (bookworm)"]
+
+
+def make_result(i: int, rng: random.Random, routes: int) -> InspectionResult:
+    """按接近生产环境的结构生成一台主机的结果，重复字段逐个新建字符串，模拟从SSH输出解析而来"""
+    host = f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+    kernel = "".join(rng.choice(KERNELS))
+    os_name = "".join(rng.choice(OS_NAMES))
+    disks = [
+        DiskInfo(
+            device=f"/dev/sd{chr(97 + d)}1", mountpoint="/" if d == 0 else f"/data{d}",
+            filesystem="ext4", total=10 ** 12, used=rng.randint(0, 10 ** 12),
+            free=rng.randint(0, 10 ** 12), usage_percent=rng.uniform(0, 100),
+            disk_type="root" if d == 0 else "data"
+        )
+        for d in range(5)
+    ]
+    interfaces = [
+        NetworkInterface(
+            name=f"eth{n}", ip_address=f"{host[:-1]}{n}", netmask="24",
+            mac_address=f"52:54:00:{i % 256:02x}:{n:02x}:01", interface_type="physical",
+            status="UP", speed="10000"
+        )
+        for n in range(4)
+    ]
+    return InspectionResult(
+        host=host,
+        timestamp=datetime.now(),
+        system=SystemInfo(
+            os_name=os_name, os_version=os_name.split()[-1], kernel_version=kernel,
+            hostname=f"node-{i}", uptime=f"up {rng.randint(1, 400)} days", boot_time="system boot  2024-01-01 00:00"
+        ),
+        cpu=CPUInfo(
+            cpu_count=32, cpu_usage=rng.uniform(0, 100),
+            load_average=[rng.uniform(0, 32) for _ in range(3)],
+            cpu_model="".join(" Intel(R) Xeon(R) Gold 6248R CPU @ 3.00GHz").strip()
+        ),
+        memory=MemoryInfo(
+            total=2 ** 37, available=2 ** 36, used=2 ** 36, free=2 ** 35,
+            usage_percent=rng.uniform(0, 100), swap_total=2 ** 33, swap_used=2 ** 30, swap_free=2 ** 32
+        ),
+        disks=disks,
+        network=NetworkInfo(
+            interfaces=interfaces,
+            bonds=[{"name": "bond0", "mode": "4", "status": "Active"}],
+            vips=[{"ip": f"{host[:-1]}100", "type": "keepalived", "interface": "secondary"}],
+            routing_table=[
+                {"destination": f"172.{r // 256}.{r % 256}.0/24", "gateway": "via", "interface": "eth0"}
+                for r in range(routes)
+            ]
+        )
+    )
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+
+def gc_time() -> float:
+    started = time.perf_counter()
+    gc.collect()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="最新状态存储内存占用基准")
+    parser.add_argument('--hosts', type=int, default=10000, help='主机数 (默认: 10000)')
+    parser.add_argument('--routes', type=int, default=20, help='每台主机的路由条数 (默认: 20)')
+    args = parser.parse_args()
+
+    def generate():
+        rng = random.Random(42)
+        return (make_result(i, rng, args.routes) for i in range(args.hosts))
+
+    # 每种方式都从头生成结果，只保留自己持有的部分
+    models, model_bytes = measure(lambda: {r.host: r for r in generate()})
+    compact, compact_bytes = measure(lambda: {r.host: CompactResult(r) for r in generate()})
+    store = ResultStore()
+    _, store_bytes = measure(lambda: [store.update(r) for r in generate()] and None)
+
+    print(f"主机数: {args.hosts}，每台路由: {args.routes}")
+    print(f"{'方式':<24}{'每台字节':>12}{'总计(MiB)':>12}")
+    for name, size in [
+        ("Pydantic模型", model_bytes),
+        ("CompactResult", compact_bytes),
+        ("ResultStore(含索引)", store_bytes),
+    ]:
+        print(f"{name:<24}{size / args.hosts:>12.0f}{size / 2 ** 20:>12.1f}")
+
+    gc_models = gc_time()
+    del models
+    gc_compact = gc_time()
+    print(f"\n完整GC耗时: 含Pydantic模型 {gc_models * 1000:.1f} ms，去掉模型后 {gc_compact * 1000:.1f} ms")
+
+    started = time.perf_counter()
+    for record in compact.values():
+        record.to_model()
+    elapsed = time.perf_counter() - started
+    print(f"还原模型: {elapsed / len(compact) * 1e6:.1f} µs/台")
+
+
+if __name__ == "__main__":
+    main()
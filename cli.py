@@ -7,15 +7,109 @@ import argparse
 import asyncio
 import json
 import sys
-from typing import List, Optional
-from pathlib import Path
+from typing import List, Optional, TYPE_CHECKING
 
-from server.inspector import ServerInspector
-from server.models import ServerInfo
+# 重量级依赖（paramiko、pydantic、numpy等）在实际用到时才导入，
+# 使 --help、参数错误和单机巡检不必为用不到的模块付出导入开销
+if TYPE_CHECKING:
+    from server.alerts import AlertEngine
+    from server.archive import ArchiveWriter
 
 class CLIInspector:
     def __init__(self):
+        from server.inspector import ServerInspector
+
         self.inspector = ServerInspector()
+        self.alerts: Optional["AlertEngine"] = None
+        self.static_cache_path: Optional[str] = None
+        self.archive: Optional["ArchiveWriter"] = None
+        self.baseline_path: Optional[str] = None
+
+    def enable_alerts(
+        self,
+        rules_file: Optional[str] = None,
+        alert_log: Optional[str] = None,
+        webhook: Optional[str] = None
+    ):
+        """启用告警规则评估"""
+        from server.alerts import AlertEngine, load_rules, WebhookSink, FileSink
+
+        self.alerts = AlertEngine(load_rules(rules_file))
+        if alert_log:
+            self.alerts.add_sink(FileSink(alert_log))
+        if webhook:
+            self.alerts.add_sink(WebhookSink(webhook))
+
+    def enable_anomaly(self, state_path: str):
+        """启用基线异常检测与磁盘写满预测，基线保存在state_path中跨运行累积"""
+        from server.alerts import AlertEngine
+        from server.anomaly import AnomalyDetector
+
+        if self.alerts is None:
+            self.alerts = AlertEngine([])
+        self.alerts.detector = AnomalyDetector()
+        self.baseline_path = state_path
+        try:
+            self.alerts.detector.load(state_path)
+        except Exception as e:
+            print(f"警告: 读取基线失败，重新累积: {str(e)}")
+
+    def save_baselines(self):
+        if self.baseline_path is None:
+            return
+        try:
+            self.alerts.detector.save(self.baseline_path)
+        except Exception as e:
+            print(f"警告: 保存基线失败: {str(e)}")
+
+    def enable_change_only(self, cache_path: str):
+        """启用静态段变更采集，各段哈希与解析结果保存在cache_path中供下次运行比较"""
+        self.static_cache_path = cache_path
+        self.inspector.change_only = True
+        try:
+            self.inspector.static_cache.load(cache_path)
+        except Exception as e:
+            print(f"警告: 读取静态段缓存失败，本次全量采集: {str(e)}")
+
+    def save_static_cache(self):
+        if self.static_cache_path is None:
+            return
+        try:
+            self.inspector.static_cache.save(self.static_cache_path)
+        except Exception as e:
+            print(f"警告: 保存静态段缓存失败: {str(e)}")
+
+    def enable_archive(self, root: str, compress: bool = False):
+        """巡检结果按日期分区写入列式归档"""
+        from server.archive import ArchiveWriter
+
+        self.archive = ArchiveWriter(root, compress=compress)
+
+    def save_archive(self):
+        if self.archive is None or len(self.archive) == 0:
+            return
+        try:
+            for path in self.archive.flush():
+                print(f"🗄️ 巡检结果已归档到: {path}")
+        except Exception as e:
+            print(f"警告: 写入归档失败: {str(e)}")
+
+    async def run(self, inspection):
+        """执行巡检协程，结束前等待告警发送完毕"""
+        try:
+            await inspection
+        finally:
+            if self.alerts is not None:
+                await self.alerts.close()
+
+    async def _evaluate_alerts(self, result):
+        """评估告警并打印新触发的告警"""
+        if self.alerts is None or isinstance(result, dict):
+            return
+        for event in await self.alerts.process(result):
+            if event["status"] == "firing":
+                instance = f" [{event['instance']}]" if event['instance'] else ""
+                print(f"  🚨 告警 {event['rule']} ({event['severity']}){instance}: {event['expr']}, 当前值 {event['value']}")
 
     async def inspect_single_server(
         self,
@@ -24,7 +118,8 @@ class CLIInspector:
         password: Optional[str] = None,
         key_path: Optional[str] = None,
         port: int = 22,
-        checks: List[str] = None
+        checks: List[str] = None,
+        jump_host: Optional[dict] = None
     ):
         """巡检单台服务器"""
         print(f"正在巡检服务器: {host}")
@@ -36,10 +131,14 @@ class CLIInspector:
                 password=password,
                 key_path=key_path,
                 port=port,
-                checks=checks
+                checks=checks,
+                jump_host=jump_host
             )
             
             self._print_result(result)
+            await self._evaluate_alerts(result)
+            if self.archive is not None:
+                self.archive.add(result)
             
         except Exception as e:
             print(f"巡检失败: {str(e)}")
@@ -47,90 +146,125 @@ class CLIInspector:
 
     async def inspect_multiple_servers(
         self,
-        hosts_file: str,
+        servers: List[dict],
         username: str,
         password: Optional[str] = None,
         key_path: Optional[str] = None,
         port: int = 22,
-        checks: List[str] = None
+        checks: List[str] = None,
+        jump_host: Optional[dict] = None,
+        journal_path: Optional[str] = None,
+        resume: bool = False
     ):
         """批量巡检多台服务器"""
-        servers = self._parse_hosts_file(hosts_file)
+        # 检查点日志（--journal/--resume 时启用）：每台主机完成后立即落盘，中断后可续跑
+        journal = None
+        if journal_path is not None:
+            from server.journal import CheckpointJournal
+            journal = CheckpointJournal(journal_path)
+        results = []
+        if resume:
+            journal.load()
+            if journal.checks is not None and journal.checks != checks:
+                print(f"警告: 巡检项目与检查点日志不一致 (日志: {','.join(journal.checks)})")
+            results = journal.completed_results()
+            total = len(servers)
+            servers = [
+                s for s in servers
+                if not journal.is_done(s['host'], s.get('port', port))
+            ]
+            print(f"从检查点续跑: 已完成 {total - len(servers)} 台，剩余 {len(servers)} 台")
+        if journal is not None:
+            journal.open(checks)
+            print(f"检查点日志: {journal_path} (中断后可使用 --resume {journal_path} 续跑)")
         
         print(f"开始批量巡检 {len(servers)} 台服务器")
         print("=" * 50)
         
-        results = []
-        for i, server in enumerate(servers, 1):
-            print(f"\n[{i}/{len(servers)}] 正在巡检: {server['host']}")
-            
+        async def inspect_one(server: dict):
             try:
-                result = await self.inspector.inspect_server(
+                return await self.inspector.inspect_server(
                     host=server['host'],
                     username=server.get('username', username),
                     password=server.get('password', password),
                     key_path=server.get('key_path', key_path),
                     port=server.get('port', port),
-                    checks=checks
+                    checks=checks,
+                    jump_host=server.get('jump_host', jump_host)
                 )
-                results.append(result)
-                self._print_result(result, show_header=False)
-                
             except Exception as e:
-                print(f"  巡检失败: {str(e)}")
-                results.append({
+                return {
                     'host': server['host'],
                     'error': str(e)
-                })
+                }
+
+        async def inspect_and_record(server: dict):
+            result = await inspect_one(server)
+            if journal is not None:
+                journal.record(
+                    server['host'],
+                    server.get('port', port),
+                    "success" if self._is_completed(result) else "error",
+                    self._result_to_dict(result)
+                )
+            if self.archive is not None and not isinstance(result, dict):
+                self.archive.add(result, server.get('group'))
+            return result
+
+        # 并发巡检，并发数由巡检器自适应调整
+        tasks = [asyncio.ensure_future(inspect_and_record(server)) for server in servers]
+        try:
+            for i, task in enumerate(asyncio.as_completed(tasks), 1):
+                result = await task
+                results.append(result)
+                if isinstance(result, dict):
+                    print(f"\n[{i}/{len(servers)}] 巡检失败: {result['host']}")
+                    print(f"  巡检失败: {result['error']}")
+                else:
+                    print(f"\n[{i}/{len(servers)}] 巡检完成: {result.host}")
+                    self._print_result(result, show_header=False)
+                await self._evaluate_alerts(result)
+        finally:
+            if journal is not None:
+                journal.close()
         
         # 生成汇总报告
         self._generate_summary_report(results)
 
-    def _parse_hosts_file(self, hosts_file: str) -> List[dict]:
-        """解析主机文件"""
-        servers = []
-        
+    def _is_completed(self, result) -> bool:
+        """是否算作已完成：连接成功并采集到数据（部分巡检项失败也算完成）"""
+        if isinstance(result, dict):
+            return False
+        sections = [
+            result.system, result.cpu, result.memory, result.disks,
+            result.network, result.processes, result.services
+        ]
+        return not result.errors or any(section is not None for section in sections)
+
+    def _load_servers(self, path: str, selector: Optional[str] = None) -> List[dict]:
+        """从主机文件或清单文件（YAML/CSV/JSON Lines）加载服务器，按选择器过滤"""
+        from server.inventory import Inventory
+
+        inventory = Inventory()
         try:
-            with open(hosts_file, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    try:
-                        # 格式: host:port:username:password_or_key_path
-                        parts = line.split(':')
-                        if len(parts) < 2:
-                            print(f"警告: 第{line_num}行格式错误，跳过: {line}")
-                            continue
-                        
-                        server = {
-                            'host': parts[0],
-                            'port': int(parts[1]) if len(parts) > 1 else 22,
-                            'username': parts[2] if len(parts) > 2 else 'root'
-                        }
-                        
-                        # 处理密码或密钥路径
-                        if len(parts) > 3:
-                            if parts[3].startswith('/'):
-                                server['key_path'] = parts[3]
-                            else:
-                                server['password'] = parts[3]
-                        
-                        servers.append(server)
-                        
-                    except Exception as e:
-                        print(f"警告: 第{line_num}行解析失败，跳过: {line} - {str(e)}")
-                        continue
-                        
+            inventory.load(path)
         except FileNotFoundError:
-            print(f"错误: 主机文件不存在: {hosts_file}")
+            print(f"错误: 主机文件不存在: {path}")
             sys.exit(1)
         except Exception as e:
             print(f"错误: 读取主机文件失败: {str(e)}")
             sys.exit(1)
-        
-        return servers
+        for error in inventory.errors:
+            print(f"警告: {error}，跳过")
+
+        try:
+            entries = inventory.select(selector)
+        except ValueError as e:
+            print(f"错误: {str(e)}")
+            sys.exit(1)
+        if selector:
+            print(f"选择器 {selector} 匹配 {len(entries)}/{len(inventory)} 台主机")
+        return [entry.to_server() for entry in entries]
 
     def _print_result(self, result, show_header: bool = True):
         """打印巡检结果"""
@@ -142,7 +276,6 @@ class CLIInspector:
         
         if result.errors:
             print(f"错误: {', '.join(result.errors)}")
-            return
         
         # 系统信息
         if result.system:
@@ -240,18 +373,50 @@ class CLIInspector:
         print("=" * 50)
         
         total_servers = len(results)
-        successful = sum(1 for r in results if not hasattr(r, 'error') or not r.get('error'))
+        successful = sum(1 for r in results if self._is_completed(r))
         failed = total_servers - successful
         
         print(f"总服务器数: {total_servers}")
         print(f"成功巡检: {successful}")
         print(f"巡检失败: {failed}")
+
+        concurrency = self.inspector.limiter.snapshot()
+        connect_ms = concurrency['latency']['connect']['ewma_ms']
+        command_ms = concurrency['latency']['command']['ewma_ms']
+        print(f"收敛并发数: {concurrency['limit']} (连接延迟: {connect_ms} ms, 命令延迟: {command_ms} ms)")
+        
+        # 全量指标统计与配置漂移只在多台主机时有意义，单台时不导入numpy等模块
+        completed = [r for r in results if self._is_completed(r)]
+        if len(completed) > 1:
+            from server.aggregation import FleetColumns
+            from server.fingerprints import FingerprintIndex
+
+            columns = FleetColumns()
+            fingerprints = FingerprintIndex()
+            for result in completed:
+                columns.update(result)
+                fingerprints.update(result)
+            if len(columns) > 0:
+                self._print_fleet_summary(columns.summary(top_k=5))
+            if len(fingerprints) > 1:
+                self._print_drift(fingerprints)
+        
+        if self.alerts is not None:
+            alerts = self.alerts.active()
+            print(f"\n🚨 触发中的告警: {len(alerts)}")
+            for alert in alerts:
+                instance = f" [{alert['instance']}]" if alert['instance'] else ""
+                print(f"  - {alert['host']}{instance}: {alert['rule']} ({alert['severity']}) 当前值 {alert['value']}")
         
         if failed > 0:
             print("\n❌ 巡检失败的服务器:")
             for result in results:
-                if hasattr(result, 'error') and result.get('error'):
+                if self._is_completed(result):
+                    continue
+                if isinstance(result, dict):
                     print(f"  - {result['host']}: {result['error']}")
+                else:
+                    print(f"  - {result.host}: {', '.join(result.errors)}")
         
         # 保存详细结果到JSON文件
         timestamp = results[0].timestamp.strftime("%Y%m%d_%H%M%S") if results and hasattr(results[0], 'timestamp') else "unknown"
@@ -264,6 +429,52 @@ class CLIInspector:
         except Exception as e:
             print(f"\n⚠️ 保存报告失败: {str(e)}")
 
+    def _print_fleet_summary(self, summary: dict):
+        """打印全量指标的分位数统计与Top主机"""
+        labels = {
+            "cpu.usage": "CPU使用率(%)",
+            "cpu.load1": "1分钟负载",
+            "memory.usage_percent": "内存使用率(%)",
+            "swap.usage_percent": "交换分区使用率(%)",
+        }
+        print("\n📈 指标统计:")
+        print(f"  {'指标':<16}{'主机数':>8}{'平均':>9}{'P50':>9}{'P90':>9}{'P99':>9}{'最大':>9}")
+        for name, label in labels.items():
+            stats = summary["metrics"][name]
+            if stats["count"] == 0:
+                continue
+            print(f"  {label:<16}{stats['count']:>8}{stats['mean']:>9.1f}{stats['p50']:>9.1f}"
+                  f"{stats['p90']:>9.1f}{stats['p99']:>9.1f}{stats['max']:>9.1f}")
+        
+        for mountpoint, stats in summary["disks"]["by_mount"].items():
+            print(f"  {'磁盘 ' + mountpoint:<16}{stats['count']:>8}{stats['mean']:>9.1f}{stats['p50']:>9.1f}"
+                  f"{stats['p90']:>9.1f}{stats['p99']:>9.1f}{stats['max']:>9.1f}")
+        
+        disks = summary["disks"]["all"]
+        if disks["count"] > 0:
+            print("\n💿 磁盘使用率最高的挂载点:")
+            for item in disks["top"]:
+                print(f"  - {item['host']} {item['mountpoint']}: {item['value']:.1f}%")
+
+    def _print_drift(self, fingerprints, limit: int = 5):
+        """打印与多数派配置不同的主机"""
+        drifts = [
+            fingerprints.drift(section, limit=limit)
+            for section, stats in fingerprints.overview()["sections"].items()
+            if stats["fingerprints"] > 1
+        ]
+        if not drifts:
+            return
+        print("\n🧬 配置漂移 (与多数派不同的主机):")
+        for drift in drifts:
+            print(f"  {drift['section']}: {drift['drifted']} 台不同于多数派 ({drift['matching']} 台)")
+            for item in drift["hosts"]:
+                if "value" in item:
+                    detail = ", ".join(item["value"])
+                else:
+                    detail = " ".join([f"-{v}" for v in item["missing"]] + [f"+{v}" for v in item["extra"]])
+                print(f"    - {item['host']}: {detail}")
+
     def _result_to_dict(self, result):
         """将结果转换为字典"""
         if hasattr(result, 'dict'):
@@ -273,6 +484,17 @@ class CLIInspector:
         else:
             return {"error": "无法序列化结果"}
 
+def print_profile_report(report: dict, limit: int = 15):
+    """打印性能分析热点与结果文件"""
+    from server.profiling import format_report
+
+    print(f"\n{'='*60}")
+    print("性能分析")
+    print(f"{'='*60}")
+    print(format_report(report, limit), end="")
+    for kind, path in report["files"].items():
+        print(f"{kind}: {path}")
+
 def main():
     parser = argparse.ArgumentParser(
         description="服务器批量巡检工具",
@@ -290,6 +512,19 @@ def main():
 
   # 使用SSH密钥
   python cli.py --host 192.168.1.100 --user root --key-path /path/to/key
+
+  # 写入检查点日志，中断后续跑时跳过已完成的主机
+  python cli.py --hosts hosts.txt --user root --key-path /path/to/key --journal run.jsonl
+  python cli.py --hosts hosts.txt --user root --key-path /path/to/key --resume run.jsonl
+
+  # 从主机清单中选择上海机房的数据库主机
+  python cli.py --inventory inventory.yaml --user root --select group=db,dc=sh
+
+  # 通过跳板机巡检
+  python cli.py --host 10.0.0.5 --user root --key-path /path/to/key --jump bastion.example.com:22:ops:/path/to/key
+
+  # 静态信息（系统版本、网卡、路由表等）只采集发生变化的部分
+  python cli.py --hosts hosts.txt --user root --key-path /path/to/key --changed-only
         """
     )
     
@@ -297,12 +532,43 @@ def main():
     server_group = parser.add_mutually_exclusive_group(required=True)
     server_group.add_argument('--host', help='单台服务器IP地址')
     server_group.add_argument('--hosts', help='主机文件路径 (格式: host:port:username:password)')
+    server_group.add_argument('--inventory', help='主机清单文件 (YAML/CSV/JSON Lines，按扩展名识别)')
+    parser.add_argument('--select', help='按分组、标签或属性选择主机，如 group=db,dc=sh')
     
     # 认证参数
     parser.add_argument('--user', required=True, help='SSH用户名')
     parser.add_argument('--password', help='SSH密码')
     parser.add_argument('--key-path', help='SSH私钥路径')
     parser.add_argument('--port', type=int, default=22, help='SSH端口 (默认: 22)')
+    parser.add_argument('--jump', help='跳板机 (格式: host:port:username:password_or_key_path)')
+    
+    # 检查点参数
+    parser.add_argument('--journal', help='写入检查点日志，中断后可用 --resume 续跑')
+    parser.add_argument('--resume', metavar='JOURNAL', help='从检查点日志续跑，跳过已完成的主机')
+    
+    # 告警参数
+    parser.add_argument('--alerts', action='store_true', help='启用告警规则评估 (未指定 --rules 时使用默认规则)')
+    parser.add_argument('--rules', help='告警规则文件 (JSON)，指定后自动启用告警')
+    parser.add_argument('--alert-log', help='告警事件写入的JSON Lines文件')
+    parser.add_argument('--webhook', help='告警事件POST到的Webhook地址')
+    parser.add_argument('--anomaly', action='store_true', help='按主机历史基线检测异常并预测磁盘写满时间')
+    parser.add_argument('--baseline-state', default='inspection_baselines.json',
+                       help='异常检测基线文件，多次运行间累积 (默认: inspection_baselines.json)')
+    
+    # 变更采集参数
+    parser.add_argument('--changed-only', action='store_true', help='静态段由远端计算哈希，只传回发生变化的部分')
+    parser.add_argument('--static-cache', default='inspection_static_cache.json',
+                       help='静态段缓存文件 (默认: inspection_static_cache.json)')
+    
+    # 归档参数
+    parser.add_argument('--archive', metavar='DIR', help='巡检结果按日期分区追加到列式归档目录')
+    parser.add_argument('--archive-compress', action='store_true', help='归档写为压缩格式 (体积更小，读取时不能内存映射)')
+    
+    # 性能分析参数
+    parser.add_argument('--profile', nargs='?', const='sample', choices=['sample', 'cprofile'],
+                       help='对本次巡检做性能分析：sample 对所有线程采样并输出折叠栈 (默认)，'
+                            'cprofile 对事件循环线程做确定性分析')
+    parser.add_argument('--profile-dir', default='profiles', help='性能分析结果目录 (默认: profiles)')
     
     # 巡检参数
     parser.add_argument('--checks', 
@@ -317,27 +583,68 @@ def main():
     # 创建巡检器
     inspector = CLIInspector()
     
+    # 启用告警
+    if args.alerts or args.rules or args.alert_log or args.webhook:
+        inspector.enable_alerts(args.rules, args.alert_log, args.webhook)
+    if args.anomaly:
+        inspector.enable_anomaly(args.baseline_state)
+    
+    # 启用静态段变更采集
+    if args.changed_only:
+        inspector.enable_change_only(args.static_cache)
+    
+    # 启用归档
+    if args.archive:
+        inspector.enable_archive(args.archive, args.archive_compress)
+    
+    # 解析跳板机
+    jump_host = None
+    if args.jump:
+        from server.inventory import parse_host_spec
+        jump_host = parse_host_spec(args.jump)
+        if jump_host is None:
+            print(f"错误: 跳板机格式错误: {args.jump}")
+            sys.exit(1)
+    
+    # 开启性能分析
+    profiler = None
+    if args.profile:
+        from server.profiling import ProfileSession
+        profiler = ProfileSession(mode=args.profile, output_dir=args.profile_dir)
+        profiler.start()
+    
     # 执行巡检
-    if args.host:
-        # 单台服务器巡检
-        asyncio.run(inspector.inspect_single_server(
-            host=args.host,
-            username=args.user,
-            password=args.password,
-            key_path=args.key_path,
-            port=args.port,
-            checks=checks
-        ))
-    else:
-        # 批量巡检
-        asyncio.run(inspector.inspect_multiple_servers(
-            hosts_file=args.hosts,
-            username=args.user,
-            password=args.password,
-            key_path=args.key_path,
-            port=args.port,
-            checks=checks
-        ))
+    try:
+        if args.host:
+            # 单台服务器巡检
+            asyncio.run(inspector.run(inspector.inspect_single_server(
+                host=args.host,
+                username=args.user,
+                password=args.password,
+                key_path=args.key_path,
+                port=args.port,
+                checks=checks,
+                jump_host=jump_host
+            )))
+        else:
+            # 批量巡检
+            asyncio.run(inspector.run(inspector.inspect_multiple_servers(
+                servers=inspector._load_servers(args.hosts or args.inventory, args.select),
+                username=args.user,
+                password=args.password,
+                key_path=args.key_path,
+                port=args.port,
+                checks=checks,
+                jump_host=jump_host,
+                journal_path=args.resume or args.journal,
+                resume=bool(args.resume)
+            )))
+    finally:
+        inspector.save_static_cache()
+        inspector.save_archive()
+        inspector.save_baselines()
+        if profiler is not None:
+            print_profile_report(profiler.stop())
 
 if __name__ == "__main__":
     main()
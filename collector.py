@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+服务器批量巡检工具 - 采集节点
+
+部署在各数据中心附近，从中心服务领取待巡检的主机，用与中心服务相同的巡检器在本地巡检，
+再把结果批量压缩后回传，SSH连接不必跨广域网。
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Any, Set
+
+
+class CollectorNode:
+    def __init__(
+        self,
+        server_url: str,
+        name: str,
+        datacenter: Optional[str] = None,
+        token: Optional[str] = None,
+        max_hosts: int = 200,
+        heartbeat_interval: float = 10.0,
+        push_interval: float = 1.0,
+        push_batch: int = 200
+    ):
+        from server.inspector import ServerInspector
+
+        self.inspector = ServerInspector()
+        self.server_url = server_url.rstrip('/')
+        self.name = name
+        self.datacenter = datacenter
+        self.token = token
+        self.max_hosts = max_hosts
+        self.heartbeat_interval = heartbeat_interval
+        self.push_interval = push_interval
+        self.push_batch = push_batch
+        # 待回传的结果
+        self.outbox: List[Dict[str, Any]] = []
+        self.running: Set[asyncio.Task] = set()
+        self.completed = 0
+        self.stopping = asyncio.Event()
+
+    # ---- HTTP ----
+
+    def _request(self, method: str, path: str, payload: Optional[dict] = None, timeout: float = 30.0) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["X-Collector-Token"] = self.token
+        data = None
+        if payload is not None:
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            # 结果批次较大，压缩后回传
+            if len(data) > 1024:
+                data = gzip.compress(data, compresslevel=6)
+                headers["Content-Encoding"] = "gzip"
+        request = urllib.request.Request(
+            f"{self.server_url}/api/collectors/{self.name}{path}",
+            data=data,
+            headers=headers,
+            method=method
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.loads(response.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            raise Exception(f"HTTP {e.code}: {e.read().decode('utf-8', 'replace')}")
+
+    async def _call(self, method: str, path: str, payload: Optional[dict] = None, timeout: float = 30.0) -> dict:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, lambda: self._request(method, path, payload, timeout)
+        )
+
+    async def _heartbeat(self) -> dict:
+        return await self._call("POST", "/heartbeat", {
+            "datacenter": self.datacenter,
+            "capacity": self.max_hosts,
+            "running": len(self.running),
+        })
+
+    # ---- 循环 ----
+
+    async def heartbeat_loop(self):
+        while not self.stopping.is_set():
+            try:
+                await self._heartbeat()
+            except Exception as e:
+                print(f"心跳失败: {str(e)}")
+            try:
+                await asyncio.wait_for(self.stopping.wait(), self.heartbeat_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def pull_loop(self):
+        backoff = 1.0
+        while not self.stopping.is_set():
+            free = self.max_hosts - len(self.running)
+            if free <= 0:
+                await asyncio.sleep(0.2)
+                continue
+            try:
+                response = await self._call("POST", "/lease", {"max_hosts": free, "wait": 20}, timeout=40)
+                backoff = 1.0
+            except Exception as e:
+                print(f"领取主机失败: {str(e)}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                # 中心服务重启后节点需要重新登记
+                try:
+                    await self._heartbeat()
+                except Exception:
+                    pass
+                continue
+            for shard in response.get("shards", []):
+                for server in shard["servers"]:
+                    task = asyncio.create_task(self.inspect_one(server, shard["checks"], shard["change_only"]))
+                    self.running.add(task)
+                    task.add_done_callback(self.running.discard)
+
+    async def inspect_one(self, server: Dict[str, Any], checks: List[str], change_only: bool):
+        from server.models import ServerInfo
+
+        task_id = server.pop("task")
+        try:
+            info = ServerInfo(**server)
+            result = await self.inspector.inspect_server(
+                host=info.host,
+                username=info.username,
+                password=info.password,
+                key_path=info.key_path,
+                port=info.port,
+                checks=checks,
+                jump_host=info.jump_host,
+                change_only=change_only
+            )
+            # 空字段不回传，中心服务按模型默认值还原
+            self.outbox.append({"task": task_id, "result": result.model_dump(mode="json", exclude_none=True)})
+        except Exception as e:
+            self.outbox.append({"task": task_id, "error": str(e)})
+
+    async def push(self) -> bool:
+        """回传一批结果，失败时保留在outbox中下次重试"""
+        batch = self.outbox[:self.push_batch]
+        if not batch:
+            return True
+        try:
+            await self._call("POST", "/results", {"items": batch})
+        except Exception as e:
+            print(f"回传结果失败: {str(e)}")
+            return False
+        del self.outbox[:len(batch)]
+        self.completed += len(batch)
+        return True
+
+    async def push_loop(self):
+        while not self.stopping.is_set():
+            if not await self.push() or len(self.outbox) < self.push_batch:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), self.push_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run(self, drain_timeout: float = 120.0):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        print(f"采集节点 {self.name} (数据中心: {self.datacenter or '-'}) 连接 {self.server_url}")
+        loops = [
+            asyncio.create_task(self.heartbeat_loop()),
+            asyncio.create_task(self.pull_loop()),
+            asyncio.create_task(self.push_loop()),
+        ]
+        await self.stopping.wait()
+        loops[1].cancel()
+
+        # 下线前等待已领取的主机巡检完成并回传，未完成的交还中心服务重新分配
+        print(f"正在停止，等待 {len(self.running)} 台主机巡检完成...")
+        if self.running:
+            await asyncio.wait(list(self.running), timeout=drain_timeout)
+        deadline = time.monotonic() + 10
+        while self.outbox and time.monotonic() < deadline:
+            if not await self.push():
+                await asyncio.sleep(1)
+        await asyncio.gather(*loops, return_exceptions=True)
+        try:
+            await self._call("DELETE", "")
+        except Exception as e:
+            print(f"注销节点失败: {str(e)}")
+        self.inspector.bastions.close_all()
+        print(f"采集节点已停止，共回传 {self.completed} 条结果")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="服务器批量巡检工具 - 采集节点",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  # 中心服务以 COLLECTORS=1 启动后，在上海机房运行采集节点
+  python collector.py --server http://central:8000 --name sh-1 --datacenter sh --token secret
+
+  # 单机测试：同一台机器上启动多个节点
+  python collector.py --server http://127.0.0.1:8000 --name node-a --datacenter sh
+  python collector.py --server http://127.0.0.1:8000 --name node-b --datacenter bj
+        """
+    )
+    parser.add_argument('--server', required=True, help='中心服务地址，如 http://central:8000')
+    parser.add_argument('--name', default=socket.gethostname(), help='节点名称，各节点唯一 (默认: 主机名)')
+    parser.add_argument('--datacenter', help='节点所在数据中心，对应清单中的 dc 属性')
+    parser.add_argument('--token', default=os.getenv("COLLECTOR_TOKEN"),
+                        help='中心服务的 COLLECTOR_TOKEN (默认: 环境变量 COLLECTOR_TOKEN)')
+    parser.add_argument('--max-hosts', type=int, default=200, help='同时领取巡检的主机数上限 (默认: 200)')
+    parser.add_argument('--heartbeat', type=float, default=10.0, help='心跳间隔秒数 (默认: 10)')
+    parser.add_argument('--drain-timeout', type=float, default=120.0,
+                        help='停止时等待已领取主机巡检完成的秒数 (默认: 120)')
+
+    args = parser.parse_args()
+    if not args.token:
+        print("错误: 未指定 --token，中心服务要求采集节点令牌")
+        sys.exit(1)
+    if args.max_hosts < 1:
+        print("错误: --max-hosts 必须大于0")
+        sys.exit(1)
+
+    async def run():
+        node = CollectorNode(
+            args.server,
+            args.name,
+            datacenter=args.datacenter,
+            token=args.token,
+            max_hosts=args.max_hosts,
+            heartbeat_interval=args.heartbeat
+        )
+        await node.run(args.drain_timeout)
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import React, { useState, useEffect, useRef } from 'react';
+import { decode } from '@msgpack/msgpack';
 import { 
   Card, 
   Form, 
@@ -45,11 +46,95 @@ const { Step } = Steps;
 const ServerInspection = () => {
   const [form] = Form.useForm();
   const [isInspecting, setIsInspecting] = useState(false);
+  // 结果由服务端分页返回，前端只保存当前页
   const [results, setResults] = useState([]);
+  const [resultTotal, setResultTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [cursorStack, setCursorStack] = useState([]);
+  const cursorStackRef = useRef([]);
+  // 巡检异常（连接前失败等）的主机不在服务端结果中，由前端保存
+  const [serverErrors, setServerErrors] = useState([]);
+  const refreshTimerRef = useRef(null);
   const [logs, setLogs] = useState([]);
   const [progress, setProgress] = useState(0);
   const [currentStep, setCurrentStep] = useState(0);
   const wsRef = useRef(null);
+  // 进度由 inspection_start 中的总数与已完成（成功或失败）的主机数得出，两种协议通用
+  const inspectionTotalRef = useRef(0);
+  const finishedHostsRef = useRef(new Set());
+
+  const RESULT_PAGE_SIZE = 20;
+  const EXPORT_PAGE_SIZE = 1000;
+
+  const requestResultPage = async (limit, cursor = null) => {
+    const params = new URLSearchParams({
+      limit,
+      sort: 'host',
+      detail: 'true',
+    });
+    if (cursor) {
+      params.append('cursor', cursor);
+    }
+    const response = await fetch(`/api/results?${params.toString()}`);
+    if (!response.ok) {
+      throw new Error('获取巡检结果失败');
+    }
+    return response.json();
+  };
+
+  const toResultEntry = (item) => ({
+    host: item.host,
+    result: item.result,
+    error: item.status === 'error' ? item.result.errors.join(', ') : null,
+  });
+
+  const fetchResultPage = async (cursor = null) => {
+    try {
+      const page = await requestResultPage(RESULT_PAGE_SIZE, cursor);
+      setResults(page.items.map(toResultEntry));
+      setResultTotal(page.total);
+      setNextCursor(page.next_cursor);
+    } catch (error) {
+      console.error('获取巡检结果失败:', error);
+    }
+  };
+
+  // 新结果到达时合并刷新：只在第一页时刷新，避免翻页时列表跳动
+  const scheduleResultRefresh = () => {
+    if (refreshTimerRef.current) {
+      return;
+    }
+    refreshTimerRef.current = setTimeout(() => {
+      refreshTimerRef.current = null;
+      if (cursorStackRef.current.length === 0) {
+        fetchResultPage();
+      }
+    }, 1000);
+  };
+
+  const updateCursorStack = (stack) => {
+    cursorStackRef.current = stack;
+    setCursorStack(stack);
+  };
+
+  const handleNextPage = () => {
+    updateCursorStack([...cursorStack, nextCursor]);
+    fetchResultPage(nextCursor);
+  };
+
+  const handlePrevPage = () => {
+    const stack = cursorStack.slice(0, -1);
+    updateCursorStack(stack);
+    fetchResultPage(stack.length > 0 ? stack[stack.length - 1] : null);
+  };
+
+  useEffect(() => {
+    return () => {
+      if (refreshTimerRef.current) {
+        clearTimeout(refreshTimerRef.current);
+      }
+    };
+  }, []);
 
   const checkOptions = [
     { label: '系统信息', value: 'system', icon: <SettingOutlined /> },
@@ -63,15 +148,17 @@ const ServerInspection = () => {
 
   const connectWebSocket = () => {
     const ws = new WebSocket(`ws://${window.location.hostname}:8000/ws`);
+    ws.binaryType = 'arraybuffer';
     
     ws.onopen = () => {
       console.log('WebSocket连接已建立');
       addLog('info', 'WebSocket连接已建立');
+      // 协商批量协议：服务端合并多条消息为一个MessagePack二进制帧；旧版服务端忽略此消息，继续使用JSON文本帧
+      ws.send(JSON.stringify({ type: 'hello', protocols: [2, 1] }));
     };
 
     ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      handleWebSocketMessage(data);
+      decodeWebSocketFrame(event.data).forEach(handleWebSocketMessage);
     };
 
     ws.onerror = (error) => {
@@ -87,10 +174,24 @@ const ServerInspection = () => {
     wsRef.current = ws;
   };
 
+  // 文本帧为一条JSON消息（协议1），二进制帧为MessagePack编码的消息数组（协议2）
+  const decodeWebSocketFrame = (frame) => {
+    if (typeof frame === 'string') {
+      return [JSON.parse(frame)];
+    }
+    return decode(new Uint8Array(frame));
+  };
+
   const handleWebSocketMessage = (data) => {
     switch (data.type) {
+      case 'hello':
+        console.log('WebSocket协议版本:', data.protocol);
+        break;
       case 'inspection_start':
         addLog('info', data.message);
+        inspectionTotalRef.current = data.total || 0;
+        finishedHostsRef.current = new Set();
+        setProgress(0);
         setCurrentStep(1);
         break;
       case 'server_start':
@@ -99,17 +200,20 @@ const ServerInspection = () => {
         break;
       case 'server_result':
         addLog('success', `服务器 ${data.host} 巡检完成`);
-        setResults(prev => [...prev, { host: data.host, result: data.result }]);
+        markHostFinished(data.host);
+        scheduleResultRefresh();
         break;
       case 'server_error':
         addLog('error', `服务器 ${data.host} 巡检失败: ${data.message}`);
-        setResults(prev => [...prev, { host: data.host, error: data.message }]);
+        setServerErrors(prev => [...prev, { host: data.host, error: data.message }]);
+        markHostFinished(data.host);
         break;
       case 'inspection_complete':
         addLog('success', data.message);
         setIsInspecting(false);
         setProgress(100);
         setCurrentStep(3);
+        scheduleResultRefresh();
         break;
       case 'pong':
         // 心跳响应
@@ -119,6 +223,17 @@ const ServerInspection = () => {
     }
   };
 
+  const markHostFinished = (host) => {
+    const total = inspectionTotalRef.current;
+    // 协议2不发送server_start，收到第一台主机的结果时进入巡检步骤
+    setCurrentStep(step => Math.max(step, 2));
+    finishedHostsRef.current.add(host);
+    if (total > 0) {
+      // 100% 留给 inspection_complete
+      setProgress(Math.min(99, Math.floor(finishedHostsRef.current.size * 100 / total)));
+    }
+  };
+
   const addLog = (type, message) => {
     const timestamp = new Date().toLocaleTimeString();
     setLogs(prev => [...prev, { type, message, timestamp }]);
@@ -138,6 +253,10 @@ const ServerInspection = () => {
     setIsInspecting(true);
     setProgress(0);
     setResults([]);
+    setResultTotal(0);
+    setNextCursor(null);
+    updateCursorStack([]);
+    setServerErrors([]);
     setLogs([]);
     setCurrentStep(0);
 
@@ -181,6 +300,10 @@ const ServerInspection = () => {
 
   const handleClearResults = () => {
     setResults([]);
+    setResultTotal(0);
+    setNextCursor(null);
+    updateCursorStack([]);
+    setServerErrors([]);
     setLogs([]);
     setProgress(0);
     setCurrentStep(0);
@@ -213,8 +336,22 @@ const ServerInspection = () => {
     }
   };
 
-  const exportResults = () => {
-    const dataStr = JSON.stringify(results, null, 2);
+  // 导出全部结果：逐页取完服务端结果，再附上巡检异常的主机
+  const exportResults = async () => {
+    const entries = [];
+    try {
+      let cursor = null;
+      do {
+        const page = await requestResultPage(EXPORT_PAGE_SIZE, cursor);
+        entries.push(...page.items.map(toResultEntry));
+        cursor = page.next_cursor;
+      } while (cursor);
+    } catch (error) {
+      message.error('导出失败: ' + error.message);
+      return;
+    }
+    entries.push(...serverErrors);
+    const dataStr = JSON.stringify(entries, null, 2);
     const dataBlob = new Blob([dataStr], { type: 'application/json' });
     const url = URL.createObjectURL(dataBlob);
     const link = document.createElement('a');
@@ -463,7 +600,7 @@ const ServerInspection = () => {
       </Row>
 
       {/* 巡检结果 */}
-      {results.length > 0 && (
+      {(results.length > 0 || serverErrors.length > 0) && (
         <Card 
           title={
             <Space>
@@ -471,17 +608,36 @@ const ServerInspection = () => {
                 <FileTextOutlined style={{ marginRight: '8px', color: '#1890ff' }} />
                 巡检结果
               </span>
-              <Badge count={results.length} style={{ backgroundColor: '#52c41a' }} />
+              <Badge count={resultTotal} overflowCount={99999} style={{ backgroundColor: '#52c41a' }} />
+              {serverErrors.length > 0 && (
+                <Badge count={serverErrors.length} overflowCount={99999} />
+              )}
             </Space>
           }
           extra={
-            <Button 
-              icon={<DownloadOutlined />} 
-              onClick={exportResults}
-              style={{ borderRadius: '8px' }}
-            >
-              导出结果
-            </Button>
+            <Space>
+              <Button
+                onClick={handlePrevPage}
+                disabled={cursorStack.length === 0}
+                style={{ borderRadius: '8px' }}
+              >
+                上一页
+              </Button>
+              <Button
+                onClick={handleNextPage}
+                disabled={!nextCursor}
+                style={{ borderRadius: '8px' }}
+              >
+                下一页
+              </Button>
+              <Button 
+                icon={<DownloadOutlined />} 
+                onClick={exportResults}
+                style={{ borderRadius: '8px' }}
+              >
+                导出结果
+              </Button>
+            </Space>
           }
           hoverable
           style={{ 
@@ -496,7 +652,7 @@ const ServerInspection = () => {
             ghost
             style={{ background: 'transparent' }}
           >
-            {results.map((result, index) => (
+            {[...serverErrors, ...results].map((result, index) => (
               <Panel
                 key={index}
                 header={
@@ -0,0 +1,248 @@
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+from .models import InspectionResult
+
+# 主机级数值指标
+HOST_METRICS = ["cpu.usage", "cpu.load1", "cpu.load5", "cpu.load15", "memory.usage_percent", "swap.usage_percent"]
+
+# 百分比类指标使用固定的直方图分桶
+PERCENT_METRICS = {"cpu.usage", "memory.usage_percent", "swap.usage_percent", "disk.usage_percent"}
+PERCENT_BINS = np.linspace(0, 100, 11)
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+class FleetColumns:
+    """全量主机最新指标的列式存储
+
+    每台主机占用一个固定槽位，新结果到达时只改写对应槽位；磁盘按挂载点展开为单独的一张表。
+    统计时直接在NumPy数组上计算，不再遍历Pydantic对象。
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self.hosts: List[Optional[str]] = []
+        self._group_codes: Dict[Optional[str], int] = {}
+        self.group_names: List[Optional[str]] = []
+        self._mount_codes: Dict[str, int] = {}
+        self.mount_names: List[str] = []
+
+        self.valid = np.zeros(capacity, dtype=bool)
+        self.group = np.zeros(capacity, dtype=np.int32)
+        self.metrics: Dict[str, np.ndarray] = {
+            name: np.full(capacity, np.nan) for name in HOST_METRICS
+        }
+
+        self.disk_count = 0
+        self.disk_valid = np.zeros(capacity, dtype=bool)
+        self.disk_slot = np.zeros(capacity, dtype=np.int32)
+        self.disk_mount = np.zeros(capacity, dtype=np.int32)
+        self.disk_usage = np.full(capacity, np.nan)
+        self._host_disks: Dict[int, List[int]] = {}
+        self._dead_disks = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _code(self, codes: Dict, names: List, value) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _grow_hosts(self):
+        capacity = len(self.valid) * 2
+        self.valid = np.resize(self.valid, capacity)
+        self.valid[len(self.hosts):] = False
+        self.group = np.resize(self.group, capacity)
+        for name, column in self.metrics.items():
+            grown = np.full(capacity, np.nan)
+            grown[:len(column)] = column
+            self.metrics[name] = grown
+
+    def _grow_disks(self):
+        capacity = len(self.disk_valid) * 2
+        self.disk_valid = np.resize(self.disk_valid, capacity)
+        self.disk_valid[self.disk_count:] = False
+        self.disk_slot = np.resize(self.disk_slot, capacity)
+        self.disk_mount = np.resize(self.disk_mount, capacity)
+        grown = np.full(capacity, np.nan)
+        grown[:self.disk_count] = self.disk_usage[:self.disk_count]
+        self.disk_usage = grown
+
+    def _compact_disks(self):
+        """清理已失效的磁盘行"""
+        live = np.flatnonzero(self.disk_valid[:self.disk_count])
+        n = len(live)
+        self.disk_slot[:n] = self.disk_slot[live]
+        self.disk_mount[:n] = self.disk_mount[live]
+        self.disk_usage[:n] = self.disk_usage[live]
+        self.disk_valid[:n] = True
+        self.disk_valid[n:self.disk_count] = False
+        self.disk_count = n
+        self._dead_disks = 0
+        self._host_disks = {}
+        for i, slot in enumerate(self.disk_slot[:n].tolist()):
+            self._host_disks.setdefault(slot, []).append(i)
+
+    def update(self, result: InspectionResult, group: Optional[str] = None):
+        """写入一台主机的最新结果"""
+        slot = self._slots.get(result.host)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self.hosts[slot] = result.host
+            else:
+                slot = len(self.hosts)
+                if slot >= len(self.valid):
+                    self._grow_hosts()
+                self.hosts.append(result.host)
+            self._slots[result.host] = slot
+
+        self.valid[slot] = True
+        self.group[slot] = self._code(self._group_codes, self.group_names, group)
+
+        cpu, memory = result.cpu, result.memory
+        load = cpu.load_average if cpu else []
+        values = {
+            "cpu.usage": cpu.cpu_usage if cpu else np.nan,
+            "cpu.load1": load[0] if len(load) > 0 else np.nan,
+            "cpu.load5": load[1] if len(load) > 1 else np.nan,
+            "cpu.load15": load[2] if len(load) > 2 else np.nan,
+            "memory.usage_percent": memory.usage_percent if memory else np.nan,
+            "swap.usage_percent": (
+                memory.swap_used / memory.swap_total * 100
+                if memory and memory.swap_total > 0 else np.nan
+            ),
+        }
+        for name, value in values.items():
+            self.metrics[name][slot] = value
+
+        self._drop_disks(slot)
+        indexes = []
+        for disk in result.disks or []:
+            if self.disk_count >= len(self.disk_valid):
+                self._grow_disks()
+            i = self.disk_count
+            self.disk_valid[i] = True
+            self.disk_slot[i] = slot
+            self.disk_mount[i] = self._code(self._mount_codes, self.mount_names, disk.mountpoint)
+            self.disk_usage[i] = disk.usage_percent
+            self.disk_count += 1
+            indexes.append(i)
+        if indexes:
+            self._host_disks[slot] = indexes
+
+    def _drop_disks(self, slot: int):
+        old = self._host_disks.pop(slot, None)
+        if old:
+            self.disk_valid[old] = False
+            self._dead_disks += len(old)
+            if self._dead_disks > max(1024, self.disk_count // 2):
+                self._compact_disks()
+
+    def remove(self, host: str):
+        slot = self._slots.pop(host, None)
+        if slot is None:
+            return
+        self.valid[slot] = False
+        for column in self.metrics.values():
+            column[slot] = np.nan
+        self._drop_disks(slot)
+        self.hosts[slot] = None
+        self._free.append(slot)
+
+    def summary(self, group_by: bool = False, top_k: int = 10) -> Dict[str, Any]:
+        """全量（及按分组）统计：分位数、直方图与Top-K"""
+        n = len(self.hosts)
+        host_mask = self.valid[:n]
+        disk_mask = self.disk_valid[:self.disk_count]
+
+        summary = self._summarize(host_mask, disk_mask, top_k)
+        if group_by:
+            groups = {}
+            host_groups = self.group[:n]
+            disk_groups = host_groups[self.disk_slot[:self.disk_count]] if self.disk_count else host_groups[:0]
+            for code, name in enumerate(self.group_names):
+                group_hosts = host_mask & (host_groups == code)
+                if not group_hosts.any():
+                    continue
+                group_disks = disk_mask & (disk_groups == code)
+                groups[name if name is not None else "未分组"] = self._summarize(group_hosts, group_disks, top_k)
+            summary["groups"] = groups
+        return summary
+
+    def _summarize(self, host_mask: np.ndarray, disk_mask: np.ndarray, top_k: int) -> Dict[str, Any]:
+        n = len(host_mask)
+        host_index = np.flatnonzero(host_mask)
+        metrics = {}
+        for name, column in self.metrics.items():
+            values = column[:n][host_index]
+            ok = ~np.isnan(values)
+            metrics[name] = self._stats(name, values[ok], host_index[ok], top_k)
+
+        disk_index = np.flatnonzero(disk_mask)
+        usage = self.disk_usage[disk_index]
+        mounts = self.disk_mount[disk_index]
+        disks = {"all": self._stats("disk.usage_percent", usage, disk_index, top_k, disks=True)}
+        by_mount = {}
+        for code in np.unique(mounts).tolist():
+            selected = mounts == code
+            by_mount[self.mount_names[code]] = self._stats(
+                "disk.usage_percent", usage[selected], disk_index[selected], top_k, disks=True
+            )
+        disks["by_mount"] = by_mount
+
+        return {"hosts": int(len(host_index)), "metrics": metrics, "disks": disks}
+
+    def _stats(
+        self,
+        name: str,
+        values: np.ndarray,
+        index: np.ndarray,
+        top_k: int,
+        disks: bool = False
+    ) -> Dict[str, Any]:
+        count = int(len(values))
+        if count == 0:
+            return {"count": 0}
+
+        percentiles = np.percentile(values, PERCENTILES)
+        if name in PERCENT_METRICS:
+            counts, edges = np.histogram(np.clip(values, 0, 100), bins=PERCENT_BINS)
+        else:
+            counts, edges = np.histogram(values, bins=10)
+
+        k = min(top_k, count)
+        top = np.argpartition(-values, k - 1)[:k]
+        top = top[np.argsort(-values[top], kind="stable")]
+        top_items = []
+        for i in top.tolist():
+            if disks:
+                row = int(index[i])
+                top_items.append({
+                    "host": self.hosts[self.disk_slot[row]],
+                    "mountpoint": self.mount_names[self.disk_mount[row]],
+                    "value": round(float(values[i]), 2)
+                })
+            else:
+                top_items.append({"host": self.hosts[index[i]], "value": round(float(values[i]), 2)})
+
+        stats = {
+            "count": count,
+            "mean": round(float(values.mean()), 2),
+            "min": round(float(values.min()), 2),
+            "max": round(float(values.max()), 2),
+            "histogram": {
+                "edges": [round(float(e), 2) for e in edges],
+                "counts": counts.tolist()
+            },
+            "top": top_items
+        }
+        for p, value in zip(PERCENTILES, percentiles.tolist()):
+            stats[f"p{p}"] = round(value, 2)
+        return stats
@@ -0,0 +1,394 @@
+import asyncio
+import fnmatch
+import json
+import re
+import urllib.request
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple, Iterable, TYPE_CHECKING
+
+from .models import InspectionResult
+from .shared import EVENT_ALERT
+
+if TYPE_CHECKING:
+    from .anomaly import AnomalyDetector
+
+# 表达式: [delta(]路径[)] 运算符 值 [for 字段 通配符]
+RULE_PATTERN = re.compile(
+    r'^\s*(?:(delta)\(\s*([\w.\[\]]+)\s*\)|([\w.\[\]]+))\s*(==|!=|>=|<=|>|<)\s*(\S+)'
+    r'(?:\s+for\s+(\w+)\s+(\S+))?\s*$'
+)
+
+# 路径简写
+PATH_ALIASES = {
+    "disk.": "disks[].",
+    "interface.": "network.interfaces[].",
+    "bond.": "network.bonds[].",
+}
+
+# 列表元素的标识字段，用于区分同一主机上的多个告警实例
+INSTANCE_KEYS = ["mountpoint", "name", "ip", "destination", "pid"]
+
+# 默认规则，未指定规则文件时使用
+DEFAULT_RULES = [
+    {"name": "disk_usage_high", "expr": "disk.usage_percent > 90", "severity": "critical"},
+    {"name": "memory_usage_high", "expr": "memory.usage_percent > 95", "severity": "warning"},
+    {"name": "bond_inactive", "expr": "network.bonds[].status == Inactive", "severity": "critical"},
+    {"name": "interface_down", "expr": "network.interfaces[].status == DOWN", "severity": "warning"},
+]
+
+OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+}
+
+
+def _get(obj: Any, name: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _instance_key(element: Any, index: int) -> str:
+    for key in INSTANCE_KEYS:
+        value = _get(element, key)
+        if value not in (None, ""):
+            return str(value)
+    return str(index)
+
+
+class AlertRule:
+    """编译后的告警规则"""
+
+    def __init__(
+        self,
+        name: str,
+        expr: str,
+        severity: str = "warning",
+        consecutive: int = 1,
+        description: str = ""
+    ):
+        match = RULE_PATTERN.match(expr)
+        if not match:
+            raise ValueError(f"无效的告警规则 {name}: {expr}")
+        delta, delta_path, path, op, value, scope_field, scope_glob = match.groups()
+
+        self.name = name
+        self.expr = expr
+        self.severity = severity
+        self.consecutive = max(1, consecutive)
+        self.description = description
+        self.delta = delta is not None
+        self.path = delta_path if self.delta else path
+        for alias, target in PATH_ALIASES.items():
+            if self.path.startswith(alias):
+                self.path = target + self.path[len(alias):]
+                break
+        self.segments: List[Tuple[str, bool]] = [
+            (segment[:-2], True) if segment.endswith("[]") else (segment, False)
+            for segment in self.path.split(".")
+        ]
+        self.compare = OPERATORS[op]
+        self.op = op
+        try:
+            self.value: Any = float(value)
+        except ValueError:
+            self.value = value
+        self.scope_field = scope_field
+        self.scope_glob = scope_glob
+
+    def extract(self, result: InspectionResult) -> Optional[List[Tuple[str, Any]]]:
+        """取出 (实例, 值) 列表；结果中缺少对应巡检项时返回None"""
+        if _get(result, self.segments[0][0]) is None:
+            return None
+
+        items: List[Tuple[str, Any, Any]] = [("", result, None)]
+        for name, is_list in self.segments:
+            expanded = []
+            for instance, obj, element in items:
+                value = _get(obj, name)
+                if value is None:
+                    continue
+                if is_list:
+                    for index, child in enumerate(value):
+                        key = _instance_key(child, index)
+                        expanded.append((f"{instance}/{key}" if instance else key, child, child))
+                else:
+                    expanded.append((instance, value, element))
+            items = expanded
+
+        values = []
+        for instance, value, element in items:
+            if self.scope_field:
+                scope_value = _get(element, self.scope_field) if element is not None else None
+                if scope_value is None or not fnmatch.fnmatch(str(scope_value), self.scope_glob):
+                    continue
+            values.append((instance, value))
+        return values
+
+    def matches(self, value: Any) -> bool:
+        if isinstance(self.value, float):
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return False
+        else:
+            value = str(value)
+        return self.compare(value, self.value)
+
+
+def load_rules(path: Optional[str] = None) -> List[AlertRule]:
+    """从JSON文件加载告警规则，未指定时使用默认规则"""
+    definitions = DEFAULT_RULES
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            definitions = json.load(f)
+    return [AlertRule(**definition) for definition in definitions]
+
+
+class FileSink:
+    """告警写入本地JSON Lines文件，写入在线程池中进行"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, event: Dict[str, Any]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    async def emit(self, event: Dict[str, Any]):
+        await asyncio.get_running_loop().run_in_executor(None, self._write, event)
+
+
+class WebhookSink:
+    """告警以JSON POST到Webhook地址，发送在线程池中进行，不阻塞巡检"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def _post(self, event: Dict[str, Any]):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(event, ensure_ascii=False).encode('utf-8'),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    async def emit(self, event: Dict[str, Any]):
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._post, event)
+        except Exception as e:
+            print(f"告警Webhook发送失败: {str(e)}")
+
+
+class WebSocketSink:
+    """告警推送给订阅了 alerts 主题（或对应主机、分组）的WebSocket连接"""
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    async def emit(self, event: Dict[str, Any]):
+        topics = ["alerts", f"host:{event['host']}"]
+        if event.get("group"):
+            topics.append(f"group:{event['group']}")
+        await self.manager.broadcast(json.dumps({"type": "alert", "alert": event}), topics)
+
+
+class SharedStateSink:
+    """多worker部署时把告警事件写入共享后端，其他worker据此同步当前告警"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def emit(self, event: Dict[str, Any]):
+        await self.backend.publish(EVENT_ALERT, json.dumps(event, ensure_ascii=False))
+
+
+class AlertEngine:
+    """增量告警引擎：每到达一条巡检结果只评估该主机，与上次状态比较产生触发/恢复事件
+
+    设置 detector（AnomalyDetector）后，基线异常与磁盘写满预测也作为告警事件发送。
+    事件放入每个输出各自的有界队列，由后台任务发送：process() 只评估规则，慢的Webhook
+    不会拖慢巡检结果的写入与推送，也不影响其他输出；队列满时丢弃新事件。
+    """
+
+    def __init__(
+        self,
+        rules: List[AlertRule],
+        sinks: Optional[Iterable] = None,
+        detector: Optional["AnomalyDetector"] = None,
+        queue_size: int = 10000
+    ):
+        self.rules = rules
+        self.sinks = list(sinks or [])
+        self.detector = detector
+        self.queue_size = queue_size
+        self.dropped = 0
+        # 输出 -> (队列, 发送任务)，首次有事件时在当前事件循环中创建
+        self._outbox: Dict[int, Tuple[asyncio.Queue, asyncio.Task]] = {}
+        # (规则, 主机, 实例) -> 告警状态
+        self._active: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        # (规则, 主机) -> {实例: 连续命中次数}，只需查看当前主机的状态
+        self._streak: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._last_values: Dict[Tuple[str, str, str], float] = {}
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    async def process(self, result: InspectionResult, group: Optional[str] = None) -> List[Dict[str, Any]]:
+        """评估一条巡检结果，返回并发送本次产生的告警事件"""
+        events = self._evaluate(result, group)
+        if events:
+            self._dispatch(events)
+        return events
+
+    def observe(self, result: InspectionResult, group: Optional[str] = None):
+        """只更新连续命中次数、上次取值、异常基线与告警状态，不发送事件
+
+        多worker部署时其他worker的结果经共享后端按顺序到达，各worker都据此更新状态，
+        无论下一条结果落在哪个worker上，delta 与 consecutive 规则都基于该主机的完整历史评估。
+        """
+        self._evaluate(result, group)
+
+    def _evaluate(self, result: InspectionResult, group: Optional[str]) -> List[Dict[str, Any]]:
+        events = []
+        for rule in self.rules:
+            values = rule.extract(result)
+            if values is None:
+                # 本次没有采集该项，保持原有告警状态
+                continue
+
+            violating = {}
+            for instance, value in values:
+                key = (rule.name, result.host, instance)
+                if rule.delta:
+                    try:
+                        current = float(value)
+                    except (TypeError, ValueError):
+                        continue
+                    previous = self._last_values.get(key)
+                    self._last_values[key] = current
+                    if previous is None:
+                        continue
+                    value = current - previous
+                if rule.matches(value):
+                    violating[instance] = value
+
+            streaks = self._streak.setdefault((rule.name, result.host), {})
+            for instance, value in violating.items():
+                key = (rule.name, result.host, instance)
+                streaks[instance] = streaks.get(instance, 0) + 1
+                if key in self._active:
+                    self._active[key]["value"] = value
+                    continue
+                if streaks[instance] >= rule.consecutive:
+                    alert = self._event("firing", rule, result, group, instance, value)
+                    self._active[key] = alert
+                    events.append(alert)
+
+            for instance in [i for i in streaks if i not in violating]:
+                del streaks[instance]
+                alert = self._active.pop((rule.name, result.host, instance), None)
+                if alert is not None:
+                    events.append(self._event("resolved", rule, result, group, instance, None))
+
+        if self.detector is not None:
+            events += self._process_anomalies(result, group)
+        return events
+
+    # ---- 发送 ----
+
+    def _dispatch(self, events: List[Dict[str, Any]]):
+        for sink in self.sinks:
+            outbox = self._outbox.get(id(sink))
+            if outbox is None:
+                queue = asyncio.Queue(self.queue_size)
+                outbox = self._outbox[id(sink)] = (queue, asyncio.create_task(self._deliver(sink, queue)))
+            queue = outbox[0]
+            for event in events:
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+                    if self.dropped % 100 == 1:
+                        print(f"告警发送队列已满 ({type(sink).__name__})，已丢弃 {self.dropped} 条事件")
+
+    @staticmethod
+    async def _deliver(sink, queue: asyncio.Queue):
+        while True:
+            event = await queue.get()
+            try:
+                await sink.emit(event)
+            except Exception as e:
+                print(f"告警发送失败 ({type(sink).__name__}): {str(e)}")
+            finally:
+                queue.task_done()
+
+    async def close(self, timeout: Optional[float] = 10.0):
+        """等待队列中的事件发送完毕（最多timeout秒）后停止发送任务"""
+        if self._outbox:
+            waits = [asyncio.create_task(queue.join()) for queue, _ in self._outbox.values()]
+            _, pending = await asyncio.wait(waits, timeout=timeout)
+            for wait in pending:
+                wait.cancel()
+            for _, task in self._outbox.values():
+                task.cancel()
+        self._outbox.clear()
+
+    def _process_anomalies(self, result: InspectionResult, group: Optional[str]) -> List[Dict[str, Any]]:
+        events = []
+        for verdict in self.detector.evaluate(result):
+            firing = verdict.pop("firing")
+            key = (verdict["rule"], result.host, verdict["instance"])
+            if firing:
+                if key in self._active:
+                    self._active[key].update(verdict)
+                    continue
+                alert = {"status": "firing", **verdict, "host": result.host, "group": group,
+                         "timestamp": datetime.now().isoformat()}
+                self._active[key] = alert
+                events.append(alert)
+            elif self._active.pop(key, None) is not None:
+                events.append({"status": "resolved", **verdict, "value": None, "host": result.host,
+                               "group": group, "timestamp": datetime.now().isoformat()})
+        return events
+
+    def _event(
+        self,
+        status: str,
+        rule: AlertRule,
+        result: InspectionResult,
+        group: Optional[str],
+        instance: str,
+        value: Any
+    ) -> Dict[str, Any]:
+        return {
+            "status": status,
+            "rule": rule.name,
+            "severity": rule.severity,
+            "expr": rule.expr,
+            "description": rule.description,
+            "host": result.host,
+            "group": group,
+            "instance": instance,
+            "value": value,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def mirror(self, event: Dict[str, Any]):
+        """应用其他worker产生的告警事件，只同步触发状态，不再发送"""
+        key = (event["rule"], event["host"], event["instance"])
+        if event["status"] == "firing":
+            self._active[key] = event
+        else:
+            self._active.pop(key, None)
+
+    def active(self) -> List[Dict[str, Any]]:
+        """当前处于触发状态的告警"""
+        return list(self._active.values())
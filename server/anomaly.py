@@ -0,0 +1,251 @@
+import json
+import math
+import os
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple, Callable
+
+from .models import InspectionResult
+
+# 主机级指标：名称 -> (取值函数, 最小偏离量)；偏离量低于该值时不算异常，避免在几乎恒定的指标上误报
+HOST_METRICS: Dict[str, Tuple[Callable[[InspectionResult], Optional[float]], float]] = {
+    "cpu.load1": (lambda r: r.cpu.load_average[0] if r.cpu and len(r.cpu.load_average) > 0 else None, 0.5),
+    "cpu.load5": (lambda r: r.cpu.load_average[1] if r.cpu and len(r.cpu.load_average) > 1 else None, 0.5),
+    "cpu.load15": (lambda r: r.cpu.load_average[2] if r.cpu and len(r.cpu.load_average) > 2 else None, 0.5),
+    "cpu.usage": (lambda r: r.cpu.cpu_usage if r.cpu else None, 10.0),
+    "memory.usage_percent": (lambda r: r.memory.usage_percent if r.memory else None, 5.0),
+    "swap.usage_percent": (
+        lambda r: r.memory.swap_used / r.memory.swap_total * 100
+        if r.memory and r.memory.swap_total > 0 else None,
+        5.0
+    ),
+}
+
+# 每个基线槽位占 [均值, 方差, 样本数] 三个数；槽位0为全局基线，1-24为按小时的季节性基线
+_SLOT = 3
+_HOURS = 24
+
+# 磁盘状态：[上次已用字节, 上次时间戳, 增长速率均值, 方差, 样本数, 容量]
+_DISK_FIELDS = 6
+
+# 两次巡检间隔过短时增长速率噪声太大，不更新磁盘基线
+MIN_DISK_INTERVAL = 60.0
+
+ANOMALY_RULE_PREFIX = "anomaly:"
+DISK_GROWTH_RULE = "anomaly:disk.growth"
+DISK_ETA_RULE = "disk_full_eta"
+
+
+def _ewma(stats: array, offset: int, value: float, alpha: float) -> Tuple[float, float, int]:
+    """用新值更新一个槽位，返回更新前的 (均值, 标准差, 样本数)"""
+    mean, var, count = stats[offset], stats[offset + 1], int(stats[offset + 2])
+    if count == 0:
+        stats[offset] = value
+    else:
+        diff = value - mean
+        increment = alpha * diff
+        stats[offset] = mean + increment
+        stats[offset + 1] = (1 - alpha) * (var + diff * increment)
+    stats[offset + 2] = count + 1
+    return mean, math.sqrt(var), count
+
+
+class AnomalyDetector:
+    """按主机维护指标的滚动基线，结果到达时O(1)更新并判断是否异常
+
+    - 负载、CPU、内存、交换分区使用率：EWMA均值与方差，分全局与按小时两层；
+      对应小时的样本足够时与该小时的基线比较，否则与全局基线比较，只报告高于基线的偏离
+    - 磁盘：按挂载点计算两次巡检间的增长速率（字节/小时）并维护其EWMA基线，
+      据此估算磁盘写满时间；增长速率异常与写满时间过近都会产生事件
+    """
+
+    def __init__(
+        self,
+        threshold: float = 3.0,
+        alpha: float = 0.1,
+        seasonal_alpha: float = 0.3,
+        warmup: int = 5,
+        seasonal_warmup: int = 3,
+        eta_hours: float = 72.0
+    ):
+        self.threshold = threshold
+        self.alpha = alpha
+        # 每个小时的槽位每天只更新一次左右，用较大的平滑系数
+        self.seasonal_alpha = seasonal_alpha
+        self.warmup = warmup
+        self.seasonal_warmup = seasonal_warmup
+        self.eta_hours = eta_hours
+        # (主机, 指标) -> 25个槽位的统计
+        self._metrics: Dict[Tuple[str, str], array] = {}
+        # (主机, 挂载点) -> 磁盘状态
+        self._disks: Dict[Tuple[str, str], array] = {}
+
+    def __len__(self) -> int:
+        return len(self._metrics) + len(self._disks)
+
+    def evaluate(self, result: InspectionResult) -> List[Dict[str, Any]]:
+        """更新基线并返回本次评估的结论，每项含 firing 表示当前是否异常
+
+        结果中缺少的指标不出现在结论中，由调用方保持原有状态。
+        """
+        verdicts = []
+        slot = (result.timestamp.hour + 1) * _SLOT
+        for name, (extract, min_delta) in HOST_METRICS.items():
+            try:
+                value = extract(result)
+            except (TypeError, ZeroDivisionError):
+                value = None
+            if value is None:
+                continue
+            key = (result.host, name)
+            stats = self._metrics.get(key)
+            if stats is None:
+                stats = self._metrics[key] = array('d', bytes(8 * _SLOT * (_HOURS + 1)))
+            mean, std, count = _ewma(stats, 0, value, self.alpha)
+            hour_mean, hour_std, hour_count = _ewma(stats, slot, value, self.seasonal_alpha)
+            if hour_count >= self.seasonal_warmup:
+                mean, std, basis = hour_mean, hour_std, f"{result.timestamp.hour}时"
+            elif count >= self.warmup:
+                basis = "全局"
+            else:
+                continue
+            verdicts.append({
+                "rule": ANOMALY_RULE_PREFIX + name,
+                "severity": "warning",
+                "expr": f"{name} 高于基线 {self.threshold:g}σ",
+                "description": f"基线({basis}) {mean:.2f}±{std:.2f}",
+                "instance": "",
+                "value": round(value, 2),
+                "baseline": round(mean, 2),
+                "zscore": round((value - mean) / std, 2) if std > 0 else None,
+                "firing": value - mean > max(self.threshold * std, min_delta),
+            })
+
+        timestamp = result.timestamp.timestamp()
+        for disk in result.disks or []:
+            verdicts += self._evaluate_disk(result.host, disk, timestamp)
+        return verdicts
+
+    def _evaluate_disk(self, host: str, disk, timestamp: float) -> List[Dict[str, Any]]:
+        key = (host, disk.mountpoint)
+        state = self._disks.get(key)
+        if state is None:
+            self._disks[key] = array('d', [disk.used, timestamp, 0.0, 0.0, 0.0, disk.total])
+            return []
+        elapsed = timestamp - state[1]
+        if elapsed < MIN_DISK_INTERVAL:
+            return []
+        rate = (disk.used - state[0]) / (elapsed / 3600)
+        state[0], state[1], state[5] = disk.used, timestamp, disk.total
+        mean, std, count = _ewma(state, 2, rate, self.alpha)
+        if count + 1 < self.warmup:
+            return []
+
+        verdicts = [{
+            "rule": DISK_GROWTH_RULE,
+            "severity": "warning",
+            "expr": f"disk.growth 高于基线 {self.threshold:g}σ",
+            "description": f"基线 {mean / 1024 ** 3:.2f}±{std / 1024 ** 3:.2f} GB/小时",
+            "instance": disk.mountpoint,
+            "value": round(rate),
+            "baseline": round(mean),
+            "zscore": round((rate - mean) / std, 2) if std > 0 else None,
+            # 增长速率低于容量的1%/小时不算异常
+            "firing": rate - mean > max(self.threshold * std, disk.total * 0.01),
+        }]
+        eta = self._eta_hours(state)
+        verdicts.append({
+            "rule": DISK_ETA_RULE,
+            "severity": "critical",
+            "expr": f"disk.eta_hours < {self.eta_hours:g}",
+            "description": "按近期增长速率估算的磁盘写满时间",
+            "instance": disk.mountpoint,
+            "value": round(eta, 1) if eta is not None else None,
+            "firing": eta is not None and eta < self.eta_hours,
+        })
+        return verdicts
+
+    @staticmethod
+    def _eta_hours(state: array) -> Optional[float]:
+        rate = state[2]
+        if rate <= 0:
+            return None
+        return max(state[5] - state[0], 0) / rate
+
+    def observe(self, result: InspectionResult):
+        """只更新基线（如应用其他worker的结果），不产生结论"""
+        self.evaluate(result)
+
+    def host_baselines(self, host: str) -> Dict[str, Any]:
+        """一台主机各指标的全局与按小时基线、各挂载点的增长速率与写满时间"""
+        metrics = {}
+        for name in HOST_METRICS:
+            stats = self._metrics.get((host, name))
+            if stats is None:
+                continue
+            hours = {}
+            for hour in range(_HOURS):
+                offset = (hour + 1) * _SLOT
+                if stats[offset + 2] > 0:
+                    hours[hour] = {"mean": round(stats[offset], 3), "std": round(math.sqrt(stats[offset + 1]), 3)}
+            metrics[name] = {
+                "mean": round(stats[0], 3),
+                "std": round(math.sqrt(stats[1]), 3),
+                "count": int(stats[2]),
+                "hours": hours,
+            }
+        disks = {
+            mountpoint: self._disk_status(state)
+            for (disk_host, mountpoint), state in self._disks.items() if disk_host == host
+        }
+        return {"host": host, "metrics": metrics, "disks": disks}
+
+    def _disk_status(self, state: array) -> Dict[str, Any]:
+        eta = self._eta_hours(state) if state[4] >= self.warmup else None
+        return {
+            "total": int(state[5]),
+            "used": int(state[0]),
+            "growth_per_hour": round(state[2]),
+            "samples": int(state[4]),
+            "eta_hours": round(eta, 1) if eta is not None else None,
+            "full_at": (
+                (datetime.fromtimestamp(state[1]) + timedelta(hours=eta)).isoformat()
+                if eta is not None else None
+            ),
+        }
+
+    def disk_eta(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """按预计写满时间从近到远排列的挂载点"""
+        rows = []
+        for (host, mountpoint), state in self._disks.items():
+            status = self._disk_status(state)
+            if status["eta_hours"] is not None:
+                rows.append({"host": host, "mountpoint": mountpoint, **status})
+        rows.sort(key=lambda row: row["eta_hours"])
+        return rows[:limit]
+
+    def save(self, path: str):
+        """保存基线，供命令行下次运行或服务重启后继续使用"""
+        state = {
+            "version": 1,
+            "metrics": {f"{host}\t{name}": list(stats) for (host, name), stats in self._metrics.items()},
+            "disks": {f"{host}\t{mount}": list(stats) for (host, mount), stats in self._disks.items()},
+        }
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def load(self, path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        for key, stats in state.get("metrics", {}).items():
+            host, name = key.split("\t", 1)
+            if name in HOST_METRICS and len(stats) == _SLOT * (_HOURS + 1):
+                self._metrics[(host, name)] = array('d', stats)
+        for key, stats in state.get("disks", {}).items():
+            host, mountpoint = key.split("\t", 1)
+            if len(stats) == _DISK_FIELDS:
+                self._disks[(host, mountpoint)] = array('d', stats)
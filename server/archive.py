@@ -0,0 +1,403 @@
+import json
+import os
+import shutil
+from datetime import date, datetime
+from typing import Dict, List, Optional, Any, Iterator, Iterable, Tuple, Union
+
+import numpy as np
+
+from .models import InspectionResult
+
+# 每次巡检一行的主机表：列名 -> 类型，str 列做字典编码（int32 编码 + 分区内字典，缺失为 -1）
+HOST_COLUMNS: Dict[str, str] = {
+    "timestamp": "f8",
+    "host": "str",
+    "group": "str",
+    "errors": "i2",
+    "system.os_name": "str",
+    "system.os_version": "str",
+    "system.kernel_version": "str",
+    "system.hostname": "str",
+    "cpu.count": "i4",
+    "cpu.usage": "f4",
+    "cpu.load1": "f4",
+    "cpu.load5": "f4",
+    "cpu.load15": "f4",
+    "memory.total": "i8",
+    "memory.used": "i8",
+    "memory.available": "i8",
+    "memory.usage_percent": "f4",
+    "memory.swap_total": "i8",
+    "memory.swap_used": "i8",
+}
+
+# 每个挂载点一行的磁盘表，row 为同一分区片段中主机表的行号
+DISK_COLUMNS: Dict[str, str] = {
+    "row": "i4",
+    "timestamp": "f8",
+    "host": "str",
+    "mountpoint": "str",
+    "device": "str",
+    "disk_type": "str",
+    "total": "i8",
+    "used": "i8",
+    "usage_percent": "f4",
+}
+
+TABLES = {"hosts": HOST_COLUMNS, "disks": DISK_COLUMNS}
+
+# 缺失值：浮点列为NaN，整数列为-1
+_MISSING = {"f8": np.nan, "f4": np.nan, "i2": -1, "i4": -1, "i8": -1}
+
+META_FILE = "meta.json"
+
+DayLike = Union[str, date, None]
+
+
+def _day(value: DayLike) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+
+def _host_row(result: InspectionResult, group: Optional[str]) -> Dict[str, Any]:
+    system, cpu, memory = result.system, result.cpu, result.memory
+    load = cpu.load_average if cpu else []
+    return {
+        "timestamp": result.timestamp.timestamp(),
+        "host": result.host,
+        "group": group,
+        "errors": len(result.errors),
+        "system.os_name": system.os_name if system else None,
+        "system.os_version": system.os_version if system else None,
+        "system.kernel_version": system.kernel_version if system else None,
+        "system.hostname": system.hostname if system else None,
+        "cpu.count": cpu.cpu_count if cpu else None,
+        "cpu.usage": cpu.cpu_usage if cpu else None,
+        "cpu.load1": load[0] if len(load) > 0 else None,
+        "cpu.load5": load[1] if len(load) > 1 else None,
+        "cpu.load15": load[2] if len(load) > 2 else None,
+        "memory.total": memory.total if memory else None,
+        "memory.used": memory.used if memory else None,
+        "memory.available": memory.available if memory else None,
+        "memory.usage_percent": memory.usage_percent if memory else None,
+        "memory.swap_total": memory.swap_total if memory else None,
+        "memory.swap_used": memory.swap_used if memory else None,
+    }
+
+
+class _Segment:
+    """一天内尚未落盘的行，按列缓存，字符串在追加时即完成字典编码"""
+
+    def __init__(self):
+        self.columns = {
+            table: {name: [] for name in columns} for table, columns in TABLES.items()
+        }
+        self.dictionaries: Dict[str, Dict[str, Dict[str, int]]] = {
+            table: {name: {} for name, kind in columns.items() if kind == "str"}
+            for table, columns in TABLES.items()
+        }
+        self.rows = 0
+
+    def append(self, table: str, row: Dict[str, Any]):
+        columns = self.columns[table]
+        dictionaries = self.dictionaries[table]
+        for name, kind in TABLES[table].items():
+            value = row.get(name)
+            if kind == "str":
+                if value is None:
+                    value = -1
+                else:
+                    codes = dictionaries[name]
+                    value = codes.setdefault(value, len(codes))
+            elif value is None:
+                value = _MISSING[kind]
+            columns[name].append(value)
+
+    def arrays(self, table: str) -> Dict[str, np.ndarray]:
+        return {
+            name: np.asarray(values, dtype="i4" if TABLES[table][name] == "str" else TABLES[table][name])
+            for name, values in self.columns[table].items()
+        }
+
+    def row_counts(self) -> Dict[str, int]:
+        return {table: len(columns["timestamp"]) for table, columns in self.columns.items()}
+
+    def dictionary_lists(self) -> Dict[str, Dict[str, List[str]]]:
+        return {
+            table: {name: list(codes) for name, codes in dictionaries.items()}
+            for table, dictionaries in self.dictionaries.items()
+        }
+
+
+def _write_part(
+    path: str,
+    rows: Dict[str, int],
+    dictionaries: Dict[str, Dict[str, List[str]]],
+    tables: Dict[str, Dict[str, np.ndarray]],
+    compress: bool
+):
+    """写入一个分区片段：先写临时目录再改名，读取方不会看到写了一半的片段
+
+    字符串列的字典按列单独存放（<表>/<列>.json），只读数值列时不必解析。
+    """
+    tmp = path + ".tmp"
+    for table, arrays in tables.items():
+        os.makedirs(os.path.join(tmp, table), exist_ok=True)
+        if compress:
+            np.savez_compressed(os.path.join(tmp, f"{table}.npz"), **arrays)
+        else:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp, table, f"{name}.npy"), array)
+        for name, dictionary in dictionaries[table].items():
+            with open(os.path.join(tmp, table, f"{name}.json"), 'w', encoding='utf-8') as f:
+                json.dump(dictionary, f, ensure_ascii=False)
+    with open(os.path.join(tmp, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"rows": rows, "compressed": compress}, f)
+    os.replace(tmp, path)
+
+
+class ArchiveWriter:
+    """巡检历史的列式归档
+
+    目录结构为 <root>/<YYYY-MM-DD>/<片段>/，每个片段中主机表与磁盘表的每一列是一个 .npy 文件，
+    可按列内存映射读取；compress=True 时每张表写为一个压缩的 .npz（按列解压，不能内存映射），
+    适合冷数据。同一天多次写入产生多个片段，可用 compact() 合并。
+    """
+
+    def __init__(self, root: str, compress: bool = False, max_rows: int = 100000):
+        self.root = root
+        self.compress = compress
+        self.max_rows = max_rows
+        self._pending: Dict[str, _Segment] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return sum(segment.rows for segment in self._pending.values())
+
+    def add(self, result: InspectionResult, group: Optional[str] = None):
+        """追加一条巡检结果，按巡检时间的日期分区"""
+        day = result.timestamp.date().isoformat()
+        segment = self._pending.get(day)
+        if segment is None:
+            segment = self._pending[day] = _Segment()
+        row = len(segment.columns["hosts"]["timestamp"])
+        host = _host_row(result, group)
+        segment.append("hosts", host)
+        for disk in result.disks or []:
+            segment.append("disks", {
+                "row": row,
+                "timestamp": host["timestamp"],
+                "host": result.host,
+                "mountpoint": disk.mountpoint,
+                "device": disk.device,
+                "disk_type": disk.disk_type,
+                "total": disk.total,
+                "used": disk.used,
+                "usage_percent": disk.usage_percent,
+            })
+        segment.rows += 1
+        if segment.rows >= self.max_rows:
+            self.write(self.take(day))
+
+    def take(self, day: Optional[str] = None) -> List[Tuple[str, _Segment]]:
+        """取出待写入的片段（在事件循环中调用），随后可在线程池中 write()"""
+        days = [day] if day is not None else list(self._pending)
+        return [(d, self._pending.pop(d)) for d in days if d in self._pending]
+
+    def write(self, segments: List[Tuple[str, _Segment]]) -> List[str]:
+        paths = []
+        for day, segment in segments:
+            self._seq += 1
+            name = f"part-{datetime.now().strftime('%H%M%S%f')}-{os.getpid()}-{self._seq}"
+            path = os.path.join(self.root, day, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_part(
+                path, segment.row_counts(), segment.dictionary_lists(),
+                {table: segment.arrays(table) for table in TABLES},
+                self.compress
+            )
+            paths.append(path)
+        return paths
+
+    def flush(self) -> List[str]:
+        """写出全部缓存的行，返回新片段路径"""
+        return self.write(self.take())
+
+
+class Partition:
+    """一个归档片段，列在首次访问时才打开"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.day = os.path.basename(os.path.dirname(path))
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self._npz: Dict[str, Any] = {}
+        self._dictionaries: Dict[Tuple[str, str], List[Optional[str]]] = {}
+
+    def rows(self, table: str = "hosts") -> int:
+        return self.meta["rows"][table]
+
+    def dictionary(self, table: str, name: str) -> List[Optional[str]]:
+        key = (table, name)
+        if key not in self._dictionaries:
+            with open(os.path.join(self.path, table, f"{name}.json"), 'r', encoding='utf-8') as f:
+                self._dictionaries[key] = json.load(f)
+        return self._dictionaries[key]
+
+    def codes(self, table: str, name: str) -> np.ndarray:
+        """列的原始数组，字符串列为字典编码；未压缩片段以只读内存映射返回"""
+        if name not in TABLES[table]:
+            raise KeyError(f"未知的列: {table}.{name}")
+        if self.meta.get("compressed"):
+            npz = self._npz.get(table)
+            if npz is None:
+                npz = self._npz[table] = np.load(os.path.join(self.path, f"{table}.npz"))
+            return npz[name]
+        return np.load(os.path.join(self.path, table, f"{name}.npy"), mmap_mode='r')
+
+    def column(self, table: str, name: str) -> np.ndarray:
+        """读取一列，字符串列解码为对象数组"""
+        array = self.codes(table, name)
+        if TABLES[table][name] != "str":
+            return array
+        values = np.array(self.dictionary(table, name) + [None], dtype=object)
+        # 编码 -1 对应末尾的 None
+        return values[array]
+
+    def host_mask(self, table: str, hosts: Iterable[str]) -> np.ndarray:
+        dictionary = self.dictionary(table, "host")
+        wanted = [i for i, host in enumerate(dictionary) if host in hosts]
+        return np.isin(self.codes(table, "host"), wanted)
+
+    def close(self):
+        for npz in self._npz.values():
+            npz.close()
+        self._npz = {}
+
+
+class ArchiveReader:
+    """按日期范围与列扫描归档，只打开用到的列"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def days(self, start: DayLike = None, end: DayLike = None) -> List[str]:
+        """归档中的日期（含首尾）"""
+        if not os.path.isdir(self.root):
+            return []
+        start, end = _day(start), _day(end)
+        return sorted(
+            day for day in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, day))
+            and (start is None or day >= start) and (end is None or day <= end)
+        )
+
+    def partitions(self, start: DayLike = None, end: DayLike = None) -> List[Partition]:
+        parts = []
+        for day in self.days(start, end):
+            directory = os.path.join(self.root, day)
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if not name.endswith(".tmp") and os.path.exists(os.path.join(path, META_FILE)):
+                    parts.append(Partition(path))
+        return parts
+
+    def scan(
+        self,
+        columns: List[str],
+        start: DayLike = None,
+        end: DayLike = None,
+        hosts: Optional[Iterable[str]] = None,
+        table: str = "hosts"
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """逐个片段返回所需列，可按主机过滤"""
+        if table not in TABLES:
+            raise ValueError(f"未知的表: {table}")
+        for name in columns:
+            if name not in TABLES[table]:
+                raise ValueError(f"未知的列: {table}.{name}")
+        hosts = set(hosts) if hosts is not None else None
+        for part in self.partitions(start, end):
+            if part.rows(table) == 0:
+                continue
+            mask = part.host_mask(table, hosts) if hosts is not None else None
+            if mask is not None and not mask.any():
+                continue
+            chunk = {}
+            for name in columns:
+                array = part.column(table, name)
+                chunk[name] = array[mask] if mask is not None else array
+            yield chunk
+
+    def read(
+        self,
+        columns: List[str],
+        start: DayLike = None,
+        end: DayLike = None,
+        hosts: Optional[Iterable[str]] = None,
+        table: str = "hosts"
+    ) -> Dict[str, np.ndarray]:
+        """读取所需列并拼接为连续数组"""
+        chunks = list(self.scan(columns, start, end, hosts, table))
+        result = {}
+        for name in columns:
+            kind = TABLES[table][name]
+            if chunks:
+                result[name] = np.concatenate([chunk[name] for chunk in chunks])
+            else:
+                result[name] = np.empty(0, dtype=object if kind == "str" else kind)
+        return result
+
+    def compact(self, day: DayLike, compress: bool = False) -> Optional[str]:
+        """把一天的多个片段合并为一个，字符串字典重新编码"""
+        parts = self.partitions(day, day)
+        if not parts or (len(parts) == 1 and parts[0].meta.get("compressed") == compress):
+            return None
+        tables = {}
+        dictionaries = {}
+        rows = {}
+        for table, columns in TABLES.items():
+            arrays = {}
+            offsets = np.cumsum([0] + [part.rows("hosts") for part in parts[:-1]])
+            for name, kind in columns.items():
+                if kind == "str":
+                    values = np.concatenate([part.column(table, name) for part in parts])
+                    present = values != None  # noqa: E711
+                    dictionary, inverse = np.unique(values[present].astype(str), return_inverse=True)
+                    codes = np.full(len(values), -1, dtype="i4")
+                    codes[present] = inverse
+                    arrays[name] = codes
+                    dictionaries.setdefault(table, {})[name] = dictionary.tolist()
+                elif table == "disks" and name == "row":
+                    # 磁盘行号指向合并后主机表中的行
+                    arrays[name] = np.concatenate([
+                        np.asarray(part.codes(table, name)) + offset
+                        for part, offset in zip(parts, offsets)
+                    ]).astype("i4")
+                else:
+                    arrays[name] = np.concatenate([part.codes(table, name) for part in parts])
+            tables[table] = arrays
+            rows[table] = sum(part.rows(table) for part in parts)
+        for part in parts:
+            part.close()
+
+        path = os.path.join(self.root, _day(day), f"part-compact-{datetime.now().strftime('%H%M%S%f')}")
+        _write_part(path, rows, dictionaries, tables, compress)
+        for part in parts:
+            shutil.rmtree(part.path)
+        return path
+
+    def snapshot(self) -> Dict[str, Any]:
+        days = self.days()
+        parts = self.partitions()
+        return {
+            "root": self.root,
+            "days": len(days),
+            "first_day": days[0] if days else None,
+            "last_day": days[-1] if days else None,
+            "partitions": len(parts),
+            "rows": sum(part.rows("hosts") for part in parts),
+            "disk_rows": sum(part.rows("disks") for part in parts),
+        }
@@ -0,0 +1,150 @@
+import socket
+import threading
+import time
+from typing import Dict, Tuple, Any, List
+
+import paramiko
+from paramiko.common import OPEN_FAILED_RESOURCE_SHORTAGE
+
+from .models import JumpHostInfo
+
+
+class BastionError(Exception):
+    """跳板机本身不可用（连接或认证失败）"""
+
+
+class BastionPool:
+    """跳板机连接池：每台跳板机只保持一条已认证的SSH传输，
+    内层主机通过该传输上的direct-tcpip通道复用连接
+
+    握手失败后 failure_ttl 秒内直接返回同一错误，排队等待同一跳板机的主机不再逐个握手。
+    """
+
+    def __init__(self, keepalive: int = 30, failure_ttl: float = 10.0):
+        self.keepalive = keepalive
+        self.failure_ttl = failure_ttl
+        self._clients: Dict[Tuple[str, int, str], paramiko.SSHClient] = {}
+        # 最近一次握手失败：key -> (失效时间, 错误信息)
+        self._failures: Dict[Tuple[str, int, str], Tuple[float, str]] = {}
+        self._locks: Dict[Tuple[str, int, str], threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._stats: Dict[Tuple[str, int, str], Dict[str, int]] = {}
+
+    @staticmethod
+    def key(jump_host: JumpHostInfo) -> Tuple[str, int, str]:
+        return (jump_host.host, jump_host.port, jump_host.username)
+
+    def _lock_for(self, key: Tuple[str, int, str]) -> threading.Lock:
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+                self._stats[key] = {"handshakes": 0, "channels": 0}
+            return lock
+
+    def get_transport(self, jump_host: JumpHostInfo, timeout: float) -> paramiko.Transport:
+        """获取到跳板机的传输，不存在或已断开时重新建立（同一跳板机只握手一次）"""
+        key = self.key(jump_host)
+        with self._lock_for(key):
+            failure = self._failures.get(key)
+            if failure is not None:
+                if time.monotonic() < failure[0]:
+                    raise BastionError(failure[1])
+                del self._failures[key]
+
+            client = self._clients.get(key)
+            if client is not None:
+                transport = client.get_transport()
+                if transport is not None and transport.is_active():
+                    return transport
+                client.close()
+                del self._clients[key]
+
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            try:
+                if jump_host.key_path:
+                    private_key = paramiko.RSAKey.from_private_key_file(jump_host.key_path)
+                    client.connect(
+                        hostname=jump_host.host,
+                        port=jump_host.port,
+                        username=jump_host.username,
+                        pkey=private_key,
+                        timeout=timeout
+                    )
+                else:
+                    client.connect(
+                        hostname=jump_host.host,
+                        port=jump_host.port,
+                        username=jump_host.username,
+                        password=jump_host.password,
+                        timeout=timeout
+                    )
+            except Exception as e:
+                client.close()
+                message = f"跳板机连接失败 {jump_host.host}: {str(e)}"
+                self._failures[key] = (time.monotonic() + self.failure_ttl, message)
+                raise BastionError(message)
+
+            transport = client.get_transport()
+            transport.set_keepalive(self.keepalive)
+            self._clients[key] = client
+            self._stats[key]["handshakes"] += 1
+            return transport
+
+    def open_channel(
+        self,
+        jump_host: JumpHostInfo,
+        host: str,
+        port: int,
+        timeout: float
+    ) -> paramiko.Channel:
+        """通过跳板机打开到内层主机的direct-tcpip通道"""
+        for attempt in range(2):
+            transport = self.get_transport(jump_host, timeout)
+            try:
+                channel = transport.open_channel(
+                    "direct-tcpip",
+                    (host, port),
+                    ("127.0.0.1", 0),
+                    timeout=timeout
+                )
+                self._stats[self.key(jump_host)]["channels"] += 1
+                return channel
+            except paramiko.ChannelException as e:
+                # 资源不足视为瞬时错误，交由上层退避重试
+                if e.code == OPEN_FAILED_RESOURCE_SHORTAGE:
+                    raise
+                raise Exception(f"跳板机转发到 {host}:{port} 失败: {e.text}")
+            except (EOFError, socket.error, paramiko.SSHException) as e:
+                # 传输仍然正常时（如内层主机响应慢导致通道打开超时）归于内层主机，不计入跳板机熔断
+                if transport.is_active():
+                    raise Exception(f"跳板机转发到 {host}:{port} 失败: {str(e)}")
+                # 传输在使用过程中断开，重建一次
+                if attempt > 0:
+                    raise BastionError(f"跳板机连接中断 {jump_host.host}: {str(e)}")
+
+    def close_all(self):
+        """关闭所有跳板机连接"""
+        with self._guard:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._failures.clear()
+        for client in clients:
+            client.close()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """导出跳板机连接状态"""
+        bastions = []
+        for key, stats in list(self._stats.items()):
+            client = self._clients.get(key)
+            transport = client.get_transport() if client is not None else None
+            bastions.append({
+                "host": key[0],
+                "port": key[1],
+                "username": key[2],
+                "active": bool(transport is not None and transport.is_active()),
+                "handshakes": stats["handshakes"],
+                "channels": stats["channels"]
+            })
+        return bastions
@@ -0,0 +1,306 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any, Set
+
+from .models import ServerInfo, InspectionResult
+
+
+class _Task:
+    """等待采集节点巡检的一台主机"""
+    __slots__ = ("id", "server", "checks", "change_only", "datacenter", "future", "queued", "leased", "node",
+                 "attempts")
+
+    def __init__(self, server: ServerInfo, checks: List[str], change_only: bool, datacenter: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.server = server
+        self.checks = checks
+        self.change_only = change_only
+        self.datacenter = datacenter
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.queued = time.monotonic()
+        self.leased = 0.0
+        self.node: Optional[str] = None
+        self.attempts = 0
+
+
+class _Node:
+    __slots__ = ("name", "datacenter", "capacity", "running", "last_seen", "tasks", "completed", "failed")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.datacenter: Optional[str] = None
+        self.capacity = 0
+        self.running = 0
+        self.last_seen = time.monotonic()
+        self.tasks: Set[str] = set()
+        self.completed = 0
+        self.failed = 0
+
+
+class CollectorCoordinator:
+    """中心服务一侧的采集节点协调
+
+    待巡检的主机进入队列，采集节点通过HTTP长轮询领取（按巡检项分片），在本地巡检后批量回传结果。
+    主机带有数据中心时优先交给同一数据中心的节点；该数据中心没有存活节点时任意节点都可以领取。
+    节点超过 node_timeout 没有心跳视为离线，已领取未完成的主机重新入队由其他节点巡检；
+    领取超过 lease_timeout 仍未回传的主机（领取响应丢失、节点以同名重启）同样重新入队，
+    重新分配 max_attempts 次后巡检失败。离线节点之后补传的结果若对应主机尚未完成仍会被接受，重复的结果忽略。
+    """
+
+    def __init__(
+        self,
+        shard_size: int = 50,
+        node_timeout: float = 30.0,
+        queue_timeout: float = 300.0,
+        lease_timeout: float = 180.0,
+        max_attempts: int = 3
+    ):
+        self.shard_size = shard_size
+        self.node_timeout = node_timeout
+        # 主机在队列中等待领取的最长时间，超时后巡检失败
+        self.queue_timeout = queue_timeout
+        # 主机被领取后等待结果的最长时间，应大于单台巡检的时限
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.rebalanced = 0
+        self.stale = 0
+        self._nodes: Dict[str, _Node] = {}
+        self._tasks: Dict[str, _Task] = {}
+        self._pending: Deque[str] = deque()
+        # 每次有新主机入队时置位并换成新的Event，唤醒所有正在长轮询的节点
+        self._wakeup = asyncio.Event()
+
+    def _wake(self):
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    @property
+    def max_wait(self) -> float:
+        """一台主机从入队到得到结果的最长时间"""
+        return (self.queue_timeout + self.lease_timeout) * self.max_attempts
+
+    def _requeue(self, task: _Task) -> bool:
+        """已领取的主机交还队列，重新分配次数用完时巡检失败"""
+        owner = self._nodes.get(task.node) if task.node else None
+        if owner is not None:
+            owner.tasks.discard(task.id)
+        node = task.node
+        task.node = None
+        task.attempts += 1
+        if task.attempts >= self.max_attempts:
+            task.future.set_exception(Exception(f"采集节点 {node} 未回传结果，已重新分配 {task.attempts} 次"))
+            return False
+        task.queued = time.monotonic()
+        self._pending.appendleft(task.id)
+        return True
+
+    # ---- 节点 ----
+
+    def _live_nodes(self) -> List[_Node]:
+        deadline = time.monotonic() - self.node_timeout
+        return [node for node in self._nodes.values() if node.last_seen >= deadline]
+
+    def alive(self) -> bool:
+        """是否有存活的采集节点"""
+        return bool(self._live_nodes())
+
+    def heartbeat(self, name: str, datacenter: Optional[str] = None, capacity: int = 0, running: int = 0):
+        """登记节点或刷新心跳"""
+        node = self._nodes.get(name)
+        if node is None:
+            node = self._nodes[name] = _Node(name)
+        node.datacenter = datacenter
+        node.capacity = capacity
+        node.running = running
+        node.last_seen = time.monotonic()
+        return {"node": name, "leased": len(node.tasks)}
+
+    def release(self, name: str) -> int:
+        """节点下线：已领取未完成的主机重新入队，返回重新入队的主机数"""
+        node = self._nodes.pop(name, None)
+        if node is None:
+            return 0
+        requeued = 0
+        for task_id in list(node.tasks):
+            task = self._tasks.get(task_id)
+            if task is None or task.future.done():
+                continue
+            requeued += self._requeue(task)
+        self.rebalanced += requeued
+        if requeued:
+            self._wake()
+        return requeued
+
+    # ---- 分发 ----
+
+    async def inspect(
+        self,
+        server: ServerInfo,
+        checks: List[str],
+        change_only: bool = False,
+        datacenter: Optional[str] = None
+    ) -> InspectionResult:
+        """把主机交给采集节点巡检并等待结果"""
+        task = _Task(server, checks, change_only, datacenter)
+        self._tasks[task.id] = task
+        self._pending.append(task.id)
+        self._wake()
+        try:
+            return await asyncio.wait_for(task.future, self.max_wait)
+        except asyncio.TimeoutError:
+            raise Exception(f"等待采集节点巡检超时 ({self.max_wait:g}秒)")
+        finally:
+            # 调用方取消时丢弃任务，队列中的id在领取时跳过
+            self._tasks.pop(task.id, None)
+            node = self._nodes.get(task.node) if task.node else None
+            if node is not None:
+                node.tasks.discard(task.id)
+
+    def _take(self, node: _Node, max_hosts: int) -> List[_Task]:
+        live_datacenters = {n.datacenter for n in self._live_nodes() if n.datacenter}
+        taken = []
+        skipped = []
+        while self._pending and len(taken) < max_hosts:
+            task_id = self._pending.popleft()
+            task = self._tasks.get(task_id)
+            if task is None or task.future.done():
+                continue
+            if task.datacenter and task.datacenter != node.datacenter and task.datacenter in live_datacenters:
+                skipped.append(task_id)
+                continue
+            task.node = node.name
+            task.leased = time.monotonic()
+            node.tasks.add(task_id)
+            taken.append(task)
+        # 留给其他数据中心的主机按原顺序放回队首
+        self._pending.extendleft(reversed(skipped))
+        return taken
+
+    def _shards(self, tasks: List[_Task]) -> List[Dict[str, Any]]:
+        groups: Dict[tuple, List[_Task]] = {}
+        for task in tasks:
+            groups.setdefault((tuple(task.checks), task.change_only), []).append(task)
+        shards = []
+        for (checks, change_only), group in groups.items():
+            for start in range(0, len(group), self.shard_size):
+                shards.append({
+                    "shard": uuid.uuid4().hex,
+                    "checks": list(checks),
+                    "change_only": change_only,
+                    "servers": [
+                        {"task": task.id, **task.server.model_dump(mode="json")}
+                        for task in group[start:start + self.shard_size]
+                    ],
+                })
+        return shards
+
+    async def lease(self, name: str, max_hosts: int, wait: float = 0.0) -> List[Dict[str, Any]]:
+        """节点领取最多max_hosts台主机，队列中没有可领取的主机时最多等待wait秒"""
+        deadline = time.monotonic() + wait
+        while True:
+            node = self._nodes.get(name)
+            if node is None:
+                raise Exception(f"采集节点 {name} 未登记")
+            node.last_seen = time.monotonic()
+            tasks = self._take(node, max_hosts)
+            remaining = deadline - time.monotonic()
+            if tasks or remaining <= 0:
+                return self._shards(tasks)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def complete(self, name: str, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        """接收节点回传的结果，每项为 {"task", "result"} 或 {"task", "error"}"""
+        node = self._nodes.get(name)
+        if node is not None:
+            node.last_seen = time.monotonic()
+        accepted = 0
+        for item in items:
+            task = self._tasks.get(item.get("task"))
+            if task is None or task.future.done():
+                self.stale += 1
+                continue
+            owner = self._nodes.get(task.node) if task.node else None
+            if owner is not None:
+                owner.tasks.discard(task.id)
+            if "error" in item:
+                task.future.set_exception(Exception(item["error"]))
+                if node is not None:
+                    node.failed += 1
+            else:
+                try:
+                    task.future.set_result(InspectionResult.model_validate(item["result"]))
+                except Exception as e:
+                    task.future.set_exception(Exception(f"采集节点返回的结果无效: {str(e)}"))
+                if node is not None:
+                    node.completed += 1
+            accepted += 1
+        return {"accepted": accepted, "stale": len(items) - accepted}
+
+    # ---- 过期与重新分配 ----
+
+    def expire(self):
+        """离线节点的主机重新入队，队列中等待过久的主机巡检失败"""
+        deadline = time.monotonic() - self.node_timeout
+        expired = [name for name, node in self._nodes.items() if node.last_seen < deadline]
+        for name in expired:
+            requeued = self.release(name)
+            if requeued:
+                print(f"采集节点 {name} 离线，{requeued} 台主机重新分配")
+        # 领取后过久没有回传的主机
+        lease_deadline = time.monotonic() - self.lease_timeout
+        stuck = [
+            task for task in self._tasks.values()
+            if task.node is not None and not task.future.done() and task.leased < lease_deadline
+        ]
+        requeued = sum(self._requeue(task) for task in stuck)
+        if stuck:
+            print(f"{len(stuck)} 台主机领取后 {self.lease_timeout:g} 秒未回传结果，{requeued} 台重新分配")
+        self.rebalanced += requeued
+        if expired or requeued:
+            # 离线节点所在数据中心的主机此后可由其他节点领取
+            self._wake()
+
+        queue_deadline = time.monotonic() - self.queue_timeout
+        pending = deque()
+        for task_id in self._pending:
+            task = self._tasks.get(task_id)
+            if task is None or task.future.done():
+                continue
+            if task.queued < queue_deadline:
+                task.future.set_exception(Exception(f"等待采集节点超时 ({self.queue_timeout:g}秒)"))
+            else:
+                pending.append(task_id)
+        self._pending = pending
+
+    async def run(self, interval: float = 5.0):
+        while True:
+            await asyncio.sleep(interval)
+            self.expire()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "nodes": [
+                {
+                    "name": node.name,
+                    "datacenter": node.datacenter,
+                    "capacity": node.capacity,
+                    "running": node.running,
+                    "leased": len(node.tasks),
+                    "completed": node.completed,
+                    "failed": node.failed,
+                    "last_seen": round(now - node.last_seen, 1),
+                    "alive": now - node.last_seen <= self.node_timeout,
+                }
+                for node in self._nodes.values()
+            ],
+            "pending": sum(1 for task in self._tasks.values() if task.node is None),
+            "inflight": len(self._tasks),
+            "rebalanced": self.rebalanced,
+            "stale": self.stale,
+        }
@@ -0,0 +1,137 @@
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+
+from .models import (
+    InspectionResult, SystemInfo, CPUInfo, MemoryInfo,
+    DiskInfo, NetworkInfo, NetworkInterface, ProcessInfo, ServiceInfo
+)
+
+# 取值重复度高的字段做字符串驻留，同一取值在全部主机间只保留一份
+INTERNED_FIELDS = {
+    SystemInfo: {"os_name", "os_version", "kernel_version"},
+    CPUInfo: {"cpu_model"},
+    DiskInfo: {"device", "mountpoint", "filesystem", "disk_type"},
+    NetworkInterface: {"name", "netmask", "interface_type", "status", "speed"},
+    ProcessInfo: {"name", "status"},
+    ServiceInfo: {"name", "status", "description"},
+}
+
+# 自由格式字典（bond、VIP、路由）中需要驻留的键
+INTERNED_KEYS = {"name", "mode", "status", "type", "interface", "gateway", "destination"}
+
+# 字典的键元组也做驻留，同构字典共用同一个键元组
+_key_tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _pack_model(model, cls) -> Tuple:
+    """模型按字段顺序压成元组"""
+    interned = INTERNED_FIELDS.get(cls, ())
+    return tuple(
+        _intern(getattr(model, name)) if name in interned else getattr(model, name)
+        for name in cls.model_fields
+    )
+
+
+def _unpack_model(cls, values: Tuple):
+    """元组还原为模型，数据在写入时已校验过，这里跳过校验"""
+    return cls.model_construct(**dict(zip(cls.model_fields, values)))
+
+
+def _pack_dicts(items: List[Dict[str, Any]]) -> Tuple:
+    """字典列表压成 (键元组, 值元组) 序列；键集合相同的字典共用同一个键元组"""
+    packed = []
+    for item in items:
+        keys = tuple(item.keys())
+        keys = _key_tuples.setdefault(keys, tuple(sys.intern(k) for k in keys))
+        packed.append((keys, tuple(
+            _intern(item[k]) if k in INTERNED_KEYS else item[k] for k in keys
+        )))
+    return tuple(packed)
+
+
+def _unpack_dicts(packed: Tuple) -> List[Dict[str, Any]]:
+    return [dict(zip(keys, values)) for keys, values in packed]
+
+
+class CompactResult:
+    """巡检结果的紧凑表示，用于内存中长期保存的最新状态
+
+    各巡检项按模型字段顺序存为元组，重复度高的字符串驻留，时间戳存为浮点数。
+    只有对外返回时才通过 to_model() 还原为Pydantic模型。
+    """
+    __slots__ = (
+        "host", "timestamp", "system", "cpu", "memory", "disks",
+        "network", "processes", "services", "errors"
+    )
+
+    def __init__(self, result: InspectionResult):
+        self.host = sys.intern(result.host)
+        self.timestamp = result.timestamp.timestamp()
+        self.system = _pack_model(result.system, SystemInfo) if result.system else None
+        if result.cpu:
+            cpu = _pack_model(result.cpu, CPUInfo)
+            self.cpu = cpu[:2] + (tuple(cpu[2]),) + cpu[3:]
+        else:
+            self.cpu = None
+        self.memory = _pack_model(result.memory, MemoryInfo) if result.memory else None
+        self.disks = (
+            tuple(_pack_model(d, DiskInfo) for d in result.disks)
+            if result.disks is not None else None
+        )
+        if result.network:
+            network = result.network
+            self.network = (
+                tuple(_pack_model(i, NetworkInterface) for i in network.interfaces),
+                _pack_dicts(network.bonds),
+                _pack_dicts(network.vips),
+                _pack_dicts(network.routing_table),
+            )
+        else:
+            self.network = None
+        self.processes = (
+            tuple(_pack_model(p, ProcessInfo) for p in result.processes)
+            if result.processes is not None else None
+        )
+        self.services = (
+            tuple(_pack_model(s, ServiceInfo) for s in result.services)
+            if result.services is not None else None
+        )
+        self.errors = tuple(result.errors)
+
+    def to_model(self) -> InspectionResult:
+        """还原为Pydantic模型"""
+        cpu = None
+        if self.cpu is not None:
+            cpu = _unpack_model(CPUInfo, self.cpu[:2] + (list(self.cpu[2]),) + self.cpu[3:])
+        network = None
+        if self.network is not None:
+            interfaces, bonds, vips, routes = self.network
+            network = NetworkInfo.model_construct(
+                interfaces=[_unpack_model(NetworkInterface, i) for i in interfaces],
+                bonds=_unpack_dicts(bonds),
+                vips=_unpack_dicts(vips),
+                routing_table=_unpack_dicts(routes)
+            )
+        return InspectionResult.model_construct(
+            host=self.host,
+            timestamp=datetime.fromtimestamp(self.timestamp),
+            system=_unpack_model(SystemInfo, self.system) if self.system is not None else None,
+            cpu=cpu,
+            memory=_unpack_model(MemoryInfo, self.memory) if self.memory is not None else None,
+            disks=[_unpack_model(DiskInfo, d) for d in self.disks] if self.disks is not None else None,
+            network=network,
+            processes=(
+                [_unpack_model(ProcessInfo, p) for p in self.processes]
+                if self.processes is not None else None
+            ),
+            services=(
+                [_unpack_model(ServiceInfo, s) for s in self.services]
+                if self.services is not None else None
+            ),
+            errors=list(self.errors)
+        )
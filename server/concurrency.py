@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+
+class LatencyTracker:
+    """延迟的指数滑动平均，以及缓慢上浮的基线（最小值）"""
+
+    def __init__(self, smoothing: float = 0.2, baseline_drift: float = 0.01):
+        self.smoothing = smoothing
+        self.baseline_drift = baseline_drift
+        self.ewma: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self.samples = 0
+
+    def record(self, seconds: float):
+        self.samples += 1
+        if self.ewma is None:
+            self.ewma = seconds
+            self.baseline = seconds
+            return
+        self.ewma += (seconds - self.ewma) * self.smoothing
+        if self.ewma < self.baseline:
+            self.baseline = self.ewma
+        else:
+            # 基线缓慢向当前值靠拢，避免一次偶然的低延迟永久压低基线
+            self.baseline += (self.ewma - self.baseline) * self.baseline_drift
+
+    def is_flat(self, tolerance: float) -> bool:
+        """当前延迟是否仍处于基线的容忍范围内"""
+        if self.ewma is None:
+            return True
+        return self.ewma <= self.baseline * tolerance
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD自适应并发控制：延迟平稳时加性增加并发，超时或连接重置时乘性减少"""
+
+    def __init__(
+        self,
+        initial: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.in_flight = 0
+        self.latency: Dict[str, LatencyTracker] = {
+            "connect": LatencyTracker(),
+            "command": LatencyTracker()
+        }
+        self.successes = 0
+        self.congestion_events = 0
+        self._last_decrease = 0.0
+        self._waiters: deque = deque()
+
+    @property
+    def current_limit(self) -> int:
+        return int(self.limit)
+
+    async def acquire(self):
+        """获取一个并发槽位，槽位不足时排队等待"""
+        if self.in_flight < self.current_limit and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # 已分配到槽位但被取消，归还槽位
+                self.release()
+            raise
+
+    def release(self):
+        """释放并发槽位并唤醒等待者"""
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        while self._waiters and self.in_flight < self.current_limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def record_latency(self, kind: str, seconds: float):
+        """记录一次连接或命令的耗时"""
+        tracker = self.latency.get(kind)
+        if tracker is None:
+            tracker = self.latency[kind] = LatencyTracker()
+        tracker.record(seconds)
+
+    def record_success(self):
+        """一台主机巡检完成；延迟平稳且并发已用满时加性增加"""
+        self.successes += 1
+        saturated = self.in_flight + len(self._waiters) >= self.current_limit
+        flat = all(t.is_flat(self.latency_tolerance) for t in self.latency.values())
+        if saturated and flat and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + self.increase_step)
+            self._wake_waiters()
+
+    def record_congestion(self):
+        """出现超时或连接重置，乘性减少并发"""
+        self.congestion_events += 1
+        now = time.monotonic()
+        # 同一次拥塞往往引发一批失败，冷却时间内只减少一次
+        connect = self.latency["connect"].ewma or 0.0
+        if now - self._last_decrease < max(1.0, connect):
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出当前并发与延迟状态"""
+        latency = {}
+        for kind, tracker in self.latency.items():
+            latency[kind] = {
+                "ewma_ms": round(tracker.ewma * 1000, 1) if tracker.ewma is not None else None,
+                "baseline_ms": round(tracker.baseline * 1000, 1) if tracker.baseline is not None else None,
+                "samples": tracker.samples
+            }
+        return {
+            "limit": self.current_limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "successes": self.successes,
+            "congestion_events": self.congestion_events,
+            "latency": latency
+        }
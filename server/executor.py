@@ -0,0 +1,149 @@
+import select
+import socket
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import paramiko
+
+# 单次读取的块大小
+CHUNK_SIZE = 32768
+
+
+@dataclass
+class CommandResult:
+    """命令执行结果"""
+    command: str
+    exit_status: int
+    stdout: str
+    stderr: str
+    stdout_truncated: bool = False
+    stderr_truncated: bool = False
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        # 部分SSH服务端不返回退出码（-1），此时以stderr是否为空判断
+        if self.exit_status == -1:
+            return not self.stderr
+        return self.exit_status == 0
+
+
+class BoundedBuffer:
+    """有上限的输出缓冲区，超出上限的数据直接丢弃，但仍会被读走以免阻塞通道"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.truncated = False
+        self._chunks = []
+
+    def append(self, data: bytes):
+        room = self.max_bytes - self.size
+        if room <= 0:
+            self.truncated = True
+            return
+        if len(data) > room:
+            data = data[:room]
+            self.truncated = True
+        self._chunks.append(data)
+        self.size += len(data)
+
+    def getvalue(self) -> str:
+        return b"".join(self._chunks).decode('utf-8', errors='replace')
+
+
+class LineSplitter:
+    """把输出按行切分后逐行交给回调，用于超大输出的增量解析"""
+
+    def __init__(self, on_line: Callable[[str], None]):
+        self.on_line = on_line
+        self._pending = b""
+
+    def feed(self, data: bytes):
+        data = self._pending + data
+        lines = data.split(b"\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self.on_line(line.decode('utf-8', errors='replace'))
+
+    def close(self):
+        if self._pending:
+            self.on_line(self._pending.decode('utf-8', errors='replace'))
+            self._pending = b""
+
+
+def run_command(
+    ssh_client: paramiko.SSHClient,
+    command: str,
+    timeout: float,
+    max_bytes: int,
+    on_line: Optional[Callable[[str], None]] = None
+) -> CommandResult:
+    """执行远程命令，并发读取stdout与stderr
+
+    - 两个输出流同时读取，避免stderr写满通道窗口导致命令卡住
+    - 每个输出流最多保留max_bytes字节，超出部分丢弃并标记截断
+    - 超过timeout秒仍未结束则关闭通道并抛出socket.timeout
+    - 指定on_line时stdout逐行交给回调处理，不在内存中缓存
+    """
+    transport = ssh_client.get_transport()
+    if transport is None or not transport.is_active():
+        raise paramiko.SSHException("SSH连接已断开")
+
+    started = time.monotonic()
+    deadline = started + timeout
+    channel = transport.open_session(timeout=timeout)
+    try:
+        channel.setblocking(0)
+        channel.exec_command(command)
+        channel.shutdown_write()
+
+        stdout = BoundedBuffer(max_bytes)
+        stderr = BoundedBuffer(max_bytes)
+        splitter = LineSplitter(on_line) if on_line else None
+
+        while True:
+            received = False
+            while channel.recv_ready():
+                data = channel.recv(CHUNK_SIZE)
+                if not data:
+                    break
+                received = True
+                if splitter:
+                    splitter.feed(data)
+                else:
+                    stdout.append(data)
+            while channel.recv_stderr_ready():
+                data = channel.recv_stderr(CHUNK_SIZE)
+                if not data:
+                    break
+                received = True
+                stderr.append(data)
+
+            if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+            if channel.closed and not received:
+                break
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout(f"命令执行超时({timeout:.0f}秒): {command}")
+            if not received:
+                # 等待新数据或通道关闭
+                select.select([channel], [], [], min(remaining, 0.1))
+
+        if splitter:
+            splitter.close()
+
+        return CommandResult(
+            command=command,
+            exit_status=channel.recv_exit_status() if channel.exit_status_ready() else -1,
+            stdout=stdout.getvalue(),
+            stderr=stderr.getvalue(),
+            stdout_truncated=stdout.truncated,
+            stderr_truncated=stderr.truncated,
+            duration=time.monotonic() - started
+        )
+    finally:
+        channel.close()
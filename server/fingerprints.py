@@ -0,0 +1,260 @@
+import hashlib
+import heapq
+import sys
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple
+
+from .models import InspectionResult
+
+
+def _system(result: InspectionResult) -> Optional[Tuple[str, ...]]:
+    return (result.system.os_name, result.system.os_version) if result.system else None
+
+
+def _kernel(result: InspectionResult) -> Optional[Tuple[str, ...]]:
+    return (result.system.kernel_version,) if result.system else None
+
+
+def _cpu_model(result: InspectionResult) -> Optional[Tuple[str, ...]]:
+    return (result.cpu.cpu_model,) if result.cpu else None
+
+
+def _mounts(result: InspectionResult) -> Optional[Tuple[str, ...]]:
+    if result.disks is None:
+        return None
+    return tuple(sorted({f"{disk.mountpoint} {disk.filesystem}" for disk in result.disks}))
+
+
+def _bonds(result: InspectionResult) -> Optional[Tuple[str, ...]]:
+    if result.network is None:
+        return None
+    return tuple(sorted({f"{bond.get('name')} mode={bond.get('mode')}" for bond in result.network.bonds}))
+
+
+def _services(result: InspectionResult) -> Optional[Tuple[str, ...]]:
+    if result.services is None:
+        return None
+    return tuple(sorted({service.name for service in result.services if service.enabled}))
+
+
+# 配置段：名称 -> 取值函数；结果中缺少对应巡检项时返回None，该主机不计入这一段
+SECTIONS: Dict[str, Callable[[InspectionResult], Optional[Tuple[str, ...]]]] = {
+    "os": _system,
+    "kernel": _kernel,
+    "cpu_model": _cpu_model,
+    "mounts": _mounts,
+    "bonds": _bonds,
+    "services": _services,
+}
+
+# 取值为集合的段，集合中的每一项另建索引，支持"缺少某服务"等查询
+SET_SECTIONS = frozenset(["mounts", "bonds", "services"])
+
+
+def fingerprint(values: Tuple[str, ...]) -> str:
+    """配置段取值的指纹，跨进程稳定，可在API请求中引用"""
+    digest = hashlib.blake2b("\x1f".join(values).encode('utf-8'), digest_size=8).hexdigest()
+    return sys.intern(digest)
+
+
+class FingerprintIndex:
+    """按配置段把每台主机归约为指纹，维护 指纹 -> 主机 的倒排索引
+
+    结果到达时只更新指纹发生变化的段；漂移、离群与缺项查询只遍历指纹分组或对集合做差，
+    不扫描全部主机的结果。
+    """
+
+    def __init__(self):
+        # 主机 -> {段: 指纹}
+        self._hosts: Dict[str, Dict[str, str]] = {}
+        # 段 -> 指纹 -> 主机集合
+        self._index: Dict[str, Dict[str, Set[str]]] = {section: {} for section in SECTIONS}
+        # 段 -> 指纹 -> 取值
+        self._values: Dict[str, Dict[str, Tuple[str, ...]]] = {section: {} for section in SECTIONS}
+        # 集合段 -> 项 -> 主机集合
+        self._items: Dict[str, Dict[str, Set[str]]] = {section: {} for section in SET_SECTIONS}
+        # 段 -> 有该段数据的主机
+        self._members: Dict[str, Set[str]] = {section: set() for section in SECTIONS}
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+    @staticmethod
+    def _check(section: str):
+        if section not in SECTIONS:
+            raise ValueError(f"不支持的配置段: {section}，可选: {', '.join(SECTIONS)}")
+
+    # ---- 增量更新 ----
+
+    def update(self, result: InspectionResult):
+        host = result.host
+        current = self._hosts.setdefault(host, {})
+        for section, extract in SECTIONS.items():
+            values = extract(result)
+            fp = fingerprint(values) if values is not None else None
+            old = current.get(section)
+            if fp == old:
+                continue
+            if old is not None:
+                self._unindex(host, section, old)
+                del current[section]
+            if fp is not None:
+                self._add(host, section, fp, values)
+                current[section] = fp
+        if not current:
+            del self._hosts[host]
+
+    def remove(self, host: str):
+        for section, fp in self._hosts.pop(host, {}).items():
+            self._unindex(host, section, fp)
+
+    def _add(self, host: str, section: str, fp: str, values: Tuple[str, ...]):
+        hosts = self._index[section].get(fp)
+        if hosts is None:
+            hosts = self._index[section][fp] = set()
+            self._values[section][fp] = tuple(sys.intern(value) for value in values)
+        hosts.add(host)
+        self._members[section].add(host)
+        if section in SET_SECTIONS:
+            items = self._items[section]
+            for item in self._values[section][fp]:
+                items.setdefault(item, set()).add(host)
+
+    def _unindex(self, host: str, section: str, fp: str):
+        hosts = self._index[section][fp]
+        hosts.discard(host)
+        self._members[section].discard(host)
+        if section in SET_SECTIONS:
+            items = self._items[section]
+            for item in self._values[section][fp]:
+                holders = items.get(item)
+                if holders is not None:
+                    holders.discard(host)
+                    if not holders:
+                        del items[item]
+        if not hosts:
+            del self._index[section][fp]
+            del self._values[section][fp]
+
+    # ---- 查询 ----
+
+    def host(self, host: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """一台主机各段的指纹与取值"""
+        fingerprints = self._hosts.get(host)
+        if fingerprints is None:
+            return None
+        return {
+            section: {"fingerprint": fp, "value": list(self._values[section][fp])}
+            for section, fp in fingerprints.items()
+        }
+
+    def _majority(self, section: str) -> Optional[str]:
+        groups = self._index[section]
+        if not groups:
+            return None
+        return max(groups, key=lambda fp: (len(groups[fp]), fp))
+
+    def overview(self) -> Dict[str, Any]:
+        """各段的主机数、不同指纹数与多数派占比"""
+        sections = {}
+        for section in SECTIONS:
+            members = len(self._members[section])
+            majority = self._majority(section)
+            sections[section] = {
+                "hosts": members,
+                "fingerprints": len(self._index[section]),
+                "majority_share": round(len(self._index[section][majority]) / members, 4) if majority else None,
+            }
+        return {"hosts": len(self._hosts), "sections": sections}
+
+    def _group(self, section: str, fp: str, sample: int) -> Dict[str, Any]:
+        hosts = self._index[section][fp]
+        return {
+            "fingerprint": fp,
+            "value": list(self._values[section][fp]),
+            "hosts": len(hosts),
+            "sample": heapq.nsmallest(sample, hosts),
+        }
+
+    def distribution(self, section: str, limit: int = 20, sample: int = 5) -> Dict[str, Any]:
+        """一个段的各指纹及其主机数，按主机数从多到少排列"""
+        self._check(section)
+        groups = self._index[section]
+        ordered = sorted(groups, key=lambda fp: (-len(groups[fp]), fp))
+        return {
+            "section": section,
+            "hosts": len(self._members[section]),
+            "total": len(groups),
+            "fingerprints": [self._group(section, fp, sample) for fp in ordered[:limit]],
+        }
+
+    def outliers(self, section: str, max_share: float = 0.05, sample: int = 20) -> Dict[str, Any]:
+        """主机数占比不超过max_share的少数指纹"""
+        self._check(section)
+        members = len(self._members[section])
+        groups = self._index[section]
+        rare = sorted(
+            (fp for fp, hosts in groups.items() if len(hosts) <= members * max_share),
+            key=lambda fp: (len(groups[fp]), fp)
+        )
+        return {
+            "section": section,
+            "hosts": members,
+            "outlier_hosts": sum(len(groups[fp]) for fp in rare),
+            "fingerprints": [self._group(section, fp, sample) for fp in rare],
+        }
+
+    def drift(self, section: str, reference: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        """与基准指纹不同的主机；基准取reference主机的指纹，未指定时取多数派
+
+        集合段同时给出每台漂移主机相对基准缺少与多出的项。
+        """
+        self._check(section)
+        if reference is not None:
+            baseline = self._hosts.get(reference, {}).get(section)
+            if baseline is None:
+                raise ValueError(f"主机 {reference} 没有 {section} 的巡检数据")
+        else:
+            baseline = self._majority(section)
+        if baseline is None:
+            return {"section": section, "baseline": None, "matching": 0, "drifted": 0, "hosts": []}
+
+        groups = self._index[section]
+        baseline_values = self._values[section][baseline]
+        baseline_set = set(baseline_values) if section in SET_SECTIONS else None
+        drifted = []
+        for fp in sorted(groups, key=lambda fp: (-len(groups[fp]), fp)):
+            if fp == baseline:
+                continue
+            values = self._values[section][fp]
+            detail: Dict[str, Any] = {"fingerprint": fp}
+            if baseline_set is None:
+                detail["value"] = list(values)
+            else:
+                detail["missing"] = sorted(baseline_set.difference(values))
+                detail["extra"] = sorted(set(values).difference(baseline_set))
+            for host in sorted(groups[fp]):
+                if len(drifted) >= limit:
+                    break
+                drifted.append({"host": host, **detail})
+        matching = len(groups[baseline])
+        return {
+            "section": section,
+            "baseline": {"fingerprint": baseline, "value": list(baseline_values), "reference": reference},
+            "matching": matching,
+            "drifted": len(self._members[section]) - matching,
+            "hosts": drifted,
+        }
+
+    def hosts_with(self, section: str, fp: str) -> List[str]:
+        self._check(section)
+        return sorted(self._index[section].get(fp, ()))
+
+    def hosts_by_item(self, section: str, item: str, missing: bool = False) -> List[str]:
+        """集合段中含有（或缺少）某一项的主机，如缺少 sshd 服务的主机"""
+        self._check(section)
+        if section not in SET_SECTIONS:
+            raise ValueError(f"配置段 {section} 不是集合，可按项查询的段: {', '.join(sorted(SET_SECTIONS))}")
+        holders = self._items[section].get(item, set())
+        if missing:
+            return sorted(self._members[section] - holders)
+        return sorted(holders)
@@ -0,0 +1,139 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+# 熔断器状态
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+@dataclass
+class HostHealth:
+    """单台主机的健康状态"""
+    host: str
+    state: str = STATE_CLOSED
+    consecutive_failures: int = 0
+    open_count: int = 0
+    open_until: float = 0.0
+    probe_in_flight: bool = False
+    probe_started: float = 0.0
+    last_error: str = ""
+    last_failure_at: Optional[float] = None
+    last_success_at: Optional[float] = None
+
+
+class HostHealthTracker:
+    """按主机记录连接失败情况，实现指数退避与熔断"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        base_cooldown: float = 30.0,
+        max_cooldown: float = 1800.0,
+        probe_timeout: float = 300.0
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        # 半开探测超过该时间仍未记录结果视为丢失，允许重新探测
+        self.probe_timeout = probe_timeout
+        self._hosts: Dict[str, HostHealth] = {}
+
+    def _get(self, host: str) -> HostHealth:
+        health = self._hosts.get(host)
+        if health is None:
+            health = HostHealth(host=host)
+            self._hosts[host] = health
+        return health
+
+    def allow(self, host: str) -> bool:
+        """判断本次是否允许巡检该主机；熔断期间直接拒绝"""
+        health = self._hosts.get(host)
+        if health is None or health.state == STATE_CLOSED:
+            return True
+
+        if health.state == STATE_OPEN:
+            if time.monotonic() < health.open_until:
+                return False
+            # 冷却期结束，进入半开状态，只放行一次探测
+            health.state = STATE_HALF_OPEN
+            health.probe_in_flight = False
+
+        now = time.monotonic()
+        if health.probe_in_flight and now - health.probe_started < self.probe_timeout:
+            return False
+        health.probe_in_flight = True
+        health.probe_started = now
+        return True
+
+    def release(self, host: str):
+        """未记录成功或失败就结束巡检时交还半开探测名额"""
+        health = self._hosts.get(host)
+        if health is not None:
+            health.probe_in_flight = False
+
+    def retry_after(self, host: str) -> float:
+        """距离下一次允许巡检的剩余秒数"""
+        health = self._hosts.get(host)
+        if health is None or health.state == STATE_CLOSED:
+            return 0.0
+        if health.state == STATE_HALF_OPEN:
+            # 探测进行中时其余请求要等探测结束或超时
+            if not health.probe_in_flight:
+                return 0.0
+            return max(0.0, health.probe_started + self.probe_timeout - time.monotonic())
+        return max(0.0, health.open_until - time.monotonic())
+
+    def record_success(self, host: str):
+        """记录一次成功，关闭熔断器"""
+        health = self._get(host)
+        health.state = STATE_CLOSED
+        health.consecutive_failures = 0
+        health.open_count = 0
+        health.probe_in_flight = False
+        health.last_error = ""
+        health.last_success_at = time.time()
+
+    def record_failure(self, host: str, error: str = ""):
+        """记录一次失败，达到阈值或半开探测失败时打开熔断器"""
+        health = self._get(host)
+        health.consecutive_failures += 1
+        health.probe_in_flight = False
+        health.last_error = error
+        health.last_failure_at = time.time()
+
+        if health.state == STATE_HALF_OPEN or health.consecutive_failures >= self.failure_threshold:
+            health.open_count += 1
+            cooldown = min(
+                self.base_cooldown * (2 ** (health.open_count - 1)),
+                self.max_cooldown
+            )
+            health.state = STATE_OPEN
+            health.open_until = time.monotonic() + cooldown
+
+    def reset(self, host: Optional[str] = None):
+        """手动重置某台主机（或全部主机）的健康状态"""
+        if host is None:
+            self._hosts.clear()
+        else:
+            self._hosts.pop(host, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出所有主机的健康状态"""
+        hosts = []
+        for health in self._hosts.values():
+            hosts.append({
+                "host": health.host,
+                "state": health.state,
+                "consecutive_failures": health.consecutive_failures,
+                "retry_after": round(self.retry_after(health.host), 1),
+                "last_error": health.last_error,
+                "last_failure_at": health.last_failure_at,
+                "last_success_at": health.last_success_at
+            })
+        return {
+            "total": len(hosts),
+            "open": sum(1 for h in hosts if h["state"] == STATE_OPEN),
+            "hosts": hosts
+        }
@@ -1,21 +1,97 @@
 import asyncio
+import contextvars
 import paramiko
-import re
 import json
-from typing import List, Dict, Any, Optional
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
 import subprocess
 import platform
 
 from .models import (
     InspectionResult, SystemInfo, CPUInfo, MemoryInfo, 
-    DiskInfo, NetworkInfo, NetworkInterface, ProcessInfo, ServiceInfo
+    DiskInfo, NetworkInfo, NetworkInterface, ProcessInfo, ServiceInfo,
+    JumpHostInfo
+)
+from .health import HostHealthTracker
+from .concurrency import AdaptiveConcurrencyLimiter
+from .bastion import BastionPool, BastionError
+from .executor import run_command
+from .parsers import (
+    parse_size, parse_ip_addr, speed_command, parse_speeds, parse_bonding,
+    parse_route_line, parse_df, parse_ps, parse_systemctl, enabled_command, mark_enabled
+)
+from .static_sections import (
+    STATIC_SECTIONS, StaticContext, StaticSectionCache,
+    build_script, parse_script_output, sections_for_checks
+)
+
+# 当前巡检任务的截止时间（time.monotonic），命令重试时据此判断是否还有时间
+_inspection_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "inspection_deadline", default=None
+)
+
+# 变更采集模式下本次巡检预取的静态段
+_static_context: contextvars.ContextVar[Optional[StaticContext]] = contextvars.ContextVar(
+    "static_context", default=None
 )
 
+# 当前巡检项执行命令时的附加提示（如输出被截断），巡检项结束后写入结果的errors
+_check_notes: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar(
+    "check_notes", default=None
+)
+
+# 可重试的瞬时错误
+TRANSIENT_ERRORS = (socket.timeout, paramiko.SSHException, EOFError, ConnectionResetError)
+
+# 建立连接（含握手）时视为拥塞信号的错误，会触发并发数乘性减少；
+# 命令执行超时只说明该命令慢，不计入拥塞
+CONGESTION_ERRORS = (socket.timeout, TimeoutError, ConnectionResetError, paramiko.SSHException)
+
 class ServerInspector:
     def __init__(self):
         self.ssh_timeout = 30
         self.command_timeout = 10
+        # 单条命令每个输出流保留的最大字节数
+        self.max_output_bytes = 4 * 1024 * 1024
+        # 单台服务器巡检的总时限（秒）
+        self.inspection_deadline = 120
+        # 连接与命令的重试次数及退避基数（秒）
+        self.connect_retries = 1
+        self.command_retries = 2
+        self.retry_backoff = 0.5
+        self.health = HostHealthTracker()
+        self.limiter = AdaptiveConcurrencyLimiter()
+        self.bastions = BastionPool()
+        # 静态段缓存；change_only为默认是否只采集发生变化的静态段
+        self.static_cache = StaticSectionCache()
+        self.change_only = False
+        # paramiko为阻塞调用，放到线程池中执行，线程数与并发上限一致
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.limiter.max_limit,
+            thread_name_prefix="inspector"
+        )
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """在线程池中执行阻塞调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    def _remaining_time(self) -> Optional[float]:
+        """当前巡检剩余的可用时间，未设置截止时间时返回None"""
+        deadline = _inspection_deadline.get()
+        if deadline is None:
+            return None
+        return deadline - time.monotonic()
+
+    def _can_retry(self, attempt: int, max_retries: int, delay: float, needed: float) -> bool:
+        """判断是否还能在截止时间前完成一次重试"""
+        if attempt > max_retries:
+            return False
+        remaining = self._remaining_time()
+        return remaining is None or remaining > delay + needed
 
     async def inspect_server(
         self,
@@ -24,48 +100,111 @@ class ServerInspector:
         password: Optional[str] = None,
         key_path: Optional[str] = None,
         port: int = 22,
-        checks: List[str] = None
+        checks: List[str] = None,
+        jump_host: Optional[JumpHostInfo] = None,
+        change_only: Optional[bool] = None
     ) -> InspectionResult:
-        """巡检单台服务器"""
+        """巡检单台服务器
+
+        change_only为True时，静态段（系统版本、内核、网卡地址、路由表等）先由远端计算哈希，
+        只有与上次不同的段才会传回并重新解析。
+        """
         if checks is None:
             checks = ["system", "cpu", "memory", "disk", "network"]
+        if change_only is None:
+            change_only = self.change_only
+        if isinstance(jump_host, dict):
+            jump_host = JumpHostInfo(**jump_host)
 
         result = InspectionResult(
             host=host,
             timestamp=datetime.now()
         )
 
+        # 跳板机熔断时，其后的所有主机都直接跳过；先于主机检查，避免占住主机的半开探测名额
+        bastion_key = f"bastion:{jump_host.username}@{jump_host.host}:{jump_host.port}" if jump_host else None
+        if bastion_key and not self.health.allow(bastion_key):
+            result.errors.append(
+                f"跳板机 {jump_host.host} 连续连接失败，已暂停巡检，{self.health.retry_after(bastion_key):.0f}秒后重试"
+            )
+            return result
+
+        # 熔断期间直接跳过，不再占用连接资源
+        if not self.health.allow(host):
+            if bastion_key:
+                self.health.release(bastion_key)
+            result.errors.append(
+                f"主机连续巡检失败，已暂停巡检，{self.health.retry_after(host):.0f}秒后重试"
+            )
+            return result
+
+        # 尚未记录成功或失败的熔断器，退出（包括被取消）时交还半开探测名额
+        unsettled = {host, bastion_key} - {None}
         try:
-            # 建立SSH连接
-            ssh_client = await self._connect_ssh(host, username, password, key_path, port)
-            
-            # 执行巡检
-            if "system" in checks:
-                result.system = await self._get_system_info(ssh_client)
-            
-            if "cpu" in checks:
-                result.cpu = await self._get_cpu_info(ssh_client)
-            
-            if "memory" in checks:
-                result.memory = await self._get_memory_info(ssh_client)
-            
-            if "disk" in checks:
-                result.disks = await self._get_disk_info(ssh_client)
-            
-            if "network" in checks:
-                result.network = await self._get_network_info(ssh_client)
-            
-            if "process" in checks:
-                result.processes = await self._get_process_info(ssh_client)
-            
-            if "service" in checks:
-                result.services = await self._get_service_info(ssh_client)
-            
-            ssh_client.close()
-            
-        except Exception as e:
-            result.errors.append(str(e))
-        
+            await self.limiter.acquire()
+            token = _inspection_deadline.set(time.monotonic() + self.inspection_deadline)
+            try:
+                # 建立SSH连接
+                try:
+                    ssh_client = await self._connect_ssh(host, username, password, key_path, port, jump_host)
+                except BastionError as e:
+                    self.health.record_failure(bastion_key, str(e))
+                    unsettled.discard(bastion_key)
+                    result.errors.append(str(e))
+                    return result
+                except Exception as e:
+                    if bastion_key:
+                        self.health.record_success(bastion_key)
+                    self.health.record_failure(host, str(e))
+                    unsettled.clear()
+                    result.errors.append(str(e))
+                    return result
+                if bastion_key:
+                    self.health.record_success(bastion_key)
+                self.health.record_success(host)
+                unsettled.clear()
+
+                static_token = None
+                if change_only:
+                    static_token = _static_context.set(
+                        await self._collect_static_sections(ssh_client, f"{host}:{port}", sections_for_checks(checks))
+                    )
+
+                # 执行巡检，单项失败不影响其余巡检项
+                collectors = [
+                    ("system", "system", self._get_system_info),
+                    ("cpu", "cpu", self._get_cpu_info),
+                    ("memory", "memory", self._get_memory_info),
+                    ("disk", "disks", self._get_disk_info),
+                    ("network", "network", self._get_network_info),
+                    ("process", "processes", self._get_process_info),
+                    ("service", "services", self._get_service_info),
+                ]
+                try:
+                    for check, field, collector in collectors:
+                        if check not in checks:
+                            continue
+                        notes = []
+                        notes_token = _check_notes.set(notes)
+                        try:
+                            setattr(result, field, await collector(ssh_client))
+                        except Exception as e:
+                            result.errors.append(f"{check}: {str(e)}")
+                        finally:
+                            _check_notes.reset(notes_token)
+                        result.errors.extend(f"{check}: {note}" for note in notes)
+                finally:
+                    ssh_client.close()
+                    if static_token is not None:
+                        _static_context.reset(static_token)
+                self.limiter.record_success()
+            finally:
+                _inspection_deadline.reset(token)
+                self.limiter.release()
+        finally:
+            for key in unsettled:
+                self.health.release(key)
+
         return result
 
     async def _connect_ssh(
@@ -74,66 +213,189 @@ class ServerInspector:
         username: str,
         password: Optional[str] = None,
         key_path: Optional[str] = None,
-        port: int = 22
+        port: int = 22,
+        jump_host: Optional[JumpHostInfo] = None
     ) -> paramiko.SSHClient:
-        """建立SSH连接"""
-        ssh_client = paramiko.SSHClient()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        
-        try:
-            if key_path:
-                private_key = paramiko.RSAKey.from_private_key_file(key_path)
-                ssh_client.connect(
-                    hostname=host,
-                    port=port,
-                    username=username,
-                    pkey=private_key,
-                    timeout=self.ssh_timeout
-                )
-            else:
-                ssh_client.connect(
-                    hostname=host,
-                    port=port,
-                    username=username,
-                    password=password,
-                    timeout=self.ssh_timeout
+        """建立SSH连接，指定跳板机时通过跳板机的direct-tcpip通道连接"""
+        attempt = 0
+        while True:
+            ssh_client = paramiko.SSHClient()
+            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            timeout = self.ssh_timeout
+            remaining = self._remaining_time()
+            if remaining is not None:
+                timeout = max(1, min(timeout, remaining))
+
+            started = time.monotonic()
+            try:
+                sock = None
+                if jump_host:
+                    sock = await self._run_blocking(
+                        self.bastions.open_channel, jump_host, host, port, timeout
+                    )
+                if key_path:
+                    private_key = paramiko.RSAKey.from_private_key_file(key_path)
+                    await self._run_blocking(
+                        ssh_client.connect,
+                        hostname=host,
+                        port=port,
+                        username=username,
+                        pkey=private_key,
+                        timeout=timeout,
+                        sock=sock
+                    )
+                else:
+                    await self._run_blocking(
+                        ssh_client.connect,
+                        hostname=host,
+                        port=port,
+                        username=username,
+                        password=password,
+                        timeout=timeout,
+                        sock=sock
+                    )
+                self.limiter.record_latency("connect", time.monotonic() - started)
+                return ssh_client
+            except BastionError:
+                ssh_client.close()
+                raise
+            except paramiko.AuthenticationException as e:
+                # 认证失败重试无意义
+                ssh_client.close()
+                raise Exception(f"SSH连接失败: {str(e)}")
+            except Exception as e:
+                ssh_client.close()
+                if isinstance(e, CONGESTION_ERRORS):
+                    self.limiter.record_congestion()
+                attempt += 1
+                delay = self.retry_backoff * (2 ** attempt)
+                if not self._can_retry(attempt, self.connect_retries, delay, self.ssh_timeout):
+                    raise Exception(f"SSH连接失败: {str(e)}")
+                await asyncio.sleep(delay)
+
+    async def _execute_command(
+        self,
+        ssh_client: paramiko.SSHClient,
+        command: str,
+        on_line: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """执行SSH命令，以退出码判断成败，瞬时错误在截止时间内按指数退避重试
+
+        指定on_line时stdout逐行交给回调解析（适用于超大输出），返回空字符串；
+        此时已有输出交给回调，不再重试。
+        """
+        attempt = 0
+        max_retries = self.command_retries if on_line is None else 0
+        while True:
+            timeout = self.command_timeout
+            remaining = self._remaining_time()
+            if remaining is not None:
+                if remaining <= 0:
+                    raise Exception("命令执行失败: 已超过巡检时限")
+                timeout = min(timeout, remaining)
+
+            try:
+                result = await self._run_blocking(
+                    run_command, ssh_client, command, timeout, self.max_output_bytes, on_line
                 )
-            return ssh_client
-        except Exception as e:
-            raise Exception(f"SSH连接失败: {str(e)}")
+                self.limiter.record_latency("command", result.duration)
+            except TRANSIENT_ERRORS as e:
+                transport = ssh_client.get_transport()
+                attempt += 1
+                delay = self.retry_backoff * (2 ** (attempt - 1))
+                if (transport is None or not transport.is_active()
+                        or not self._can_retry(attempt, max_retries, delay, self.command_timeout)):
+                    raise Exception(f"命令执行失败: {str(e)}")
+                await asyncio.sleep(delay)
+                continue
+            except Exception as e:
+                raise Exception(f"命令执行失败: {str(e)}")
+
+            if not result.ok:
+                error = result.stderr.strip() or f"退出码 {result.exit_status}"
+                raise Exception(f"命令执行失败: 命令执行错误: {error}")
+
+            if result.stdout_truncated:
+                notes = _check_notes.get()
+                if notes is not None:
+                    notes.append(f"输出超过{self.max_output_bytes}字节已截断，结果可能不完整: {command}")
 
-    async def _execute_command(self, ssh_client: paramiko.SSHClient, command: str) -> str:
-        """执行SSH命令"""
+            return result.stdout.strip()
+
+    async def _collect_static_sections(
+        self,
+        ssh_client: paramiko.SSHClient,
+        key: str,
+        names: List[str]
+    ) -> StaticContext:
+        """一次往返取回所有静态段的哈希，未变化的段直接使用缓存，变化的段重新解析
+
+        缓存按 host:port 区分。预取失败时返回空的上下文，各采集函数按常规方式执行命令。
+        """
+        context = StaticContext(key)
+        if not names:
+            return context
+        known = {name: self.static_cache.digest(key, name) for name in names}
         try:
-            stdin, stdout, stderr = ssh_client.exec_command(command, timeout=self.command_timeout)
-            output = stdout.read().decode('utf-8').strip()
-            error = stderr.read().decode('utf-8').strip()
-            
-            if error:
-                raise Exception(f"命令执行错误: {error}")
-            
-            return output
-        except Exception as e:
-            raise Exception(f"命令执行失败: {str(e)}")
+            output = await self._execute_command(ssh_client, build_script(known))
+        except Exception:
+            return context
 
-    async def _get_system_info(self, ssh_client: paramiko.SSHClient) -> SystemInfo:
-        """获取系统信息"""
-        # 获取OS信息
-        os_info = await self._execute_command(ssh_client, "cat /etc/os-release")
+        for name, (digest, changed, content) in parse_script_output(output).items():
+            if not changed:
+                entry = self.static_cache.get(key, name)
+                if entry is not None:
+                    context.values[name] = entry[1]
+                continue
+            if content is None:
+                # 只比较哈希的段，由采集函数重新采集后写入缓存
+                context.pending[name] = digest
+                continue
+            try:
+                value = self._parse_static(name, content.strip())
+            except Exception:
+                continue
+            self.static_cache.set(key, name, digest, value)
+            context.values[name] = value
+        return context
+
+    async def _static_section(self, ssh_client: paramiko.SSHClient, name: str) -> Any:
+        """取静态段的解析结果，已预取时不再执行命令"""
+        context = _static_context.get()
+        if context is not None and name in context.values:
+            return context.values[name]
+        output = await self._execute_command(ssh_client, STATIC_SECTIONS[name][0])
+        return self._parse_static(name, output)
+
+    def _parse_static(self, name: str, text: str) -> Any:
+        """解析静态段输出，结果需可JSON序列化以便持久化缓存"""
+        if name == "os_release":
+            return self._parse_os_release(text)
+        if name == "ip_addr":
+            return parse_ip_addr(text)
+        return text.strip()
+
+    @staticmethod
+    def _parse_os_release(text: str) -> List[str]:
         os_name = ""
         os_version = ""
-        
-        for line in os_info.split('\n'):
+        for line in text.split('\n'):
             if line.startswith('PRETTY_NAME='):
                 os_name = line.split('=', 1)[1].strip('"')
             elif line.startswith('VERSION_ID='):
                 os_version = line.split('=', 1)[1].strip('"')
+        return [os_name, os_version]
+
+    async def _get_system_info(self, ssh_client: paramiko.SSHClient) -> SystemInfo:
+        """获取系统信息"""
+        # 获取OS信息
+        os_name, os_version = await self._static_section(ssh_client, "os_release")
         
         # 获取内核版本
-        kernel_version = await self._execute_command(ssh_client, "uname -r")
+        kernel_version = await self._static_section(ssh_client, "kernel")
         
         # 获取主机名
-        hostname = await self._execute_command(ssh_client, "hostname")
+        hostname = await self._static_section(ssh_client, "hostname")
         
         # 获取运行时间
         uptime = await self._execute_command(ssh_client, "uptime -p")
@@ -164,10 +426,7 @@ class ServerInspector:
         load_average = [float(x) for x in load_avg.split()[:3]]
         
         # CPU型号
-        cpu_model = (await self._execute_command(
-            ssh_client,
-            "cat /proc/cpuinfo | grep 'model name' | head -1 | cut -d':' -f2"
-        )).strip()
+        cpu_model = await self._static_section(ssh_client, "cpu_model")
         
         return CPUInfo(
             cpu_count=cpu_count,
@@ -208,227 +467,73 @@ class ServerInspector:
         )
 
     async def _get_disk_info(self, ssh_client: paramiko.SSHClient) -> List[DiskInfo]:
-        """获取磁盘信息"""
-        # 获取磁盘使用情况
-        df_output = await self._execute_command(ssh_client, "df -h")
-        lines = df_output.split('\n')[1:]  # 跳过标题行
-        
-        disks = []
-        for line in lines:
-            if line.strip():
-                parts = line.split()
-                if len(parts) >= 6:
-                    device = parts[0]
-                    mountpoint = parts[5]
-                    
-                    # 跳过特殊/临时/系统挂载点
-                    skip_mountpoints = set([
-                        '/dev', '/proc', '/sys', '/run', '/dev/shm', '/sys/fs/cgroup', '/var/run', '/tmp'
-                    ])
-                    if mountpoint in skip_mountpoints or mountpoint.startswith('/run/') or mountpoint.startswith('/run/user/'):
-                        continue
-                    
-                    # 获取文件系统类型
-                    fs_type = await self._execute_command(ssh_client, f"df -T {mountpoint} | tail -1 | awk '{{print $2}}'")
-
-                    # 过滤 tmpfs/devtmpfs 等临时文件系统
-                    if fs_type in ['tmpfs', 'devtmpfs', 'overlay', 'squashfs']:
-                        continue
-                    
-                    # 解析大小信息
-                    total_str = parts[1]
-                    used_str = parts[2]
-                    available_str = parts[3]
-                    usage_percent = float(parts[4].rstrip('%'))
-                    
-                    # 转换为字节
-                    total = self._parse_size(total_str)
-                    used = self._parse_size(used_str)
-                    free = self._parse_size(available_str)
-                    
-                    # 判断磁盘类型，仅保留根盘和常见数据盘挂载
-                    if mountpoint == "/":
-                        disk_type = "root"
-                    elif mountpoint.startswith('/data') or mountpoint.startswith('/storage'):
-                        disk_type = "data"
-                    else:
-                        disk_type = "other"
-
-                    # 仅保留 root/data
-                    if disk_type not in ["root", "data"]:
-                        continue
-                    
-                    disks.append(DiskInfo(
-                        device=device,
-                        mountpoint=mountpoint,
-                        filesystem=fs_type,
-                        total=total,
-                        used=used,
-                        free=free,
-                        usage_percent=usage_percent,
-                        disk_type=disk_type
-                    ))
-        
-        return disks
+        """获取磁盘信息（根盘与数据盘）"""
+        # 一条命令同时取得大小与文件系统类型
+        df_output = await self._execute_command(ssh_client, "df -hT")
+        return [DiskInfo(**disk) for disk in parse_df(df_output)]
 
     def _parse_size(self, size_str: str) -> int:
         """解析大小字符串为字节数"""
-        size_str = size_str.upper()
-        if 'T' in size_str:
-            return int(float(size_str.replace('T', '')) * 1024**4)
-        elif 'G' in size_str:
-            return int(float(size_str.replace('G', '')) * 1024**3)
-        elif 'M' in size_str:
-            return int(float(size_str.replace('M', '')) * 1024**2)
-        elif 'K' in size_str:
-            return int(float(size_str.replace('K', '')) * 1024)
-        else:
-            return int(size_str)
+        return parse_size(size_str)
+
+    async def _read_speeds(self, ssh_client: paramiko.SSHClient, interfaces: List[Dict[str, Any]]):
+        """各网卡速率用一条命令批量读取，读取失败时速率为空
+
+        速率随协商变化，不属于静态段，每次巡检都实时读取。
+        """
+        for interface in interfaces:
+            interface["speed"] = None
+        if not interfaces:
+            return
+        try:
+            speeds = parse_speeds(await self._execute_command(
+                ssh_client, speed_command(interface["name"] for interface in interfaces)
+            ))
+        except Exception:
+            return
+        for interface in interfaces:
+            interface["speed"] = speeds.get(interface["name"])
 
     async def _get_network_info(self, ssh_client: paramiko.SSHClient) -> NetworkInfo:
         """获取网络信息"""
-        interfaces = []
         bonds = []
-        vips = []
         
-        # 获取网络接口信息
-        ip_output = await self._execute_command(ssh_client, "ip addr show")
-        lines = [l.rstrip() for l in ip_output.split('\n')]
-
-        current_header = None
-        current_block_lines = []
-
-        async def flush_block():
-            nonlocal current_header, current_block_lines
-            if not current_header:
-                return
-            header = current_header
-            lines_block = current_block_lines
-
-            # 解析接口名称与状态
-            try:
-                header_parts = header.split(':', 2)
-                interface_name = header_parts[1].strip()
-            except Exception:
-                interface_name = header.split()[1].rstrip(':') if len(header.split()) > 1 else 'unknown'
-
-            if interface_name == 'lo':
-                current_header = None
-                current_block_lines = []
-                return
-
-            ip_address = ""
-            netmask = ""
-            mac_address = ""
-            status = "UP" if (' state UP ' in header or header.strip().endswith('state UP')) else "DOWN"
-
-            for line in lines_block:
-                s = line.strip()
-                if s.startswith('link/ether'):
-                    parts = s.split()
-                    if len(parts) >= 2:
-                        mac_address = parts[1]
-                elif s.startswith('inet '):
-                    ip_info = s.split()[1]
-                    if '/' in ip_info:
-                        ip_address, netmask = ip_info.split('/', 1)
-
-            interface_type = "physical"
-            if interface_name.startswith('bond'):
-                interface_type = "bond"
-            elif interface_name.startswith('veth') or interface_name.startswith('docker'):
-                interface_type = "virtual"
-
-            speed = None
-            try:
-                speed_cmd = f"cat /sys/class/net/{interface_name}/speed 2>/dev/null || echo 'Unknown'"
-                speed_val = await self._execute_command(ssh_client, speed_cmd)
-                if speed_val and speed_val != "Unknown":
-                    speed = speed_val
-            except:
-                pass
-
-            interfaces.append(NetworkInterface(
-                name=interface_name,
-                ip_address=ip_address,
-                netmask=netmask,
-                mac_address=mac_address,
-                interface_type=interface_type,
-                status=status,
-                speed=speed
-            ))
-
-            current_header = None
-            current_block_lines = []
-
-        for line in lines:
-            if not line:
-                # 空行结束当前块
-                if current_header is not None:
-                    await flush_block()
-                continue
-            if line[0].isdigit() and ':' in line.split(' ', 1)[0]:
-                # 新的接口头部
-                if current_header is not None:
-                    await flush_block()
-                current_header = line
-                current_block_lines = []
-            else:
-                if current_header is not None:
-                    current_block_lines.append(line)
-
-        # 文件结束后冲刷最后一个块
-        if current_header is not None:
-            await flush_block()
+        # 获取网络接口信息与VIP
+        ip_info = await self._static_section(ssh_client, "ip_addr")
+        # 缓存中的解析结果可能被多次巡检共用，复制后再填入速率
+        interface_rows = [dict(interface) for interface in ip_info["interfaces"]]
+        await self._read_speeds(ssh_client, interface_rows)
+        interfaces = [NetworkInterface(**interface) for interface in interface_rows]
+        vips = ip_info["vips"]
         
         # 获取bond信息
         try:
-            bond_info = await self._execute_command(ssh_client, "cat /proc/net/bonding/bond* 2>/dev/null || echo ''")
-            if bond_info and bond_info != '':
-                # 解析bond信息
-                bond_blocks = bond_info.split('\n\n')
-                for block in bond_blocks:
-                    if 'Bonding Mode' in block:
-                        bond_name = block.split('\n')[0].split(':')[0]
-                        mode_match = re.search(r'Bonding Mode: (\d+)', block)
-                        mode = mode_match.group(1) if mode_match else "Unknown"
-                        bonds.append({
-                            "name": bond_name,
-                            "mode": mode,
-                            "status": "Active" if "Currently Active Slave" in block else "Inactive"
-                        })
-        except:
-            pass
-        
-        # 获取VIP信息
-        try:
-            # 检查keepalived
-            keepalived_vips = await self._execute_command(ssh_client, "ip addr show | grep -E 'inet.*secondary' | awk '{print $2}'")
-            for vip in keepalived_vips.split('\n'):
-                if vip.strip():
-                    vips.append({
-                        "ip": vip.split('/')[0],
-                        "type": "keepalived",
-                        "interface": "secondary"
-                    })
+            bonds = parse_bonding(
+                await self._execute_command(ssh_client, "cat /proc/net/bonding/bond* 2>/dev/null || echo ''")
+            )
         except:
             pass
         
-        # 获取路由表
+        # 获取路由表（逐行解析，大型路由表无需整体缓存）
         routing_table = []
-        try:
-            route_output = await self._execute_command(ssh_client, "ip route show")
-            for line in route_output.split('\n'):
-                if line.strip():
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        routing_table.append({
-                            "destination": parts[0],
-                            "gateway": parts[2] if len(parts) > 2 else "",
-                            "interface": parts[-1] if len(parts) > 2 else ""
-                        })
-        except:
-            pass
+
+        def parse_route(line: str):
+            route = parse_route_line(line)
+            if route is not None:
+                routing_table.append(route)
+
+        context = _static_context.get()
+        if context is not None and "ip_route" in context.values:
+            routing_table = context.values["ip_route"]
+        else:
+            try:
+                await self._execute_command(ssh_client, "ip route show", on_line=parse_route)
+                if context is not None and "ip_route" in context.pending:
+                    self.static_cache.set(
+                        context.key, "ip_route", context.pending["ip_route"], routing_table
+                    )
+            except:
+                pass
         
         return NetworkInfo(
             interfaces=interfaces,
@@ -439,57 +544,28 @@ class ServerInspector:
 
     async def _get_process_info(self, ssh_client: paramiko.SSHClient) -> List[ProcessInfo]:
         """获取进程信息"""
-        processes = []
-        
         try:
             # 获取top进程信息
             ps_output = await self._execute_command(ssh_client, "ps aux --sort=-%cpu | head -20")
-            lines = ps_output.split('\n')[1:]  # 跳过标题行
-            
-            for line in lines:
-                if line.strip():
-                    parts = line.split(None, 10)
-                    if len(parts) >= 11:
-                        processes.append(ProcessInfo(
-                            pid=int(parts[1]),
-                            name=parts[10][:50],  # 限制命令长度
-                            cpu_percent=float(parts[2]),
-                            memory_percent=float(parts[3]),
-                            status=parts[7],
-                            command=parts[10]
-                        ))
         except:
-            pass
-        
-        return processes
+            return []
+        return [ProcessInfo(**process) for process in parse_ps(ps_output)]
 
     async def _get_service_info(self, ssh_client: paramiko.SSHClient) -> List[ServiceInfo]:
         """获取服务信息"""
-        services = []
-        
         try:
             # 检查systemd服务
             systemctl_output = await self._execute_command(ssh_client, "systemctl list-units --type=service --state=running | head -20")
-            lines = systemctl_output.split('\n')[1:]  # 跳过标题行
-            
-            for line in lines:
-                if line.strip() and not line.startswith('UNIT'):
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        service_name = parts[0]
-                        status = parts[2]
-                        
-                        # 检查服务是否启用
-                        enabled_output = await self._execute_command(ssh_client, f"systemctl is-enabled {service_name} 2>/dev/null || echo 'unknown'")
-                        enabled = enabled_output.strip() == "enabled"
-                        
-                        services.append(ServiceInfo(
-                            name=service_name,
-                            status=status,
-                            enabled=enabled,
-                            description=" ".join(parts[3:]) if len(parts) > 3 else ""
-                        ))
+        except:
+            return []
+        units = parse_systemctl(systemctl_output)
+        if not units:
+            return []
+        # 各服务是否开机启动用一条命令批量查询，失败时按未启用处理
+        try:
+            mark_enabled(units, await self._execute_command(
+                ssh_client, enabled_command(unit["name"] for unit in units)
+            ))
         except:
             pass
-        
-        return services
+        return [ServiceInfo(**unit) for unit in units]
@@ -0,0 +1,429 @@
+import csv
+import fnmatch
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Any, Set, Iterator, Tuple
+
+# 主机条目中的保留字段，其余字段都作为属性建立索引
+RESERVED_FIELDS = {"host", "port", "username", "password", "key_path", "jump", "jump_host", "group", "tags"}
+
+# 选择器中的特殊键
+SELECTOR_HOST = "host"
+SELECTOR_GROUP = "group"
+SELECTOR_TAG = "tag"
+
+FORMATS = {
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+def parse_host_spec(spec: str) -> Optional[Dict[str, Any]]:
+    """解析单条主机定义，格式: host:port:username:password_or_key_path
+
+    IPv6地址写在方括号中，如 [fe80::1]:22:root:password；密码中可以包含冒号。
+    """
+    spec = spec.strip()
+    if spec.startswith('['):
+        end = spec.find(']')
+        if end < 0:
+            return None
+        host = spec[1:end]
+        rest = spec[end + 1:]
+        if rest and not rest.startswith(':'):
+            return None
+        parts = [host] + (rest[1:].split(':', 2) if rest else [])
+    else:
+        parts = spec.split(':', 3)
+    if len(parts) < 2 or not parts[0] or not parts[1].isdigit():
+        return None
+
+    server = {
+        'host': parts[0],
+        'port': int(parts[1]),
+        'username': parts[2] if len(parts) > 2 and parts[2] else 'root'
+    }
+
+    # 处理密码或密钥路径
+    if len(parts) > 3 and parts[3]:
+        if parts[3].startswith('/'):
+            server['key_path'] = parts[3]
+        else:
+            server['password'] = parts[3]
+
+    return server
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _split_tags(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [t for t in value.replace(';', ',').replace(' ', ',').split(',') if t]
+    return [str(t) for t in value]
+
+
+class HostEntry:
+    """清单中的一台主机"""
+    __slots__ = ("host", "port", "username", "password", "key_path", "jump_host", "group", "tags", "attrs")
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 22,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        key_path: Optional[str] = None,
+        jump_host: Optional[Dict[str, Any]] = None,
+        group: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        attrs: Optional[Dict[str, Any]] = None
+    ):
+        self.host = host
+        self.port = int(port)
+        self.username = _intern(username)
+        self.password = password
+        self.key_path = _intern(key_path)
+        self.jump_host = jump_host
+        self.group = _intern(group)
+        self.tags = frozenset(_intern(t) for t in tags or [])
+        self.attrs = {_intern(k): _intern(v) for k, v in (attrs or {}).items()}
+
+    @property
+    def key(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None) -> "HostEntry":
+        """由字典构造，未指定（或为空）的字段取defaults中的值"""
+        data = {k: v for k, v in data.items() if v not in (None, "")}
+        if defaults:
+            data = {**defaults, **data}
+        if not data.get("host"):
+            raise ValueError("缺少host字段")
+        port = data.get("port", 22)
+        if not str(port).isdigit():
+            raise ValueError(f"端口无效: {port}")
+
+        jump_host = data.get("jump_host") or data.get("jump")
+        if isinstance(jump_host, str):
+            spec = jump_host
+            jump_host = parse_host_spec(spec)
+            if jump_host is None:
+                raise ValueError(f"跳板机格式错误: {spec}")
+
+        return cls(
+            host=str(data["host"]),
+            port=int(port),
+            username=data.get("username"),
+            password=data.get("password"),
+            key_path=data.get("key_path"),
+            jump_host=jump_host,
+            group=data.get("group"),
+            tags=_split_tags(data.get("tags")),
+            attrs={k: v for k, v in data.items() if k not in RESERVED_FIELDS}
+        )
+
+    def to_server(self) -> Dict[str, Any]:
+        """转为巡检使用的服务器字典，只包含已设置的字段"""
+        server: Dict[str, Any] = {"host": self.host, "port": self.port}
+        for name in ("username", "password", "key_path", "jump_host", "group"):
+            value = getattr(self, name)
+            if value is not None:
+                server[name] = value
+        return server
+
+    def describe(self) -> Dict[str, Any]:
+        """对外展示的信息，不含密码"""
+        return {
+            "host": self.host,
+            "port": self.port,
+            "username": self.username,
+            "group": self.group,
+            "tags": sorted(self.tags),
+            "attrs": self.attrs,
+            "jump_host": self.jump_host["host"] if self.jump_host else None,
+        }
+
+
+class Inventory:
+    """主机清单：流式加载YAML/CSV/JSON Lines/主机文件，按分组、标签和属性建立索引
+
+    选择器为逗号分隔的条件，条件之间为与关系，如 group=db,dc=sh,tag=primary；
+    值中用 | 分隔多个候选值（或关系），!= 表示排除，host 条件支持通配符。
+    """
+
+    def __init__(self):
+        self.hosts: Dict[str, HostEntry] = {}
+        self.path: Optional[str] = None
+        self.format: Optional[str] = None
+        self.errors: List[str] = []
+        self._mtime: Optional[float] = None
+        self._order: Dict[str, int] = {}
+        self._seq = 0
+        self._by_host: Dict[str, Set[str]] = {}
+        self._by_group: Dict[str, Set[str]] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._by_attr: Dict[Tuple[str, str], Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.hosts)
+
+    # ---- 增删与索引 ----
+
+    def add(self, entry: HostEntry):
+        """添加主机，相同 host:port 的条目以后添加的为准"""
+        key = entry.key
+        if key in self.hosts:
+            self.remove(key)
+        self.hosts[key] = entry
+        self._order[key] = self._seq
+        self._seq += 1
+        self._by_host.setdefault(entry.host, set()).add(key)
+        if entry.group is not None:
+            self._by_group.setdefault(entry.group, set()).add(key)
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        for name, value in entry.attrs.items():
+            self._by_attr.setdefault((name, str(value)), set()).add(key)
+
+    def remove(self, key: str):
+        entry = self.hosts.pop(key, None)
+        if entry is None:
+            return
+        del self._order[key]
+        self._discard(self._by_host, entry.host, key)
+        if entry.group is not None:
+            self._discard(self._by_group, entry.group, key)
+        for tag in entry.tags:
+            self._discard(self._by_tag, tag, key)
+        for name, value in entry.attrs.items():
+            self._discard(self._by_attr, (name, str(value)), key)
+
+    @staticmethod
+    def _discard(index: Dict, value, key: str):
+        keys = index.get(value)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[value]
+
+    # ---- 加载 ----
+
+    def load(self, path: str, fmt: Optional[str] = None) -> int:
+        """加载清单文件，返回加载的主机数；格式错误的条目跳过并记录在errors中"""
+        count = 0
+        for entry in self.iter_file(path, fmt):
+            self.add(entry)
+            count += 1
+        self.path = path
+        self.format = fmt
+        self._mtime = os.path.getmtime(path)
+        return count
+
+    def refresh(self) -> bool:
+        """清单文件有变化时重新加载，新清单加载完成后才替换，加载期间查询不受影响"""
+        if self.path is None:
+            return False
+        try:
+            if os.path.getmtime(self.path) == self._mtime:
+                return False
+        except OSError:
+            return False
+        fresh = Inventory()
+        fresh.load(self.path, self.format)
+        self.__dict__.update(fresh.__dict__)
+        return True
+
+    def iter_file(self, path: str, fmt: Optional[str] = None) -> Iterator[HostEntry]:
+        """逐条读取清单文件，不把整个文件解析到内存"""
+        if fmt is None:
+            fmt = FORMATS.get(os.path.splitext(path)[1].lower(), "hosts")
+        readers = {
+            "yaml": self._iter_yaml,
+            "csv": self._iter_csv,
+            "jsonl": self._iter_jsonl,
+            "hosts": self._iter_hosts,
+        }
+        if fmt not in readers:
+            raise ValueError(f"不支持的清单格式: {fmt}")
+        return readers[fmt](path)
+
+    def _entry(self, data: Dict[str, Any], where: str, defaults: Optional[Dict[str, Any]] = None):
+        try:
+            return HostEntry.from_dict(data, defaults)
+        except Exception as e:
+            self.errors.append(f"{where}: {str(e)}")
+            return None
+
+    def _iter_jsonl(self, path: str) -> Iterator[HostEntry]:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError as e:
+                    self.errors.append(f"第{line_num}行: {str(e)}")
+                    continue
+                entry = self._entry(data, f"第{line_num}行")
+                if entry is not None:
+                    yield entry
+
+    def _iter_csv(self, path: str) -> Iterator[HostEntry]:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for line_num, row in enumerate(csv.DictReader(f), 2):
+                if row.get("host", "").startswith('#'):
+                    continue
+                entry = self._entry(row, f"第{line_num}行")
+                if entry is not None:
+                    yield entry
+
+    def _iter_yaml(self, path: str) -> Iterator[HostEntry]:
+        """YAML清单：可分为多个文档（---）逐个解析
+
+        每个文档包含 defaults、hosts 以及 groups（分组名 -> {defaults, hosts}），
+        hosts 中的条目可以是字典或 host:port:username:password 字符串。
+        """
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("读取YAML清单需要安装PyYAML: pip install PyYAML")
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for doc_num, document in enumerate(yaml.load_all(f, Loader=loader), 1):
+                if not document:
+                    continue
+                defaults = document.get("defaults") or {}
+                sections = [(None, defaults, document.get("hosts") or [])]
+                for group, body in (document.get("groups") or {}).items():
+                    group_defaults = dict(defaults)
+                    group_defaults.update((body or {}).get("defaults") or {})
+                    group_defaults["group"] = group
+                    sections.append((group, group_defaults, (body or {}).get("hosts") or []))
+
+                for group, section_defaults, hosts in sections:
+                    for index, item in enumerate(hosts, 1):
+                        where = f"文档{doc_num} {group or 'hosts'} 第{index}项"
+                        if isinstance(item, str):
+                            item = parse_host_spec(item) or {"host": None}
+                        entry = self._entry(item, where, section_defaults)
+                        if entry is not None:
+                            yield entry
+
+    def _iter_hosts(self, path: str) -> Iterator[HostEntry]:
+        """原有的主机文件格式: host:port:username:password_or_key_path
+
+        通过 jump= 指令为其后的一组主机指定跳板机，jump= 为空时恢复直连；
+        同样可用 group= 与 tags= 指令为其后的主机指定分组和标签。
+        """
+        directives: Dict[str, Any] = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+
+                name, sep, value = line.partition('=')
+                if sep and name in ("jump", "group", "tags"):
+                    value = value.strip()
+                    if not value:
+                        directives.pop(name, None)
+                    elif name == "jump":
+                        jump_host = parse_host_spec(value)
+                        if jump_host is None:
+                            self.errors.append(f"第{line_num}行: 跳板机格式错误: {value}")
+                            directives.pop(name, None)
+                        else:
+                            directives[name] = jump_host
+                    else:
+                        directives[name] = value
+                    continue
+
+                server = parse_host_spec(line)
+                if server is None:
+                    self.errors.append(f"第{line_num}行格式错误: {line}")
+                    continue
+                server.update(directives)
+                entry = self._entry(server, f"第{line_num}行")
+                if entry is not None:
+                    yield entry
+
+    # ---- 查询 ----
+
+    @staticmethod
+    def parse_selector(selector: Optional[str]) -> List[Tuple[str, bool, List[str]]]:
+        """解析选择器，返回 (键, 是否排除, 候选值) 列表"""
+        conditions = []
+        if not selector or selector.strip() in ("", "*"):
+            return conditions
+        for part in selector.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if '!=' in part:
+                name, value = part.split('!=', 1)
+                negate = True
+            elif '=' in part:
+                name, value = part.split('=', 1)
+                negate = False
+            else:
+                raise ValueError(f"无效的选择条件: {part}")
+            name = name.strip()
+            values = [v.strip() for v in value.split('|') if v.strip()]
+            if not name or not values:
+                raise ValueError(f"无效的选择条件: {part}")
+            conditions.append((name, negate, values))
+        return conditions
+
+    def _matching(self, name: str, values: List[str]) -> Set[str]:
+        """满足 name 取任一候选值的主机集合"""
+        keys: Set[str] = set()
+        for value in values:
+            if name == SELECTOR_GROUP:
+                keys |= self._by_group.get(value, set())
+            elif name in (SELECTOR_TAG, "tags"):
+                keys |= self._by_tag.get(value, set())
+            elif name == SELECTOR_HOST:
+                if any(c in value for c in "*?["):
+                    for host in fnmatch.filter(self._by_host, value):
+                        keys |= self._by_host[host]
+                else:
+                    keys |= self._by_host.get(value, set())
+            else:
+                keys |= self._by_attr.get((name, value), set())
+        return keys
+
+    def select(self, selector: Optional[str] = None) -> List[HostEntry]:
+        """按选择器选出主机，按加载顺序返回"""
+        conditions = self.parse_selector(selector)
+        included = [self._matching(n, v) for n, negate, v in conditions if not negate]
+        excluded = [self._matching(n, v) for n, negate, v in conditions if negate]
+
+        if included:
+            included.sort(key=len)
+            keys = included[0].intersection(*included[1:])
+        else:
+            keys = set(self.hosts)
+        for keys_out in excluded:
+            keys -= keys_out
+        return [self.hosts[k] for k in sorted(keys, key=self._order.__getitem__)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """清单统计"""
+        return {
+            "path": self.path,
+            "total": len(self.hosts),
+            "groups": {g: len(keys) for g, keys in sorted(self._by_group.items())},
+            "tags": {t: len(keys) for t, keys in sorted(self._by_tag.items())},
+            "errors": self.errors[-20:],
+        }
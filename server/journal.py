@@ -0,0 +1,113 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from .models import InspectionResult
+
+
+class CheckpointJournal:
+    """批量巡检的检查点日志（JSON Lines）
+
+    每台主机巡检完成后立即追加一行并落盘，中断后可通过日志跳过已完成的主机。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.checks: Optional[List[str]] = None
+        # key -> 日志记录，后写入的记录覆盖先写入的
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._file = None
+
+    @staticmethod
+    def key(host: str, port: int) -> str:
+        return f"{host}:{port}"
+
+    def load(self):
+        """读取已有日志，文件末尾未写完的行会被忽略"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("type") == "header":
+                    self.checks = entry.get("checks")
+                elif entry.get("type") == "result":
+                    self.entries[entry["key"]] = entry
+
+    def open(self, checks: List[str]):
+        """以追加方式打开日志，新日志写入头部记录巡检项目"""
+        self._truncate_partial_line()
+        is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if is_new:
+            self.checks = checks
+            self._write({
+                "type": "header",
+                "checks": checks,
+                "started_at": datetime.now().isoformat()
+            })
+
+    def _truncate_partial_line(self):
+        """截掉中断时写了一半的末行，避免后续追加的记录与其拼在同一行"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # 向前找到最后一个完整行的结尾
+            end = size
+            while end > 0:
+                start = max(0, end - 4096)
+                f.seek(start)
+                pos = f.read(end - start).rfind(b"\n")
+                if pos >= 0:
+                    f.truncate(start + pos + 1)
+                    return
+                end = start
+            f.truncate(0)
+
+    def is_done(self, host: str, port: int) -> bool:
+        """主机是否已成功巡检（连接失败的主机续跑时会重试）"""
+        entry = self.entries.get(self.key(host, port))
+        return entry is not None and entry.get("status") == "success"
+
+    def completed_results(self) -> List[Any]:
+        """已完成主机的结果"""
+        results = []
+        for entry in self.entries.values():
+            if entry.get("status") != "success":
+                continue
+            results.append(InspectionResult(**entry["result"]))
+        return results
+
+    def record(self, host: str, port: int, status: str, result: Dict[str, Any]):
+        """记录一台主机的巡检结果"""
+        entry = {
+            "type": "result",
+            "key": self.key(host, port),
+            "status": status,
+            "result": result
+        }
+        self.entries[entry["key"]] = entry
+        self._write(entry)
+
+    def _write(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
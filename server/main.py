@@ -1,32 +1,165 @@
 import os
-import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import asyncio
+import gzip
+import hmac
 import json
-from typing import List
+from typing import Dict, List, Optional
+from pydantic import ValidationError
 
 # 修复导入问题
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from server.inspector import ServerInspector
-from server.models import ServerInfo, InspectionRequest, InspectionResult
-from server.websocket_manager import WebSocketManager
+from server.models import ServerInfo, InspectionRequest, InspectionResult, CollectorHeartbeat, CollectorLease
+from server.websocket_manager import WebSocketManager, Message, TOPIC_ALL
+from server.store import ResultStore
+from server.alerts import AlertEngine, load_rules, WebSocketSink, WebhookSink, FileSink, SharedStateSink
+from server.anomaly import AnomalyDetector
+from server.shared import SharedBackend, EVENT_BROADCAST, EVENT_ALERT
+from server.inventory import Inventory
+from server.archive import ArchiveWriter, ArchiveReader
+from server.collectors import CollectorCoordinator
 
 # 全局变量
-websocket_manager = WebSocketManager()
+# WS_FLUSH_INTERVAL：批量协议（protocol 2）连接合并消息的刷新间隔秒数
+websocket_manager = WebSocketManager(flush_interval=float(os.getenv("WS_FLUSH_INTERVAL", 0.05)))
 inspector = ServerInspector()
+result_store = ResultStore()
+
+# 主机清单：INVENTORY_FILE 指定清单文件，巡检请求可用选择器代替完整的服务器列表
+# 每 INVENTORY_REFRESH_INTERVAL 秒检查一次文件修改时间，有变化时在线程池中重新加载；
+# 清单与请求都未给出用户名的主机使用 INVENTORY_DEFAULT_USER
+inventory = Inventory()
+if os.getenv("INVENTORY_FILE"):
+    inventory.load(os.getenv("INVENTORY_FILE"))
+INVENTORY_REFRESH_INTERVAL = float(os.getenv("INVENTORY_REFRESH_INTERVAL", 5))
+INVENTORY_DEFAULT_USER = os.getenv("INVENTORY_DEFAULT_USER")
+
+# 告警引擎：规则文件、Webhook地址和告警日志通过环境变量配置
+alert_engine = AlertEngine(load_rules(os.getenv("ALERT_RULES")), [WebSocketSink(websocket_manager)])
+if os.getenv("ALERT_WEBHOOK_URL"):
+    alert_engine.add_sink(WebhookSink(os.getenv("ALERT_WEBHOOK_URL")))
+if os.getenv("ALERT_LOG_FILE"):
+    alert_engine.add_sink(FileSink(os.getenv("ALERT_LOG_FILE")))
+
+# 基线异常检测：ANOMALY_DETECTION=1 开启，ANOMALY_STATE 指定基线文件（启动时加载、关闭时保存）
+ANOMALY_STATE = os.getenv("ANOMALY_STATE")
+if os.getenv("ANOMALY_DETECTION", "0") == "1" or ANOMALY_STATE:
+    alert_engine.detector = AnomalyDetector()
+    if ANOMALY_STATE:
+        alert_engine.detector.load(ANOMALY_STATE)
+
+# 多worker部署时的共享状态后端（SQLite文件），结果、巡检去重、广播与告警经由它在worker间同步
+shared_backend = SharedBackend(os.getenv("SHARED_STATE_DB")) if os.getenv("SHARED_STATE_DB") else None
+if shared_backend is not None:
+    websocket_manager.relay = lambda message, topics, coalesce_key: shared_backend.publish(
+        EVENT_BROADCAST, message, topics, coalesce_key
+    )
+    alert_engine.add_sink(SharedStateSink(shared_backend))
+
+# 巡检历史归档：ARCHIVE_DIR 指定目录，结果先缓存在内存中，每 ARCHIVE_FLUSH_INTERVAL 秒按日期分区写出
+archive_writer = ArchiveWriter(
+    os.getenv("ARCHIVE_DIR"), compress=os.getenv("ARCHIVE_COMPRESS", "0") == "1"
+) if os.getenv("ARCHIVE_DIR") else None
+ARCHIVE_FLUSH_INTERVAL = float(os.getenv("ARCHIVE_FLUSH_INTERVAL", 60))
+
+# 采集节点：COLLECTORS=1 开启，有存活节点时主机交给就近的节点巡检（数据中心取清单中 COLLECTOR_DC_ATTR 属性）；
+# COLLECTOR_FALLBACK=0 时没有存活节点也不在本地巡检，而是等待节点领取
+collector_coordinator = CollectorCoordinator(
+    shard_size=int(os.getenv("COLLECTOR_SHARD_SIZE", 50)),
+    node_timeout=float(os.getenv("COLLECTOR_NODE_TIMEOUT", 30)),
+    queue_timeout=float(os.getenv("COLLECTOR_QUEUE_TIMEOUT", 300)),
+    # 领取后等待结果的时限：单台巡检时限加上连接与回传的余量
+    lease_timeout=float(os.getenv(
+        "COLLECTOR_LEASE_TIMEOUT", inspector.inspection_deadline + inspector.ssh_timeout + 30
+    ))
+) if os.getenv("COLLECTORS", "0") == "1" else None
+# 下发给节点的主机信息包含SSH凭据，采集节点模式必须设置令牌
+COLLECTOR_TOKEN = os.getenv("COLLECTOR_TOKEN")
+if collector_coordinator is not None and not COLLECTOR_TOKEN:
+    raise Exception("COLLECTORS=1 时必须设置 COLLECTOR_TOKEN")
+if collector_coordinator is not None and shared_backend is not None:
+    raise Exception("COLLECTORS=1 时只能以单worker方式运行，不能与 SHARED_STATE_DB 同时使用")
+COLLECTOR_DC_ATTR = os.getenv("COLLECTOR_DC_ATTR", "dc")
+COLLECTOR_FALLBACK = os.getenv("COLLECTOR_FALLBACK", "1") == "1"
+
+# 性能分析输出目录，请求中带 profile 时写入折叠栈/pstats 与热点摘要
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# 进行中的巡检：key -> Task，同一worker内相同的并发巡检请求只执行一次
+inflight_inspections: Dict[str, asyncio.Task] = {}
+# 进行中的巡检的等待方数量，全部等待方取消（如连接断开）时才取消巡检
+inflight_waiters: Dict[str, int] = {}
+
+def apply_shared_result(result: dict, group: Optional[str]):
+    """写入其他worker巡检得到的结果，告警规则的连续命中与上次取值、异常基线也随之更新"""
+    result = InspectionResult.model_validate(result)
+    result_store.update(result, group=group)
+    alert_engine.observe(result, group)
+
+async def apply_shared_event(kind: str, event: dict):
+    """处理其他worker产生的广播与告警事件"""
+    if kind == EVENT_BROADCAST:
+        await websocket_manager.broadcast(
+            event["payload"], event["topics"], event["coalesce_key"], relay=False
+        )
+    elif kind == EVENT_ALERT:
+        alert_engine.mirror(json.loads(event["payload"]))
+
+async def flush_archive():
+    """在线程池中写出缓存的归档行"""
+    segments = archive_writer.take()
+    if segments:
+        await asyncio.get_running_loop().run_in_executor(None, archive_writer.write, segments)
+
+async def inventory_loop():
+    while True:
+        await asyncio.sleep(INVENTORY_REFRESH_INTERVAL)
+        try:
+            if await asyncio.get_running_loop().run_in_executor(None, inventory.refresh):
+                print(f"主机清单已重新加载: {len(inventory)} 台主机")
+        except Exception as e:
+            print(f"重新加载主机清单失败: {str(e)}")
+
+async def archive_loop():
+    while True:
+        await asyncio.sleep(ARCHIVE_FLUSH_INTERVAL)
+        try:
+            await flush_archive()
+        except Exception as e:
+            print(f"写入归档失败: {str(e)}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 启动时执行
     print("服务器巡检工具启动中...")
+    if shared_backend is not None:
+        await shared_backend.start(apply_shared_result, apply_shared_event)
+        print(f"共享状态: {shared_backend.path} (worker {shared_backend.worker_id})")
+    archive_task = asyncio.create_task(archive_loop()) if archive_writer is not None else None
+    collector_task = asyncio.create_task(collector_coordinator.run()) if collector_coordinator is not None else None
+    inventory_task = asyncio.create_task(inventory_loop()) if inventory.path is not None else None
     yield
     # 关闭时执行
     print("服务器巡检工具关闭中...")
+    inspector.bastions.close_all()
+    if shared_backend is not None:
+        await shared_backend.stop()
+    if collector_task is not None:
+        collector_task.cancel()
+    if inventory_task is not None:
+        inventory_task.cancel()
+    if archive_task is not None:
+        archive_task.cancel()
+        await flush_archive()
+    await alert_engine.close()
+    if ANOMALY_STATE and alert_engine.detector is not None:
+        alert_engine.detector.save(ANOMALY_STATE)
 
 app = FastAPI(
     title="服务器批量巡检工具",
@@ -48,90 +181,258 @@ app.add_middleware(
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket_manager.connect(websocket)
+    inspection_tasks = set()
     try:
         while True:
             data = await websocket.receive_text()
             message = json.loads(data)
             
             if message.get("type") == "inspect":
-                await handle_inspection_request(websocket, message)
+                # 巡检在后台执行，连接可以继续处理订阅、心跳等消息
+                task = asyncio.create_task(handle_inspection_request(websocket, message))
+                inspection_tasks.add(task)
+                task.add_done_callback(inspection_tasks.discard)
+            elif message.get("type") == "hello":
+                protocol = websocket_manager.negotiate(websocket, message.get("protocols", []))
+                await send_message(websocket, {"type": "hello", "protocol": protocol})
+            elif message.get("type") == "subscribe":
+                websocket_manager.subscribe(websocket, message.get("topics", [TOPIC_ALL]))
+                await send_message(websocket, {"type": "subscribed", "topics": message.get("topics", [TOPIC_ALL])})
+            elif message.get("type") == "unsubscribe":
+                websocket_manager.unsubscribe(websocket, message.get("topics"))
             elif message.get("type") == "ping":
-                await websocket.send_text(json.dumps({"type": "pong"}))
+                await send_message(websocket, {"type": "pong"})
                 
     except WebSocketDisconnect:
+        pass
+    finally:
+        # 连接断开或处理消息出错时都要释放连接，并取消该连接发起的巡检
         websocket_manager.disconnect(websocket)
+        for task in list(inspection_tasks):
+            task.cancel()
+
+async def send_message(websocket: WebSocket, payload: dict, coalesce_key: str = None, chatter: bool = False):
+    """发送消息给指定连接（放入该连接的发送队列，不等待发送完成）
+
+    chatter 表示逐台主机的进度提示，批量协议的连接不发送。
+    """
+    await websocket_manager.send_personal_message(Message(payload, chatter=chatter), websocket, coalesce_key)
+
+def resolve_servers(
+    servers: List[ServerInfo],
+    selector: Optional[str],
+    username: Optional[str] = None
+) -> List[ServerInfo]:
+    """请求中的服务器加上按选择器从清单中选出的主机
+
+    清单主机未设置用户名时依次使用请求中的 username 和 INVENTORY_DEFAULT_USER。
+    选择器无效或选中的主机信息不完整时抛出ValueError，错误信息包含对应主机。
+    """
+    if not selector:
+        return list(servers)
+    default_user = username or INVENTORY_DEFAULT_USER
+    selected = []
+    for entry in inventory.select(selector):
+        server = entry.to_server()
+        if default_user and "username" not in server:
+            server["username"] = default_user
+        try:
+            selected.append(ServerInfo(**server))
+        except ValidationError as e:
+            if "username" not in server:
+                raise ValueError(
+                    f"清单主机 {entry.host}:{entry.port} 未设置用户名，请在清单、请求的 username 或 INVENTORY_DEFAULT_USER 中指定"
+                )
+            fields = ", ".join(".".join(str(p) for p in error["loc"]) for error in e.errors())
+            raise ValueError(f"清单主机 {entry.host}:{entry.port} 的字段无效: {fields}")
+    return list(servers) + selected
+
+def start_profile(mode: Optional[str]):
+    """按请求开启性能分析，未要求时返回None，不导入分析模块"""
+    if not mode:
+        return None
+    from server.profiling import ProfileSession
+
+    session = ProfileSession(mode=mode, output_dir=PROFILE_DIR)
+    session.start()
+    return session
 
 async def handle_inspection_request(websocket: WebSocket, message: dict):
     """处理巡检请求"""
     try:
-        servers = message.get("servers", [])
+        servers = list(message.get("servers", []))
+        if message.get("selector"):
+            servers += [
+                server.model_dump()
+                for server in resolve_servers([], message["selector"], message.get("username"))
+            ]
         checks = message.get("checks", ["system", "cpu", "memory", "disk", "network"])
+        change_only = message.get("change_only", False)
         
         # 发送开始巡检消息
-        await websocket.send_text(json.dumps({
+        await send_message(websocket, {
             "type": "inspection_start",
+            "total": len(servers),
             "message": f"开始巡检 {len(servers)} 台服务器"
-        }))
+        })
         
         # 并发巡检所有服务器
+        profiler = start_profile(message.get("profile"))
         tasks = []
         for server_info in servers:
-            task = inspect_single_server(websocket, server_info, checks)
+            task = inspect_single_server(websocket, server_info, checks, change_only)
             tasks.append(task)
         
-        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            report = profiler.stop() if profiler is not None else None
         
         # 发送巡检完成消息
-        await websocket.send_text(json.dumps({
+        complete = {
             "type": "inspection_complete",
             "message": "所有服务器巡检完成"
-        }))
+        }
+        if report is not None:
+            complete["profile"] = report
+        await send_message(websocket, complete)
         
     except Exception as e:
-        await websocket.send_text(json.dumps({
+        await send_message(websocket, {
             "type": "error",
             "message": f"巡检过程中发生错误: {str(e)}"
-        }))
+        })
 
-async def inspect_single_server(websocket: WebSocket, server_info: dict, checks: List[str]):
+async def inspect_single_server(
+    websocket: WebSocket,
+    server_info: dict,
+    checks: List[str],
+    change_only: bool = False
+):
     """巡检单台服务器"""
+    host = server_info.get("host")
     try:
-        host = server_info.get("host")
-        username = server_info.get("username")
-        password = server_info.get("password")
-        key_path = server_info.get("key_path")
-        port = server_info.get("port", 22)
-        
         # 发送服务器开始巡检消息
-        await websocket.send_text(json.dumps({
+        await send_message(websocket, {
             "type": "server_start",
             "host": host,
             "message": f"开始巡检服务器 {host}"
-        }))
+        }, chatter=True)
         
-        # 执行巡检
-        result = await inspector.inspect_server(
-            host=host,
-            username=username,
-            password=password,
-            key_path=key_path,
-            port=port,
-            checks=checks
-        )
+        # 执行巡检，结果由实际执行巡检的一方推送给订阅了该主机或分组的连接
+        result = await run_inspection(ServerInfo(**server_info), checks, change_only, requester=websocket)
         
-        # 发送巡检结果
-        await websocket.send_text(json.dumps({
-            "type": "server_result",
-            "host": host,
-            "result": result
-        }))
+        # 发送巡检结果给请求方
+        await websocket_manager.send_personal_message(
+            result_message(result), websocket, f"server_result:{host}"
+        )
         
     except Exception as e:
-        await websocket.send_text(json.dumps({
+        await send_message(websocket, {
             "type": "server_error",
             "host": host,
             "message": f"服务器 {host} 巡检失败: {str(e)}"
-        }))
+        })
+
+def inspection_key(server: ServerInfo, checks: List[str], change_only: bool) -> str:
+    return f"{server.host}:{server.port}|{','.join(sorted(checks))}|{int(change_only)}"
+
+def result_message(result: InspectionResult) -> Message:
+    return Message({
+        "type": "server_result",
+        "host": result.host,
+        "result": result.model_dump(mode="json")
+    })
+
+def host_datacenter(server: ServerInfo) -> Optional[str]:
+    """主机所在数据中心，取自主机清单中的属性"""
+    entry = inventory.hosts.get(f"{server.host}:{server.port}")
+    if entry is None:
+        return None
+    value = entry.attrs.get(COLLECTOR_DC_ATTR)
+    return str(value) if value is not None else None
+
+async def inspect_and_record(
+    server: ServerInfo,
+    checks: List[str],
+    change_only: bool,
+    requester: Optional[WebSocket] = None
+) -> InspectionResult:
+    """执行巡检，写入结果存储与告警引擎，推送给订阅了该主机或分组的连接，多worker时同步给其他worker"""
+    if collector_coordinator is not None and (collector_coordinator.alive() or not COLLECTOR_FALLBACK):
+        result = await collector_coordinator.inspect(server, checks, change_only, host_datacenter(server))
+    else:
+        result = await inspector.inspect_server(
+            host=server.host,
+            username=server.username,
+            password=server.password,
+            key_path=server.key_path,
+            port=server.port,
+            checks=checks,
+            jump_host=server.jump_host,
+            change_only=change_only
+        )
+    result_store.update(result, group=server.group)
+    await alert_engine.process(result, server.group)
+    if archive_writer is not None:
+        archive_writer.add(result, server.group)
+    if shared_backend is not None:
+        await shared_backend.put_result(result.host, server.group, result.model_dump(mode="json"))
+
+    topics = [f"host:{result.host}"]
+    if server.group:
+        topics.append(f"group:{server.group}")
+    await websocket_manager.broadcast(
+        result_message(result), topics, f"server_result:{result.host}", exclude=requester
+    )
+    return result
+
+async def run_inspection(
+    server: ServerInfo,
+    checks: List[str],
+    change_only: bool = False,
+    requester: Optional[WebSocket] = None
+) -> InspectionResult:
+    """巡检单台服务器；相同主机与巡检项的并发请求（包括其他worker上的）共享同一次巡检"""
+    key = inspection_key(server, checks, change_only)
+    task = inflight_inspections.get(key)
+    if task is None:
+        task = asyncio.ensure_future(execute_inspection(server, checks, change_only, requester))
+        # 没有其他等待方时避免"异常未被获取"的警告
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        task.add_done_callback(lambda t: inflight_inspections.pop(key, None))
+        inflight_inspections[key] = task
+    inflight_waiters[key] = inflight_waiters.get(key, 0) + 1
+    try:
+        return await asyncio.shield(task)
+    finally:
+        inflight_waiters[key] -= 1
+        if not inflight_waiters[key]:
+            del inflight_waiters[key]
+            if not task.done():
+                task.cancel()
+
+async def execute_inspection(
+    server: ServerInfo,
+    checks: List[str],
+    change_only: bool,
+    requester: Optional[WebSocket]
+) -> InspectionResult:
+    """执行一次巡检，多worker时经共享后端去重"""
+    if shared_backend is None:
+        return await inspect_and_record(server, checks, change_only, requester)
+    ttl = inspector.inspection_deadline + inspector.ssh_timeout
+    if collector_coordinator is not None:
+        ttl = max(ttl, collector_coordinator.max_wait)
+    owned, result = await shared_backend.run_once(
+        inspection_key(server, checks, change_only),
+        ttl,
+        lambda: inspect_and_record(server, checks, change_only, requester),
+        lambda r: r.model_dump(mode="json")
+    )
+    if not owned:
+        result = InspectionResult.model_validate(result)
+    return result
 
 # REST API接口
 @app.get("/")
@@ -142,43 +443,356 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/hosts/health")
+async def hosts_health():
+    """主机健康状态（熔断器）"""
+    return inspector.health.snapshot()
+
+@app.delete("/api/hosts/health/{host}")
+async def reset_host_health(host: str):
+    """手动重置主机熔断状态"""
+    inspector.health.reset(host)
+    return {"host": host, "status": "reset"}
+
+@app.get("/api/results")
+async def list_results(
+    filter: List[str] = Query(default=[], description="过滤条件，如 disk.usage_percent>85、network.interfaces_down>0"),
+    sort: str = Query("host", description="排序字段"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
+    detail: bool = Query(False, description="是否返回完整巡检结果")
+):
+    """最新巡检结果：服务端过滤、排序与游标分页"""
+    try:
+        return result_store.query(filter, sort, order, limit, cursor, detail)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/summary")
+async def fleet_summary(
+    group_by: bool = Query(False, description="是否按主机分组统计"),
+    top_k: int = Query(10, ge=1, le=100)
+):
+    """全量主机统计：CPU、内存、磁盘使用率的分位数、直方图与Top-K"""
+    return result_store.summary(group_by=group_by, top_k=top_k)
+
+@app.get("/api/results/{host}")
+async def get_result(host: str):
+    """单台主机的最新巡检结果"""
+    result = result_store.get(host)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"没有主机 {host} 的巡检结果")
+    return result
+
+@app.get("/api/results/{host}/fingerprints")
+async def get_result_fingerprints(host: str):
+    """单台主机各配置段的指纹与取值"""
+    fingerprints = result_store.fingerprints.host(host)
+    if fingerprints is None:
+        raise HTTPException(status_code=404, detail=f"没有主机 {host} 的巡检结果")
+    return {"host": host, "sections": fingerprints}
+
+@app.get("/api/fingerprints")
+async def fingerprints_overview():
+    """各配置段（os、kernel、cpu_model、mounts、bonds、services）的不同指纹数与多数派占比"""
+    return result_store.fingerprints.overview()
+
+@app.get("/api/fingerprints/{section}")
+async def fingerprint_distribution(
+    section: str,
+    limit: int = Query(20, ge=1, le=1000),
+    sample: int = Query(5, ge=0, le=100, description="每个指纹附带的示例主机数")
+):
+    """一个配置段的各指纹及其主机数"""
+    try:
+        return result_store.fingerprints.distribution(section, limit, sample)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/fingerprints/{section}/drift")
+async def fingerprint_drift(
+    section: str,
+    reference: Optional[str] = Query(None, description="基准主机，为空时以多数派为基准"),
+    limit: int = Query(100, ge=1, le=10000)
+):
+    """与基准配置不同的主机，集合段（mounts、bonds、services）给出缺少与多出的项"""
+    try:
+        return result_store.fingerprints.drift(section, reference, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/fingerprints/{section}/outliers")
+async def fingerprint_outliers(
+    section: str,
+    max_share: float = Query(0.05, gt=0, le=1, description="主机数占比不超过该值的指纹视为离群")
+):
+    """少数主机才有的配置"""
+    try:
+        return result_store.fingerprints.outliers(section, max_share)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/fingerprints/{section}/hosts")
+async def fingerprint_hosts(
+    section: str,
+    fingerprint: Optional[str] = Query(None, description="指纹"),
+    item: Optional[str] = Query(None, description="集合段中的一项，如服务名 sshd.service"),
+    missing: bool = Query(False, description="与item一起使用，返回缺少该项的主机"),
+    limit: int = Query(1000, ge=1, le=100000)
+):
+    """按指纹或集合项查询主机，如缺少某服务、挂载点的主机"""
+    try:
+        if fingerprint is not None:
+            hosts = result_store.fingerprints.hosts_with(section, fingerprint)
+        elif item is not None:
+            hosts = result_store.fingerprints.hosts_by_item(section, item, missing)
+        else:
+            raise ValueError("需要指定 fingerprint 或 item")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"section": section, "total": len(hosts), "hosts": hosts[:limit]}
+
+@app.get("/api/alerts")
+async def list_alerts():
+    """当前处于触发状态的告警"""
+    alerts = alert_engine.active()
+    return {"total": len(alerts), "alerts": alerts}
+
+@app.get("/api/alerts/rules")
+async def list_alert_rules():
+    """已加载的告警规则"""
+    return {"rules": [
+        {"name": r.name, "expr": r.expr, "severity": r.severity, "consecutive": r.consecutive}
+        for r in alert_engine.rules
+    ]}
+
+@app.get("/api/baselines/{host}")
+async def host_baselines(host: str):
+    """主机各指标的滚动基线与各挂载点的增长速率、写满时间"""
+    if alert_engine.detector is None:
+        raise HTTPException(status_code=404, detail="未启用异常检测 (ANOMALY_DETECTION)")
+    return alert_engine.detector.host_baselines(host)
+
+@app.get("/api/disks/eta")
+async def disk_eta(limit: int = Query(20, ge=1, le=1000)):
+    """按预计写满时间从近到远排列的挂载点"""
+    if alert_engine.detector is None:
+        raise HTTPException(status_code=404, detail="未启用异常检测 (ANOMALY_DETECTION)")
+    return {"disks": alert_engine.detector.disk_eta(limit)}
+
+@app.get("/api/websocket/stats")
+async def websocket_stats():
+    """WebSocket连接与发送队列状态"""
+    return websocket_manager.snapshot()
+
+@app.get("/api/bastions")
+async def bastions_status():
+    """跳板机连接复用状态"""
+    return {"bastions": inspector.bastions.snapshot()}
+
+@app.get("/api/concurrency")
+async def concurrency_status():
+    """自适应并发控制器的当前状态"""
+    return inspector.limiter.snapshot()
+
+@app.get("/api/shared")
+async def shared_status():
+    """多worker共享状态后端的同步状态"""
+    if shared_backend is None:
+        return {"enabled": False}
+    return {"enabled": True, **(await shared_backend.snapshot())}
+
+@app.get("/api/archive")
+async def archive_status():
+    """巡检历史归档的日期范围与行数"""
+    if archive_writer is None:
+        return {"enabled": False}
+    reader = ArchiveReader(archive_writer.root)
+    snapshot = await asyncio.get_running_loop().run_in_executor(None, reader.snapshot)
+    return {"enabled": True, "pending": len(archive_writer), **snapshot}
+
+@app.get("/api/archive/series")
+async def archive_series(
+    column: str = Query(..., description="列名，如 memory.usage_percent、cpu.load1"),
+    host: Optional[str] = Query(None, description="只返回该主机的数据"),
+    start: Optional[str] = Query(None, description="起始日期 YYYY-MM-DD"),
+    end: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
+    table: str = Query("hosts", description="hosts 或 disks"),
+    limit: int = Query(100000, ge=1, le=1000000)
+):
+    """从归档中读取一列的历史数据，只打开所需的列文件"""
+    if archive_writer is None:
+        raise HTTPException(status_code=404, detail="未启用归档 (ARCHIVE_DIR)")
+    reader = ArchiveReader(archive_writer.root)
+    columns = list(dict.fromkeys(["timestamp", "host", column]))
+    if table == "disks":
+        columns.insert(2, "mountpoint")
+    try:
+        data = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: reader.read(columns, start, end, [host] if host else None, table)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # NaN（缺失值）转为null
+    return {
+        "column": column,
+        "total": len(data["timestamp"]),
+        **{
+            name: [None if value != value else value for value in data[name][:limit].tolist()]
+            for name in columns
+        }
+    }
+
+def check_collector(token: Optional[str]) -> CollectorCoordinator:
+    if collector_coordinator is None:
+        raise HTTPException(status_code=404, detail="未启用采集节点 (COLLECTORS)")
+    if not token or not hmac.compare_digest(token.encode('utf-8'), COLLECTOR_TOKEN.encode('utf-8')):
+        raise HTTPException(status_code=401, detail="采集节点令牌无效")
+    return collector_coordinator
+
+@app.get("/api/collectors")
+async def collectors_status():
+    """采集节点、排队与重新分配情况"""
+    if collector_coordinator is None:
+        return {"enabled": False}
+    return {"enabled": True, **collector_coordinator.snapshot()}
+
+@app.post("/api/collectors/{name}/heartbeat")
+async def collector_heartbeat(
+    name: str,
+    heartbeat: CollectorHeartbeat,
+    x_collector_token: Optional[str] = Header(None)
+):
+    """采集节点登记与心跳，超过 COLLECTOR_NODE_TIMEOUT 没有心跳的节点视为离线"""
+    return check_collector(x_collector_token).heartbeat(
+        name, heartbeat.datacenter, heartbeat.capacity, heartbeat.running
+    )
+
+@app.post("/api/collectors/{name}/lease")
+async def collector_lease(
+    name: str,
+    lease: CollectorLease,
+    x_collector_token: Optional[str] = Header(None)
+):
+    """采集节点领取待巡检的主机分片（长轮询）"""
+    coordinator = check_collector(x_collector_token)
+    try:
+        shards = await coordinator.lease(name, lease.max_hosts, lease.wait)
+    except Exception as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"shards": shards}
+
+@app.post("/api/collectors/{name}/results")
+async def collector_results(
+    name: str,
+    request: Request,
+    x_collector_token: Optional[str] = Header(None)
+):
+    """采集节点回传巡检结果，请求体为JSON（可gzip压缩）：{"items": [{"task", "result"} 或 {"task", "error"}]}"""
+    coordinator = check_collector(x_collector_token)
+    body = await request.body()
+    try:
+        if request.headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        items = json.loads(body)["items"]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"结果格式错误: {str(e)}")
+    return coordinator.complete(name, items)
+
+@app.delete("/api/collectors/{name}")
+async def collector_release(name: str, x_collector_token: Optional[str] = Header(None)):
+    """采集节点下线，未完成的主机重新分配给其他节点"""
+    return {"node": name, "requeued": check_collector(x_collector_token).release(name)}
+
+@app.get("/api/inventory")
+async def inventory_status():
+    """主机清单统计：主机数、各分组与标签的主机数"""
+    return inventory.snapshot()
+
+@app.get("/api/inventory/hosts")
+async def inventory_hosts(
+    selector: Optional[str] = Query(None, description="选择器，如 group=db,dc=sh、tag=primary、host=10.0.*"),
+    limit: int = Query(100, ge=1, le=10000),
+    offset: int = Query(0, ge=0)
+):
+    """按选择器列出清单中的主机（不含密码）"""
+    try:
+        entries = inventory.select(selector)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "total": len(entries),
+        "hosts": [entry.describe() for entry in entries[offset:offset + limit]]
+    }
+
 @app.post("/api/inspect")
 async def inspect_servers(request: InspectionRequest):
-    """批量巡检API接口"""
-    results = []
-    
-    for server in request.servers:
+    """批量巡检API接口，可用selector从主机清单中选择主机"""
+    try:
+        servers = resolve_servers(request.servers, request.selector, request.username)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        profiler = start_profile(request.profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    async def inspect_one(server: ServerInfo):
         try:
-            result = await inspector.inspect_server(
-                host=server.host,
-                username=server.username,
-                password=server.password,
-                key_path=server.key_path,
-                port=server.port,
-                checks=request.checks
-            )
-            results.append({
+            result = await run_inspection(server, request.checks, request.change_only)
+            return {
                 "host": server.host,
                 "status": "success",
                 "result": result
-            })
+            }
         except Exception as e:
-            results.append({
+            return {
                 "host": server.host,
                 "status": "error",
                 "error": str(e)
-            })
-    
-    return {"results": results}
+            }
+
+    # 并发由巡检器内部的自适应并发控制器限制
+    try:
+        results = await asyncio.gather(*[inspect_one(server) for server in servers])
+    finally:
+        report = profiler.stop() if profiler is not None else None
+
+    response = {"results": list(results), "concurrency": inspector.limiter.snapshot()}
+    if report is not None:
+        response["profile"] = report
+    return response
 
 if __name__ == "__main__":
+    import uvicorn
+
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
+    # 自动重载会多起一个监视进程并重复导入全部模块，仅在开发时通过 RELOAD=1 开启
+    reload = os.getenv("RELOAD", "0") == "1"
+    # 生产环境可通过 WORKERS 启动多个worker，共享状态默认放在临时目录的SQLite文件中
+    workers = 1 if reload else int(os.getenv("WORKERS", 1))
+    if workers > 1 and os.getenv("COLLECTORS", "0") == "1":
+        # 采集节点的队列与领取记录保存在进程内，多个worker之间无法共享
+        print("错误: COLLECTORS=1 时只能以单worker方式运行，请去掉 WORKERS")
+        sys.exit(1)
+    if workers > 1:
+        import tempfile
+        os.environ.setdefault(
+            "SHARED_STATE_DB", os.path.join(tempfile.gettempdir(), "inspection_shared_state.db")
+        )
     
     uvicorn.run(
-        "server.main:app",
+        "server.main:app" if reload or workers > 1 else app,
         host=host,
         port=port,
-        reload=True,
+        reload=reload,
+        workers=workers,
+        # 浏览器支持时协商permessage-deflate压缩，WS_DEFLATE=0 关闭
+        ws_per_message_deflate=os.getenv("WS_DEFLATE", "1") == "1",
         log_level="info"
     )
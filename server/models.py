@@ -1,24 +1,66 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-class ServerInfo(BaseModel):
+class LazyModel(BaseModel):
+    """模型基类：校验器与序列化器在首次使用时才构建，
+    未用到的模型（只在API中使用的请求模型、未启用的巡检项）不占用启动时间"""
+    model_config = ConfigDict(defer_build=True)
+
+class JumpHostInfo(LazyModel):
+    """跳板机信息模型"""
+    host: str = Field(..., description="跳板机IP地址")
+    username: str = Field(..., description="用户名")
+    password: Optional[str] = Field(None, description="密码")
+    key_path: Optional[str] = Field(None, description="SSH密钥路径")
+    port: int = Field(22, description="SSH端口")
+
+class ServerInfo(LazyModel):
     """服务器信息模型"""
     host: str = Field(..., description="服务器IP地址")
     username: str = Field(..., description="用户名")
     password: Optional[str] = Field(None, description="密码")
     key_path: Optional[str] = Field(None, description="SSH密钥路径")
     port: int = Field(22, description="SSH端口")
+    jump_host: Optional[JumpHostInfo] = Field(None, description="跳板机，为空时直连")
+    group: Optional[str] = Field(None, description="主机分组")
 
-class InspectionRequest(BaseModel):
+class InspectionRequest(LazyModel):
     """巡检请求模型"""
-    servers: List[ServerInfo] = Field(..., description="要巡检的服务器列表")
+    servers: List[ServerInfo] = Field(default_factory=list, description="要巡检的服务器列表")
+    selector: Optional[str] = Field(
+        None,
+        description="从主机清单中按分组、标签或属性选择主机，如 group=db,dc=sh"
+    )
+    username: Optional[str] = Field(
+        None,
+        description="清单中未设置用户名的主机使用的用户名，为空时使用 INVENTORY_DEFAULT_USER"
+    )
     checks: List[str] = Field(
         default=["system", "cpu", "memory", "disk", "network"],
         description="巡检项目列表"
     )
+    change_only: bool = Field(
+        default=False,
+        description="静态段只采集与上次哈希不同的部分"
+    )
+    profile: Optional[str] = Field(
+        None,
+        description="对本次巡检做性能分析：sample（全线程采样）或 cprofile（事件循环线程），为空时不分析"
+    )
+
+class CollectorHeartbeat(LazyModel):
+    """采集节点心跳"""
+    datacenter: Optional[str] = Field(None, description="节点所在数据中心，优先领取同一数据中心的主机")
+    capacity: int = Field(0, description="节点同时巡检的主机数上限")
+    running: int = Field(0, description="节点正在巡检的主机数")
+
+class CollectorLease(LazyModel):
+    """采集节点领取主机的请求"""
+    max_hosts: int = Field(100, ge=1, le=10000, description="最多领取的主机数")
+    wait: float = Field(20.0, ge=0, le=60, description="没有可领取的主机时最多等待的秒数")
 
-class SystemInfo(BaseModel):
+class SystemInfo(LazyModel):
     """系统信息模型"""
     os_name: str
     os_version: str
@@ -27,14 +69,14 @@ class SystemInfo(BaseModel):
     uptime: str
     boot_time: str
 
-class CPUInfo(BaseModel):
+class CPUInfo(LazyModel):
     """CPU信息模型"""
     cpu_count: int
     cpu_usage: float
     load_average: List[float]
     cpu_model: str
 
-class MemoryInfo(BaseModel):
+class MemoryInfo(LazyModel):
     """内存信息模型"""
     total: int
     available: int
@@ -45,7 +87,7 @@ class MemoryInfo(BaseModel):
     swap_used: int
     swap_free: int
 
-class DiskInfo(BaseModel):
+class DiskInfo(LazyModel):
     """磁盘信息模型"""
     device: str
     mountpoint: str
@@ -56,7 +98,7 @@ class DiskInfo(BaseModel):
     usage_percent: float
     disk_type: str  # root, data, other
 
-class NetworkInterface(BaseModel):
+class NetworkInterface(LazyModel):
     """网络接口信息模型"""
     name: str
     ip_address: str
@@ -66,14 +108,14 @@ class NetworkInterface(BaseModel):
     status: str
     speed: Optional[str] = None
 
-class NetworkInfo(BaseModel):
+class NetworkInfo(LazyModel):
     """网络信息模型"""
     interfaces: List[NetworkInterface]
     bonds: List[Dict[str, Any]]
     vips: List[Dict[str, Any]]
     routing_table: List[Dict[str, Any]]
 
-class ProcessInfo(BaseModel):
+class ProcessInfo(LazyModel):
     """进程信息模型"""
     pid: int
     name: str
@@ -82,14 +124,14 @@ class ProcessInfo(BaseModel):
     status: str
     command: str
 
-class ServiceInfo(BaseModel):
+class ServiceInfo(LazyModel):
     """服务信息模型"""
     name: str
     status: str
     enabled: bool
     description: str
 
-class InspectionResult(BaseModel):
+class InspectionResult(LazyModel):
     """巡检结果模型"""
     host: str
     timestamp: datetime
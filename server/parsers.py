@@ -0,0 +1,229 @@
+"""巡检命令输出的解析函数
+
+均为不执行命令的纯函数，单次遍历输出，便于用录制的输出做基准与回归比较。
+需要逐项查询的信息（网卡速率、服务是否开机启动）由巡检器合并为一条命令后用对应函数解析。
+"""
+import re
+import shlex
+from typing import Dict, List, Optional, Any, Iterable
+
+BONDING_MODE_PATTERN = re.compile(r'Bonding Mode: (\d+)')
+
+# 不作为磁盘统计的临时文件系统
+SKIP_FILESYSTEMS = frozenset(['tmpfs', 'devtmpfs', 'overlay', 'squashfs'])
+
+SIZE_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(size_str: str) -> int:
+    """解析 df -h 的大小字符串（如 1.5G）为字节数"""
+    unit = SIZE_UNITS.get(size_str[-1:].upper())
+    if unit is None:
+        return int(size_str)
+    return int(float(size_str[:-1]) * unit)
+
+
+def parse_ip_addr(text: str) -> Dict[str, Any]:
+    """解析 ip addr show 的输出，得到网卡列表（不含速率）与keepalived的secondary地址
+
+    网卡块以 "序号: 名称:" 开头、空行结束，块内取最后一个 link/ether 与 inet 地址；lo 不计入。
+    """
+    interfaces = []
+    vips = []
+    # 当前块对应的网卡；为None时（块外或lo）行只用于识别secondary地址
+    current: Optional[Dict[str, Any]] = None
+
+    for line in text.split('\n'):
+        line = line.rstrip()
+        if not line:
+            current = None
+            continue
+
+        first = line[0]
+        if first.isdigit() and ':' in line.split(' ', 1)[0]:
+            name = line.split(':', 2)[1].strip()
+            if name == 'lo':
+                current = None
+                continue
+            if name.startswith('bond'):
+                interface_type = "bond"
+            elif name.startswith('veth') or name.startswith('docker'):
+                interface_type = "virtual"
+            else:
+                interface_type = "physical"
+            current = {
+                "name": name,
+                "ip_address": "",
+                "netmask": "",
+                "mac_address": "",
+                "interface_type": interface_type,
+                "status": "UP" if (' state UP ' in line or line.endswith('state UP')) else "DOWN",
+                "speed": None
+            }
+            interfaces.append(current)
+            continue
+
+        s = line.lstrip()
+        if s.startswith('inet'):
+            if 'secondary' in s:
+                parts = s.split(None, 2)
+                if len(parts) >= 2:
+                    vips.append({
+                        "ip": parts[1].split('/', 1)[0],
+                        "type": "keepalived",
+                        "interface": "secondary"
+                    })
+            if current is not None and s.startswith('inet '):
+                ip_info = s.split(None, 2)[1]
+                if '/' in ip_info:
+                    current["ip_address"], current["netmask"] = ip_info.split('/', 1)
+        elif current is not None and s.startswith('link/ether'):
+            parts = s.split(None, 2)
+            if len(parts) >= 2:
+                current["mac_address"] = parts[1]
+
+    return {"interfaces": interfaces, "vips": vips}
+
+
+def speed_command(names: Iterable[str]) -> str:
+    """一次读取多块网卡速率的命令，每行输出 名称<TAB>速率"""
+    quoted = " ".join(shlex.quote(name) for name in names)
+    return (
+        f"for i in {quoted}; do printf '%s\\t' \"$i\"; "
+        f"cat /sys/class/net/\"$i\"/speed 2>/dev/null || echo 'Unknown'; done"
+    )
+
+
+def parse_speeds(text: str) -> Dict[str, Optional[str]]:
+    """解析 speed_command 的输出，无法读取速率的网卡为None"""
+    speeds = {}
+    for line in text.split('\n'):
+        name, sep, value = line.partition('\t')
+        if sep:
+            value = value.strip()
+            speeds[name] = value if value and value != "Unknown" else None
+    return speeds
+
+
+def parse_bonding(text: str) -> List[Dict[str, Any]]:
+    """解析 /proc/net/bonding/bond* 的内容"""
+    bonds = []
+    if not text:
+        return bonds
+    for block in text.split('\n\n'):
+        if 'Bonding Mode' not in block:
+            continue
+        mode_match = BONDING_MODE_PATTERN.search(block)
+        bonds.append({
+            "name": block.split('\n', 1)[0].split(':', 1)[0],
+            "mode": mode_match.group(1) if mode_match else "Unknown",
+            "status": "Active" if "Currently Active Slave" in block else "Inactive"
+        })
+    return bonds
+
+
+def parse_route_line(line: str) -> Optional[Dict[str, str]]:
+    """解析 ip route show 的一行，字段不足时返回None"""
+    parts = line.split(None, 3)
+    if len(parts) < 3:
+        return None
+    return {
+        "destination": parts[0],
+        "gateway": parts[2],
+        "interface": parts[2] if len(parts) == 3 else parts[3].rsplit(None, 1)[-1]
+    }
+
+
+def parse_routes(text: str) -> List[Dict[str, str]]:
+    routes = []
+    for line in text.split('\n'):
+        route = parse_route_line(line)
+        if route is not None:
+            routes.append(route)
+    return routes
+
+
+def parse_df(text: str) -> List[Dict[str, Any]]:
+    """解析 df -hT 的输出，只保留根盘与 /data、/storage 数据盘"""
+    disks = []
+    for line in text.split('\n')[1:]:
+        parts = line.split()
+        if len(parts) < 7:
+            continue
+        mountpoint = parts[6]
+        if mountpoint == "/":
+            disk_type = "root"
+        elif mountpoint.startswith('/data') or mountpoint.startswith('/storage'):
+            disk_type = "data"
+        else:
+            continue
+        if parts[1] in SKIP_FILESYSTEMS:
+            continue
+        disks.append({
+            "device": parts[0],
+            "mountpoint": mountpoint,
+            "filesystem": parts[1],
+            "total": parse_size(parts[2]),
+            "used": parse_size(parts[3]),
+            "free": parse_size(parts[4]),
+            "usage_percent": float(parts[5].rstrip('%')),
+            "disk_type": disk_type
+        })
+    return disks
+
+
+def parse_ps(text: str) -> List[Dict[str, Any]]:
+    """解析 ps aux 的输出（跳过标题行），遇到无法解析的行时返回已解析的部分"""
+    processes = []
+    for line in text.split('\n')[1:]:
+        parts = line.split(None, 10)
+        if len(parts) < 11:
+            continue
+        try:
+            processes.append({
+                "pid": int(parts[1]),
+                "name": parts[10][:50],
+                "cpu_percent": float(parts[2]),
+                "memory_percent": float(parts[3]),
+                "status": parts[7],
+                "command": parts[10]
+            })
+        except ValueError:
+            break
+    return processes
+
+
+def parse_systemctl(text: str) -> List[Dict[str, Any]]:
+    """解析 systemctl list-units 的输出，得到服务名、运行状态与描述，开机启动状态由 mark_enabled 填入"""
+    services = []
+    for line in text.split('\n')[1:]:
+        if line.startswith('UNIT'):
+            continue
+        parts = line.split()
+        if len(parts) >= 4:
+            services.append({
+                "name": parts[0],
+                "status": parts[2],
+                "enabled": False,
+                "description": " ".join(parts[3:])
+            })
+    return services
+
+
+def enabled_command(names: Iterable[str]) -> str:
+    """一次查询多个服务是否开机启动的命令，每行输出 服务名<TAB>状态"""
+    quoted = " ".join(shlex.quote(name) for name in names)
+    return (
+        f"for s in {quoted}; do printf '%s\\t' \"$s\"; "
+        f"systemctl is-enabled \"$s\" 2>/dev/null || echo 'unknown'; done"
+    )
+
+
+def mark_enabled(services: List[Dict[str, Any]], text: str):
+    """按 enabled_command 的输出原地标记开机启动的服务
+
+    只需找出状态恰为 enabled 的行，用集合查找代替逐行拆分成字典。
+    """
+    enabled = {line[:-8] for line in text.split('\n') if line.endswith('\tenabled')}
+    for service in services:
+        service["enabled"] = service["name"] in enabled
@@ -0,0 +1,254 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+
+MODE_SAMPLE = "sample"
+MODE_CPROFILE = "cprofile"
+
+# 平台不支持线程CPU时钟时的退路：栈顶为这些函数时视为线程空闲（等待任务、IO或锁）
+IDLE_FUNCTIONS = {
+    "wait", "select", "poll", "sleep", "acquire", "get", "_worker",
+    "read_all", "_read_timeout", "recv", "accept", "run_forever", "_run_once",
+}
+
+# 两次采样之间线程CPU时间占墙钟时间低于该比例时视为空闲（阻塞在C调用中的线程栈顶仍是Python函数）
+BUSY_RATIO = 0.2
+
+# 空闲采样在折叠栈中追加的标记帧，火焰图中可区分等待与计算，热点统计不计入
+IDLE_FRAME = "[idle]"
+
+MAX_DEPTH = 128
+
+# 同一线程池中的线程合并显示，如 inspector_3 -> inspector
+_THREAD_SUFFIX = re.compile(r'[_-]?\d+(?: \(\w+\))?$')
+
+# 同一时间只允许一个分析会话，采样覆盖所有线程，并行会话的结果会互相混杂
+_session_lock = threading.Lock()
+
+
+def _thread_clock(ident: int) -> Optional[int]:
+    try:
+        return time.pthread_getcpuclockid(ident)
+    except (AttributeError, OSError):
+        return None
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """采样分析器：后台线程定时抓取所有线程的调用栈，按折叠栈计数
+
+    覆盖事件循环、线程池以及paramiko传输线程（加解密在其中进行）。
+    每次采样按线程CPU时钟判断线程是否在计算，等待SSH输出、任务队列的采样标记为空闲。
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        clocks: Dict[int, Optional[int]] = {}
+        last_cpu: Dict[int, float] = {}
+        last_wall = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last_wall = now - last_wall, now
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                self.samples += 1
+                if ident not in clocks:
+                    clocks[ident] = _thread_clock(ident)
+                idle = None
+                if clocks[ident] is not None:
+                    try:
+                        cpu = time.clock_gettime(clocks[ident])
+                    except OSError:
+                        clocks[ident] = None
+                    else:
+                        if ident in last_cpu:
+                            idle = cpu - last_cpu[ident] < elapsed * BUSY_RATIO
+                        last_cpu[ident] = cpu
+                if idle is None:
+                    idle = stack[0].co_name in IDLE_FUNCTIONS
+                thread = _THREAD_SUFFIX.sub("", names.get(ident, "thread")) or "thread"
+                key = (thread,) + tuple(reversed(stack))
+                if idle:
+                    self.idle_samples += 1
+                    key += (IDLE_FRAME,)
+                self.stacks[key] += 1
+
+    def collapsed(self) -> List[str]:
+        """折叠栈格式（flamegraph.pl、speedscope 可直接读取）"""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            labels = [stack[0]] + [c if c == IDLE_FRAME else _frame_label(c) for c in stack[1:]]
+            lines.append(";".join(labels) + f" {count}")
+        return lines
+
+    def top(self, limit: int = 30) -> List[Dict[str, Any]]:
+        """非空闲采样中自身与累计占比最高的函数"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        busy = 0
+        for stack, count in self.stacks.items():
+            if stack[-1] == IDLE_FRAME:
+                continue
+            codes = stack[1:]
+            busy += count
+            own[_frame_label(codes[-1])] += count
+            for label in {_frame_label(c) for c in codes}:
+                total[label] += count
+        if busy == 0:
+            return []
+        return [
+            {
+                "function": label,
+                "self_samples": count,
+                "self_percent": round(count / busy * 100, 1),
+                "total_percent": round(total[label] / busy * 100, 1),
+            }
+            for label, count in own.most_common(limit)
+        ]
+
+
+class ProfileSession:
+    """一次巡检运行的性能分析
+
+    sample 模式对所有线程采样，输出折叠栈（.collapsed）与热点摘要；
+    cprofile 模式对调用 start() 的线程（即事件循环：解析与序列化所在线程）做确定性分析，
+    输出 pstats 文件（.prof，可用 snakeviz、flameprof 查看）与热点摘要。
+    未开启分析时不导入本模块，没有任何额外开销。
+    """
+
+    def __init__(
+        self,
+        mode: str = MODE_SAMPLE,
+        output_dir: str = "profiles",
+        interval: float = 0.005,
+        name: str = "inspection"
+    ):
+        if mode not in (MODE_SAMPLE, MODE_CPROFILE):
+            raise ValueError(f"不支持的分析模式: {mode}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.interval = interval
+        self.name = name
+        self._sampler: Optional[SamplingProfiler] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._started = 0.0
+
+    def start(self):
+        if not _session_lock.acquire(blocking=False):
+            raise RuntimeError("已有正在进行的性能分析")
+        self._started = time.perf_counter()
+        if self.mode == MODE_SAMPLE:
+            self._sampler = SamplingProfiler(self.interval)
+            self._sampler.start()
+        else:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self, limit: int = 30) -> Dict[str, Any]:
+        """停止分析并写出结果文件，返回摘要"""
+        try:
+            duration = time.perf_counter() - self._started
+            if self._sampler is not None:
+                self._sampler.stop()
+            if self._profile is not None:
+                self._profile.disable()
+        finally:
+            _session_lock.release()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(
+            self.output_dir, f"{self.name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        )
+        report: Dict[str, Any] = {"mode": self.mode, "duration": round(duration, 3), "files": {}}
+
+        if self._sampler is not None:
+            sampler = self._sampler
+            path = f"{base}.collapsed"
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(sampler.collapsed()) + "\n")
+            report["files"]["collapsed"] = path
+            report["samples"] = sampler.samples
+            report["idle_samples"] = sampler.idle_samples
+            report["top"] = sampler.top(limit)
+        else:
+            path = f"{base}.prof"
+            self._profile.dump_stats(path)
+            report["files"]["pstats"] = path
+            report["top"] = self._pstats_top(limit)
+
+        summary_path = f"{base}.txt"
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(format_report(report))
+        report["files"]["summary"] = summary_path
+        return report
+
+    def _pstats_top(self, limit: int) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(self._profile, stream=io.StringIO())
+        total = stats.total_tt or 1
+        rows: List[Tuple[float, Dict[str, Any]]] = []
+        for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+            rows.append((tottime, {
+                "function": f"{func} ({os.path.basename(filename)}:{line})",
+                "calls": ncalls,
+                "self_seconds": round(tottime, 4),
+                "self_percent": round(tottime / total * 100, 1),
+                "total_seconds": round(cumtime, 4),
+            }))
+        rows.sort(key=lambda row: row[0], reverse=True)
+        return [row for _, row in rows[:limit]]
+
+
+def format_report(report: Dict[str, Any], limit: Optional[int] = None) -> str:
+    """把分析摘要格式化为文本"""
+    lines = [f"模式: {report['mode']}  时长: {report['duration']}s"]
+    if report["mode"] == MODE_SAMPLE:
+        lines[0] += f"  采样: {report['samples']} (空闲 {report['idle_samples']})"
+        lines.append(f"{'自身%':>7}{'累计%':>7}{'采样数':>8}  函数")
+        for row in report["top"][:limit]:
+            lines.append(
+                f"{row['self_percent']:>7}{row['total_percent']:>7}{row['self_samples']:>8}  {row['function']}"
+            )
+    else:
+        lines.append(f"{'自身%':>7}{'自身(s)':>9}{'累计(s)':>9}{'调用数':>9}  函数")
+        for row in report["top"][:limit]:
+            lines.append(
+                f"{row['self_percent']:>7}{row['self_seconds']:>9}{row['total_seconds']:>9}"
+                f"{row['calls']:>9}  {row['function']}"
+            )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,293 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable
+
+# 事件类型
+EVENT_BROADCAST = "broadcast"
+EVENT_RESULT = "result"
+EVENT_ALERT = "alert"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    host TEXT PRIMARY KEY,
+    grp TEXT,
+    payload TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS inflight (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    result TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    topics TEXT,
+    coalesce_key TEXT,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+
+class SharedBackend:
+    """多worker部署时共享状态的本地SQLite后端
+
+    - results：每台主机的最新结果，新worker启动时据此初始化本地存储
+    - inflight：巡检租约，同一主机同一组巡检项同时只有一个worker在执行，其余worker等待其结果
+    - events：广播、结果与告警的事件日志，各worker轮询后转发给本地连接并更新本地副本
+
+    SQLite调用在单独的线程中执行，不阻塞事件循环。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        poll_interval: float = 0.1,
+        event_retention: float = 300.0,
+        result_linger: float = 5.0
+    ):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.event_retention = event_retention
+        # 巡检完成后结果在租约表中保留的时间，供等待中的worker读取
+        self.result_linger = result_linger
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.last_seq = 0
+        self.relayed = 0
+        self.waited = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args))
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # ---- 启动与事件转发 ----
+
+    def _bootstrap(self) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+        db = self._db()
+        # 先记下事件位置再读取结果，两者之间写入的结果会在事件中再应用一次（幂等）
+        self.last_seq = db.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+        return [
+            (json.loads(payload), grp)
+            for payload, grp in db.execute("SELECT payload, grp FROM results")
+        ]
+
+    async def start(
+        self,
+        on_result: Callable[[Dict[str, Any], Optional[str]], None],
+        on_event: Callable[[str, Dict[str, Any]], Awaitable[None]]
+    ):
+        """加载已有结果并启动事件转发循环
+
+        on_result(result, group) 用于写入本地存储；on_event(kind, event) 处理其他worker产生的事件。
+        """
+        for result, group in await self._call(self._bootstrap):
+            on_result(result, group)
+        self._task = asyncio.create_task(self._relay(on_result, on_event))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self._call(self._close)
+        self._executor.shutdown(wait=False)
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _fetch_events(self, limit: int = 500) -> List[Tuple]:
+        return self._db().execute(
+            "SELECT seq, origin, kind, topics, coalesce_key, payload FROM events "
+            "WHERE seq > ? ORDER BY seq LIMIT ?",
+            (self.last_seq, limit)
+        ).fetchall()
+
+    def _prune(self):
+        now = time.time()
+        db = self._db()
+        db.execute("DELETE FROM events WHERE created < ?", (now - self.event_retention,))
+        db.execute("DELETE FROM inflight WHERE expires < ?", (now - self.event_retention,))
+
+    async def _relay(self, on_result, on_event):
+        last_prune = time.monotonic()
+        while True:
+            try:
+                rows = await self._call(self._fetch_events)
+                for seq, origin, kind, topics, coalesce_key, payload in rows:
+                    self.last_seq = seq
+                    if origin == self.worker_id:
+                        continue
+                    self.relayed += 1
+                    if kind == EVENT_RESULT:
+                        event = json.loads(payload)
+                        on_result(event["result"], event.get("group"))
+                    else:
+                        await on_event(kind, {
+                            "topics": json.loads(topics) if topics else None,
+                            "coalesce_key": coalesce_key,
+                            "payload": payload
+                        })
+                if time.monotonic() - last_prune > 60:
+                    await self._call(self._prune)
+                    last_prune = time.monotonic()
+                if len(rows) < 500:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"共享状态同步失败: {str(e)}")
+                await asyncio.sleep(1)
+
+    # ---- 写入 ----
+
+    def _publish(self, kind: str, payload: str, topics: Optional[List[str]], coalesce_key: Optional[str]):
+        self._db().execute(
+            "INSERT INTO events (origin, kind, topics, coalesce_key, payload, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.worker_id, kind, json.dumps(topics) if topics is not None else None,
+             coalesce_key, payload, time.time())
+        )
+
+    async def publish(
+        self,
+        kind: str,
+        payload: str,
+        topics: Optional[List[str]] = None,
+        coalesce_key: Optional[str] = None
+    ):
+        await self._call(self._publish, kind, payload, topics, coalesce_key)
+
+    def _put_result(self, host: str, group: Optional[str], payload: str):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO results (host, grp, payload, updated) VALUES (?, ?, ?, ?)",
+                (host, group, payload, time.time())
+            )
+            self._publish(EVENT_RESULT, json.dumps({"group": group, "result": json.loads(payload)}), None, None)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    async def put_result(self, host: str, group: Optional[str], result: Dict[str, Any]):
+        """保存最新结果并通知其他worker"""
+        await self._call(self._put_result, host, group, json.dumps(result, ensure_ascii=False))
+
+    # ---- 巡检租约 ----
+
+    def _claim(self, key: str, owner: str, ttl: float) -> bool:
+        db = self._db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT expires, done FROM inflight WHERE key = ?", (key,)).fetchone()
+            if row is not None and not row[1] and row[0] > now:
+                db.execute("COMMIT")
+                return False
+            db.execute(
+                "INSERT OR REPLACE INTO inflight (key, owner, expires, done, result) VALUES (?, ?, ?, 0, NULL)",
+                (key, owner, now + ttl)
+            )
+            db.execute("COMMIT")
+            return True
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def _complete(self, key: str, owner: str, result: Optional[str]):
+        db = self._db()
+        if result is None:
+            db.execute("DELETE FROM inflight WHERE key = ? AND owner = ?", (key, owner))
+        else:
+            db.execute(
+                "UPDATE inflight SET done = 1, result = ?, expires = ? WHERE key = ? AND owner = ?",
+                (result, time.time() + self.result_linger, key, owner)
+            )
+
+    def _poll(self, key: str) -> Optional[Tuple[float, int, Optional[str]]]:
+        return self._db().execute(
+            "SELECT expires, done, result FROM inflight WHERE key = ?", (key,)
+        ).fetchone()
+
+    async def run_once(
+        self,
+        key: str,
+        ttl: float,
+        inspect: Callable[[], Awaitable[Any]],
+        encode: Callable[[Any], Dict[str, Any]]
+    ) -> Tuple[bool, Any]:
+        """同一key的巡检在所有worker中只执行一次
+
+        取得租约时执行inspect并返回 (True, 结果)；其他worker正在执行时等待其完成，
+        返回 (False, 结果字典)。持有者异常退出导致租约过期时由等待方接手执行。
+        """
+        owner = f"{self.worker_id}:{uuid.uuid4().hex}"
+        while True:
+            if await self._call(self._claim, key, owner, ttl):
+                try:
+                    result = await inspect()
+                except BaseException:
+                    await self._call(self._complete, key, owner, None)
+                    raise
+                await self._call(
+                    self._complete, key, owner, json.dumps(encode(result), ensure_ascii=False)
+                )
+                return True, result
+
+            self.waited += 1
+            while True:
+                await asyncio.sleep(self.poll_interval * 2)
+                row = await self._call(self._poll, key)
+                if row is None or (not row[1] and row[0] <= time.time()):
+                    break
+                if row[1]:
+                    return False, json.loads(row[2])
+
+    def _snapshot(self) -> Dict[str, Any]:
+        db = self._db()
+        now = time.time()
+        return {
+            "inflight": db.execute(
+                "SELECT COUNT(*) FROM inflight WHERE done = 0 AND expires > ?", (now,)
+            ).fetchone()[0],
+            "results": db.execute("SELECT COUNT(*) FROM results").fetchone()[0],
+            "events": db.execute("SELECT COUNT(*) FROM events").fetchone()[0],
+        }
+
+    async def snapshot(self) -> Dict[str, Any]:
+        snapshot = await self._call(self._snapshot)
+        snapshot.update({
+            "path": self.path,
+            "worker": self.worker_id,
+            "last_seq": self.last_seq,
+            "relayed": self.relayed,
+            "waited": self.waited,
+        })
+        return snapshot
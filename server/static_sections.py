@@ -0,0 +1,140 @@
+import json
+import os
+import re
+from typing import Dict, List, Optional, Any, Tuple
+
+# 静态段：名称 -> (远端命令, 所属巡检项)
+STATIC_SECTIONS = {
+    "os_release": ("cat /etc/os-release", "system"),
+    "kernel": ("uname -r", "system"),
+    "hostname": ("hostname", "system"),
+    "cpu_model": ("cat /proc/cpuinfo | grep 'model name' | head -1 | cut -d':' -f2", "cpu"),
+    "ip_addr": ("ip addr show", "network"),
+    "ip_route": ("ip route show", "network"),
+}
+
+# 只比较哈希、变化时不随脚本返回内容的段（输出可能很大，变化时走流式采集）
+HASH_ONLY_SECTIONS = {"ip_route"}
+
+# 计算哈希前去掉每次都会变化的行：DHCP/SLAAC地址的 valid_lft/preferred_lft 倒计时
+HASH_FILTERS = {"ip_addr": "sed '/_lft /d'"}
+
+MARKER = "@@static@@"
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def sections_for_checks(checks: List[str]) -> List[str]:
+    """本次巡检项目涉及的静态段"""
+    return [name for name, (_, check) in STATIC_SECTIONS.items() if check in checks]
+
+
+def build_script(known: Dict[str, Optional[str]]) -> str:
+    """生成远端脚本：逐段计算输出的md5，与已知哈希相同的段只返回一行标记
+
+    命令失败的段只返回 failed 标记，不参与比较。
+    """
+    parts = []
+    for name, digest in known.items():
+        command = STATIC_SECTIONS[name][0]
+        if not digest or not DIGEST_PATTERN.match(digest):
+            digest = "-"
+        send = "0" if name in HASH_ONLY_SECTIONS else "1"
+        hash_filter = f" | {HASH_FILTERS[name]}" if name in HASH_FILTERS else ""
+        parts.append(
+            f"o=$({{ {command}; }} 2>/dev/null); "
+            f"if [ $? -ne 0 ]; then echo \"{MARKER} {name} - failed\"; else "
+            f"h=$(printf '%s' \"$o\"{hash_filter} | md5sum | cut -c1-32); "
+            f"if [ \"$h\" = \"{digest}\" ]; then echo \"{MARKER} {name} $h same\"; "
+            f"else echo \"{MARKER} {name} $h changed\"; "
+            f"if [ {send} = 1 ]; then printf '%s\\n' \"$o\"; fi; fi; fi"
+        )
+    return "; ".join(parts)
+
+
+def parse_script_output(output: str) -> Dict[str, Tuple[str, bool, Optional[str]]]:
+    """解析脚本输出，返回 段名 -> (哈希, 是否变化, 内容)；未变化或只比较哈希的段内容为None
+
+    命令失败的段不返回，由采集函数按常规方式执行并报告错误。
+    """
+    sections: Dict[str, Tuple[str, bool, Optional[str]]] = {}
+    current = None
+    lines: List[str] = []
+
+    def flush():
+        if current is not None:
+            name, digest, changed = current
+            content = "\n".join(lines) if changed and name not in HASH_ONLY_SECTIONS else None
+            sections[name] = (digest, changed, content)
+
+    for line in output.split('\n'):
+        if line.startswith(MARKER):
+            flush()
+            parts = line.split()
+            if len(parts) != 4 or parts[1] not in STATIC_SECTIONS:
+                current = None
+                continue
+            if parts[3] == "failed":
+                current = None
+                continue
+            current = (parts[1], parts[2], parts[3] == "changed")
+            lines = []
+        elif current is not None:
+            lines.append(line)
+    flush()
+    return sections
+
+
+class StaticContext:
+    """一次巡检中预取的静态段
+
+    values 为本次可直接使用的已解析结果；pending 为发生变化、需要由采集函数重新采集的段及其新哈希。
+    """
+
+    def __init__(self, key: str):
+        # 缓存键 host:port
+        self.key = key
+        self.values: Dict[str, Any] = {}
+        self.pending: Dict[str, str] = {}
+
+
+class StaticSectionCache:
+    """按 host:port 缓存静态段的哈希与解析结果，可持久化到JSON文件供命令行多次运行复用
+
+    同一地址的不同端口（如NAT后的多台主机）各自缓存。
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Tuple[str, Any]]] = {}
+
+    def get(self, key: str, name: str) -> Optional[Tuple[str, Any]]:
+        return self._entries.get(key, {}).get(name)
+
+    def digest(self, key: str, name: str) -> Optional[str]:
+        entry = self.get(key, name)
+        return entry[0] if entry else None
+
+    def set(self, key: str, name: str, digest: str, value: Any):
+        self._entries.setdefault(key, {})[name] = (digest, value)
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def load(self, path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for key, sections in data.items():
+            for name, (digest, value) in sections.items():
+                self.set(key, name, digest, value)
+
+    def save(self, path: str):
+        data = {
+            key: {name: [digest, value] for name, (digest, value) in sections.items()}
+            for key, sections in self._entries.items()
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
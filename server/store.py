@@ -0,0 +1,392 @@
+import base64
+import bisect
+import json
+import re
+import sys
+from typing import Dict, Iterator, List, Optional, Any, Set, Tuple
+
+from .models import InspectionResult
+from .aggregation import FleetColumns
+from .compact import CompactResult
+from .fingerprints import FingerprintIndex
+
+# 数值字段：有序索引，支持范围过滤
+NUMERIC_FIELDS = {
+    "cpu.usage",
+    "cpu.load1",
+    "cpu.count",
+    "memory.usage_percent",
+    "memory.swap_used",
+    "disk.usage_percent",
+    "network.interfaces_down",
+    "network.bonds_inactive",
+    "errors",
+}
+
+# 分类字段：等值索引
+CATEGORY_FIELDS = {
+    "host",
+    "group",
+    "status",
+    "system.os_name",
+    "system.kernel_version",
+    "system.hostname",
+}
+
+FILTER_PATTERN = re.compile(r'^\s*([\w.]+)\s*(==|!=|>=|<=|>|<|~|=)\s*(.*?)\s*$')
+
+
+def summarize_result(result: InspectionResult, group: Optional[str] = None) -> Dict[str, Any]:
+    """把巡检结果展开为一行便于过滤排序的摘要
+
+    disk.usage_percent 取所有磁盘中的最大值，network.interfaces_down 为DOWN状态的网卡数。
+    """
+    sections = [
+        result.system, result.cpu, result.memory, result.disks,
+        result.network, result.processes, result.services
+    ]
+    if not result.errors:
+        status = "ok"
+    elif any(section is not None for section in sections):
+        status = "partial"
+    else:
+        status = "error"
+
+    row = {
+        "host": result.host,
+        "group": group,
+        "status": status,
+        "timestamp": result.timestamp.isoformat(),
+        "errors": len(result.errors),
+        "system.os_name": result.system.os_name if result.system else None,
+        "system.kernel_version": result.system.kernel_version if result.system else None,
+        "system.hostname": result.system.hostname if result.system else None,
+        "cpu.usage": result.cpu.cpu_usage if result.cpu else None,
+        "cpu.load1": result.cpu.load_average[0] if result.cpu and result.cpu.load_average else None,
+        "cpu.count": result.cpu.cpu_count if result.cpu else None,
+        "memory.usage_percent": result.memory.usage_percent if result.memory else None,
+        "memory.swap_used": result.memory.swap_used if result.memory else None,
+        "disk.usage_percent": max((d.usage_percent for d in result.disks), default=None) if result.disks else None,
+        "network.interfaces_down": None,
+        "network.bonds_inactive": None,
+    }
+    if result.network:
+        row["network.interfaces_down"] = sum(1 for i in result.network.interfaces if i.status != "UP")
+        row["network.bonds_inactive"] = sum(1 for b in result.network.bonds if b.get("status") != "Active")
+    return row
+
+
+class SortedIndex:
+    """数值字段的有序索引（值与主机两个平行列表），按 (值, 主机) 排序，可直接用于排序分页"""
+
+    def __init__(self):
+        self._values: List[float] = []
+        self._hosts: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def position(self, value: float, host: str, right: bool = False) -> int:
+        """(value, host) 在索引中的插入位置；right为True时排在相等项之后"""
+        lo = bisect.bisect_left(self._values, value)
+        hi = bisect.bisect_right(self._values, value)
+        find = bisect.bisect_right if right else bisect.bisect_left
+        return find(self._hosts, host, lo, hi)
+
+    def add(self, value: float, host: str):
+        i = self.position(value, host)
+        self._values.insert(i, value)
+        self._hosts.insert(i, host)
+
+    def remove(self, value: float, host: str):
+        i = self.position(value, host)
+        if i < len(self._hosts) and self._values[i] == value and self._hosts[i] == host:
+            del self._values[i]
+            del self._hosts[i]
+
+    def walk(self, start: int, desc: bool = False) -> Iterator[str]:
+        """从位置start起按顺序（desc时从start-1起倒序）依次给出主机"""
+        if desc:
+            for i in range(start - 1, -1, -1):
+                yield self._hosts[i]
+        else:
+            for i in range(start, len(self._hosts)):
+                yield self._hosts[i]
+
+    def select(self, op: str, value: float) -> Set[str]:
+        if op == ">":
+            return set(self._hosts[bisect.bisect_right(self._values, value):])
+        if op == ">=":
+            return set(self._hosts[bisect.bisect_left(self._values, value):])
+        if op == "<":
+            return set(self._hosts[:bisect.bisect_left(self._values, value)])
+        if op == "<=":
+            return set(self._hosts[:bisect.bisect_right(self._values, value)])
+        lo = bisect.bisect_left(self._values, value)
+        hi = bisect.bisect_right(self._values, value)
+        return set(self._hosts[lo:hi])
+
+
+class _Desc:
+    """倒序排序时包装比较值"""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+
+class ResultStore:
+    """每台主机最新巡检结果的内存存储，带常用字段索引，支持服务端过滤、排序和游标分页
+
+    结果以 CompactResult 紧凑保存，get() 或分页返回详情时才还原为Pydantic模型。
+    """
+
+    def __init__(self):
+        self.results: Dict[str, CompactResult] = {}
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self._numeric: Dict[str, SortedIndex] = {f: SortedIndex() for f in NUMERIC_FIELDS}
+        self._category: Dict[str, Dict[Any, Set[str]]] = {f: {} for f in CATEGORY_FIELDS}
+        # 列式副本，用于全量统计
+        self.columns = FleetColumns()
+        # 配置指纹倒排索引，用于漂移查询
+        self.fingerprints = FingerprintIndex()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def update(self, result: InspectionResult, group: Optional[str] = None):
+        """写入一台主机的最新结果并更新索引"""
+        host = result.host
+        old_row = self.rows.get(host)
+        if old_row is not None:
+            if group is None:
+                group = old_row["group"]
+            self._unindex(old_row)
+        row = summarize_result(result, group)
+        for field in CATEGORY_FIELDS:
+            if isinstance(row[field], str):
+                row[field] = sys.intern(row[field])
+        self.results[host] = CompactResult(result)
+        self.rows[host] = row
+        self._index(row)
+        self.columns.update(result, group)
+        self.fingerprints.update(result)
+
+    def remove(self, host: str):
+        row = self.rows.pop(host, None)
+        if row is not None:
+            self._unindex(row)
+            self.results.pop(host, None)
+            self.columns.remove(host)
+            self.fingerprints.remove(host)
+
+    def get(self, host: str) -> Optional[InspectionResult]:
+        compact = self.results.get(host)
+        return compact.to_model() if compact is not None else None
+
+    def summary(self, group_by: bool = False, top_k: int = 10) -> Dict[str, Any]:
+        """全量统计摘要"""
+        return self.columns.summary(group_by=group_by, top_k=top_k)
+
+    def _index(self, row: Dict[str, Any]):
+        host = row["host"]
+        for field, index in self._numeric.items():
+            if row[field] is not None:
+                index.add(row[field], host)
+        for field, index in self._category.items():
+            index.setdefault(row[field], set()).add(host)
+
+    def _unindex(self, row: Dict[str, Any]):
+        host = row["host"]
+        for field, index in self._numeric.items():
+            if row[field] is not None:
+                index.remove(row[field], host)
+        for field, index in self._category.items():
+            hosts = index.get(row[field])
+            if hosts is not None:
+                hosts.discard(host)
+                if not hosts:
+                    del index[row[field]]
+
+    @staticmethod
+    def parse_filter(expression: str) -> Tuple[str, str, Any]:
+        """解析过滤表达式，如 disk.usage_percent>85、status==error、system.os_name~Ubuntu"""
+        match = FILTER_PATTERN.match(expression)
+        if not match:
+            raise ValueError(f"无效的过滤条件: {expression}")
+        field, op, value = match.groups()
+        if field not in NUMERIC_FIELDS and field not in CATEGORY_FIELDS:
+            raise ValueError(f"不支持的过滤字段: {field}")
+        if op == "=":
+            op = "=="
+        if field in NUMERIC_FIELDS:
+            if op == "~":
+                raise ValueError(f"数值字段不支持 ~ 匹配: {field}")
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValueError(f"过滤值必须是数字: {expression}")
+        return field, op, value
+
+    def _candidates(self, field: str, op: str, value: Any) -> Optional[Set[str]]:
+        """通过索引求满足条件的主机集合，无法使用索引时返回None"""
+        if field in NUMERIC_FIELDS and op in ("==", ">", ">=", "<", "<="):
+            return self._numeric[field].select(op, value)
+        if field in CATEGORY_FIELDS and op == "==":
+            return set(self._category[field].get(value, ()))
+        return None
+
+    @staticmethod
+    def _match(row: Dict[str, Any], field: str, op: str, value: Any) -> bool:
+        actual = row.get(field)
+        if op == "!=":
+            return actual != value
+        if actual is None:
+            return False
+        if op == "~":
+            return str(value).lower() in str(actual).lower()
+        if op == "==":
+            return actual == value
+        if op == ">":
+            return actual > value
+        if op == ">=":
+            return actual >= value
+        if op == "<":
+            return actual < value
+        return actual <= value
+
+    def _sort_key(self, sort: str, desc: bool, value: Any, host: str):
+        wrap = _Desc if desc else (lambda v: v)
+        is_none = value is None
+        if is_none:
+            value = 0 if sort in NUMERIC_FIELDS else ""
+        return (is_none, wrap(value), wrap(host))
+
+    def query(
+        self,
+        filters: Optional[List[str]] = None,
+        sort: str = "host",
+        order: str = "asc",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        detail: bool = False
+    ) -> Dict[str, Any]:
+        """过滤、排序并按游标分页返回结果；空值总是排在最后"""
+        if sort not in NUMERIC_FIELDS and sort not in CATEGORY_FIELDS and sort != "timestamp":
+            raise ValueError(f"不支持的排序字段: {sort}")
+        desc = order == "desc"
+        parsed = [self.parse_filter(f) for f in (filters or [])]
+
+        # 先用索引缩小候选集，从最小的集合开始求交集
+        candidate_sets = []
+        remaining = []
+        for field, op, value in parsed:
+            hosts = self._candidates(field, op, value)
+            if hosts is None:
+                remaining.append((field, op, value))
+            else:
+                candidate_sets.append(hosts)
+        if candidate_sets:
+            candidate_sets.sort(key=len)
+            hosts = candidate_sets[0].intersection(*candidate_sets[1:])
+        else:
+            hosts = self.rows.keys()
+
+        if remaining:
+            hosts = {h for h in hosts if all(self._match(self.rows[h], f, o, v) for f, o, v in remaining)}
+
+        after = None
+        if cursor:
+            cursor_sort, cursor_order, is_none, value, host = self.decode_cursor(cursor)
+            if cursor_sort != sort or cursor_order != order:
+                raise ValueError("分页游标与当前的排序字段或顺序不一致，请从第一页重新查询")
+            if not is_none and (sort in NUMERIC_FIELDS) != isinstance(value, (int, float)):
+                raise ValueError("无效的分页游标")
+            after = (is_none, value, host)
+
+        index = self._numeric.get(sort)
+        # 数值字段排序时沿有序索引取一页，候选集远小于索引时直接排序更快
+        if index is not None and len(hosts) * 4 >= len(index):
+            page_rows = self._walk_index(sort, index, desc, hosts, after, limit + 1)
+        else:
+            page_rows = self._sort_rows(sort, desc, hosts, after, limit + 1)
+
+        page = page_rows[:limit]
+        next_cursor = None
+        if len(page_rows) > limit:
+            last = page[-1]
+            next_cursor = self.encode_cursor(sort, order, last[sort] is None, last[sort], last["host"])
+
+        items = []
+        for row in page:
+            item = dict(row)
+            if detail:
+                item["result"] = self.results[row["host"]].to_model().model_dump(mode="json")
+            items.append(item)
+
+        return {
+            "total": len(hosts),
+            "limit": limit,
+            "items": items,
+            "next_cursor": next_cursor
+        }
+
+    def _sort_rows(
+        self, sort: str, desc: bool, hosts, after: Optional[Tuple[bool, Any, str]], count: int
+    ) -> List[Dict[str, Any]]:
+        """对候选主机整体排序后取游标之后的count行"""
+        keyed = sorted(
+            ((self._sort_key(sort, desc, self.rows[h][sort], h), self.rows[h]) for h in hosts),
+            key=lambda item: item[0]
+        )
+        start = 0
+        if after is not None:
+            is_none, value, host = after
+            cursor_key = self._sort_key(sort, desc, None if is_none else value, host)
+            start = bisect.bisect_right([k for k, _ in keyed], cursor_key)
+        return [row for _, row in keyed[start:start + count]]
+
+    def _walk_index(
+        self, sort: str, index: SortedIndex, desc: bool, hosts, after: Optional[Tuple[bool, Any, str]], count: int
+    ) -> List[Dict[str, Any]]:
+        """沿有序索引从游标处取count行，只检查经过的主机是否满足过滤条件；空值行排在最后"""
+        page: List[Dict[str, Any]] = []
+        if after is None or not after[0]:
+            if after is None:
+                start = len(index) if desc else 0
+            else:
+                start = index.position(after[1], after[2], right=not desc)
+            for host in index.walk(start, desc):
+                if host in hosts:
+                    page.append(self.rows[host])
+                    if len(page) >= count:
+                        return page
+        # 空值行按主机名排序
+        nulls = sorted((h for h in hosts if self.rows[h][sort] is None), reverse=desc)
+        if after is not None and after[0]:
+            nulls = [h for h in nulls if (h < after[2] if desc else h > after[2])]
+        page.extend(self.rows[h] for h in nulls[:count - len(page)])
+        return page
+
+    @staticmethod
+    def encode_cursor(sort: str, order: str, is_none: bool, value: Any, host: str) -> str:
+        raw = json.dumps([sort, order, is_none, value, host], ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, str, bool, Any, str]:
+        """游标记录排序字段、顺序与上一页最后一行的排序值和主机"""
+        try:
+            sort, order, is_none, value, host = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except Exception:
+            raise ValueError("无效的分页游标")
+        if not isinstance(is_none, bool) or not isinstance(host, str) or isinstance(value, bool) \
+                or not (value is None or isinstance(value, (int, float, str))):
+            raise ValueError("无效的分页游标")
+        return sort, order, is_none, value, host
@@ -1,25 +1,321 @@
+import asyncio
+import json
+import struct
+from collections import deque
 from fastapi import WebSocket
-from typing import List
+from typing import Dict, List, Optional, Iterable, Set, Any, Callable, Awaitable, Union
+
+import msgpack
+
+# 订阅全部消息的主题
+TOPIC_ALL = "*"
+
+# 队列满时的处理策略
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_DROP_NEWEST = "drop_newest"
+
+# 协议版本：1 为每条消息一个JSON文本帧；2 为按刷新间隔把多条消息合并为一个MessagePack数组的二进制帧，
+# 并且不发送逐台主机的进度提示（server_start）。客户端连接后发送 {"type": "hello", "protocols": [2, 1]} 协商
+PROTOCOL_JSON = 1
+PROTOCOL_BATCH = 2
+SUPPORTED_PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_BATCH)
+
+
+class Message:
+    """一条待发送的消息，按连接的协议编码为JSON文本或MessagePack，编码结果在各连接间共享
+
+    chatter 为 True 的消息是逐台主机的进度提示，只发给旧协议的连接。
+    """
+    __slots__ = ("_payload", "_text", "_packed", "chatter")
+
+    def __init__(self, payload: Optional[Dict[str, Any]] = None, text: Optional[str] = None, chatter: bool = False):
+        self._payload = payload
+        self._text = text
+        self._packed: Optional[bytes] = None
+        self.chatter = chatter
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        if self._payload is None:
+            self._payload = json.loads(self._text)
+        return self._payload
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self._payload)
+        return self._text
+
+    def packed(self) -> bytes:
+        if self._packed is None:
+            self._packed = msgpack.packb(self.payload, use_bin_type=True)
+        return self._packed
+
+
+def _array_header(count: int) -> bytes:
+    """MessagePack数组头，后面直接拼接各元素已编码的字节即为完整的数组"""
+    if count < 16:
+        return bytes([0x90 | count])
+    if count < 0x10000:
+        return b"\xdc" + struct.pack(">H", count)
+    return b"\xdd" + struct.pack(">I", count)
+
+
+class OutboundQueue:
+    """单个连接的有界发送队列
+
+    带coalesce_key的消息在尚未发出时会被同key的新消息直接替换（合并），
+    队列满时按策略丢弃最旧或最新的消息，入队永远不会阻塞调用方。
+    只丢弃可合并的结果消息与进度提示（chatter），inspection_start、inspection_complete、
+    错误与告警等控制消息总会入队，此时队列可以暂时超过上限。
+    """
+
+    def __init__(self, maxsize: int, policy: str = POLICY_DROP_OLDEST):
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        # 条目为 [coalesce_key, message]，被丢弃或已发出的条目message置为None
+        self._items: deque = deque()
+        # 可丢弃的条目，与_items中的顺序一致
+        self._droppable: deque = deque()
+        self._keyed: Dict[str, list] = {}
+        self._size = 0
+        self._event = asyncio.Event()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put(self, message: Message, coalesce_key: Optional[str] = None) -> bool:
+        if coalesce_key is not None:
+            entry = self._keyed.get(coalesce_key)
+            if entry is not None:
+                entry[1] = message
+                self.coalesced += 1
+                return True
+
+        droppable = coalesce_key is not None or message.chatter
+        if self._size >= self.maxsize and droppable:
+            if self.policy == POLICY_DROP_NEWEST or not self._drop_oldest():
+                self.dropped += 1
+                return False
+
+        entry = [coalesce_key, message]
+        self._items.append(entry)
+        self._size += 1
+        if droppable:
+            self._droppable.append(entry)
+        if coalesce_key is not None:
+            self._keyed[coalesce_key] = entry
+        self._event.set()
+        return True
+
+    def _drop_oldest(self) -> bool:
+        """丢弃最旧的可丢弃消息，没有可丢弃的消息时返回False"""
+        if not self._droppable:
+            return False
+        self._take(self._droppable.popleft())
+        self.dropped += 1
+        return True
+
+    def _take(self, entry: list) -> Message:
+        message = entry[1]
+        entry[1] = None
+        if entry[0] is not None and self._keyed.get(entry[0]) is entry:
+            del self._keyed[entry[0]]
+        self._size -= 1
+        return message
+
+    async def get(self) -> Message:
+        while not self._size:
+            self._event.clear()
+            await self._event.wait()
+        return self.get_nowait()
+
+    def get_nowait(self) -> Optional[Message]:
+        while self._items:
+            entry = self._items.popleft()
+            if entry[1] is None:
+                continue
+            if self._droppable and self._droppable[0] is entry:
+                self._droppable.popleft()
+            return self._take(entry)
+        return None
+
+
+class Connection:
+    """一个WebSocket连接：发送队列、写协程与订阅主题"""
+
+    def __init__(self, websocket: WebSocket, queue: OutboundQueue):
+        self.websocket = websocket
+        self.queue = queue
+        self.topics: Set[str] = set()
+        self.protocol = PROTOCOL_JSON
+        self.sent = 0
+        self.frames = 0
+        self.writer: Optional[asyncio.Task] = None
+
 
 class WebSocketManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(
+        self,
+        queue_size: int = 1000,
+        policy: str = POLICY_DROP_OLDEST,
+        send_timeout: float = 10.0,
+        flush_interval: float = 0.05,
+        batch_bytes: int = 1024 * 1024
+    ):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        # 批量协议下等待更多消息合并发送的时间与单帧的大小上限
+        self.flush_interval = flush_interval
+        self.batch_bytes = batch_bytes
+        self.connections: Dict[WebSocket, Connection] = {}
+        # 多worker部署时把广播转发给其他worker的回调 relay(message, topics, coalesce_key)
+        self.relay: Optional[Callable[[str, Optional[List[str]], Optional[str]], Awaitable[None]]] = None
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.connections.keys())
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        connection = Connection(websocket, OutboundQueue(self.queue_size, self.policy))
+        connection.writer = asyncio.create_task(self._writer(connection))
+        self.connections[websocket] = connection
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        connection = self.connections.pop(websocket, None)
+        if connection is not None and connection.writer is not None:
+            if connection.writer is not asyncio.current_task():
+                connection.writer.cancel()
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+    async def _writer(self, connection: Connection):
+        """发送队列中的消息：旧协议逐条发送文本帧，批量协议把刷新间隔内的消息合并为一个二进制帧
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
+        发送失败或超时的连接直接断开，不影响其他连接。
+        """
+        try:
+            while True:
+                message = await connection.queue.get()
+                if connection.protocol != PROTOCOL_BATCH:
+                    await asyncio.wait_for(
+                        connection.websocket.send_text(message.text()),
+                        timeout=self.send_timeout
+                    )
+                    connection.sent += 1
+                    connection.frames += 1
+                    continue
+
+                await asyncio.sleep(self.flush_interval)
+                parts = [message.packed()]
+                size = len(parts[0])
+                while size < self.batch_bytes:
+                    message = connection.queue.get_nowait()
+                    if message is None:
+                        break
+                    parts.append(message.packed())
+                    size += len(parts[-1])
+                await asyncio.wait_for(
+                    connection.websocket.send_bytes(_array_header(len(parts)) + b"".join(parts)),
+                    timeout=self.send_timeout
+                )
+                connection.sent += len(parts)
+                connection.frames += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # 如果连接已断开或过慢，从连接表中移除
+            self.disconnect(connection.websocket)
             try:
-                await connection.send_text(message)
-            except:
-                # 如果连接已断开，从列表中移除
-                self.active_connections.remove(connection)
+                await connection.websocket.close()
+            except Exception:
+                pass
+
+    def negotiate(self, websocket: WebSocket, protocols: Iterable[int]) -> int:
+        """从客户端支持的协议中选择服务端也支持的最高版本，返回选定的版本"""
+        supported = [p for p in protocols if p in SUPPORTED_PROTOCOLS]
+        protocol = max(supported) if supported else PROTOCOL_JSON
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.protocol = protocol
+        return protocol
+
+    @staticmethod
+    def _enqueue(connection: Connection, message: Message, coalesce_key: Optional[str]):
+        if message.chatter and connection.protocol == PROTOCOL_BATCH:
+            return
+        connection.queue.put(message, coalesce_key)
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]):
+        """订阅主题，如 *、host:<ip>、group:<分组>"""
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.topics.update(topics)
+
+    def unsubscribe(self, websocket: WebSocket, topics: Optional[Iterable[str]] = None):
+        """取消订阅，不指定主题时取消全部"""
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return
+        if topics is None:
+            connection.topics.clear()
+        else:
+            connection.topics.difference_update(topics)
+
+    async def send_personal_message(
+        self,
+        message: Union[str, Message],
+        websocket: WebSocket,
+        coalesce_key: Optional[str] = None
+    ):
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            self._enqueue(connection, Message(text=message) if isinstance(message, str) else message, coalesce_key)
+
+    async def broadcast(
+        self,
+        message: Union[str, Message],
+        topics: Optional[Iterable[str]] = None,
+        coalesce_key: Optional[str] = None,
+        exclude: Optional[WebSocket] = None,
+        relay: bool = True
+    ):
+        """向订阅了任一主题的连接广播；不指定主题时发给所有连接。只入队，不等待发送
+
+        设置了relay回调时同时转发给其他worker；转发来的消息以relay=False广播，避免回环。
+        """
+        topic_set = set(topics) if topics is not None else None
+        if isinstance(message, str):
+            message = Message(text=message)
+        if relay and self.relay is not None:
+            await self.relay(message.text(), sorted(topic_set) if topic_set is not None else None, coalesce_key)
+        for connection in list(self.connections.values()):
+            if connection.websocket is exclude:
+                continue
+            if topic_set is not None and TOPIC_ALL not in connection.topics \
+                    and not (connection.topics & topic_set):
+                continue
+            self._enqueue(connection, message, coalesce_key)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出各连接的队列状态"""
+        connections = []
+        for connection in list(self.connections.values()):
+            client = connection.websocket.client
+            connections.append({
+                "client": f"{client.host}:{client.port}" if client else "",
+                "topics": sorted(connection.topics),
+                "protocol": connection.protocol,
+                "queued": len(connection.queue),
+                "sent": connection.sent,
+                "frames": connection.frames,
+                "dropped": connection.queue.dropped,
+                "coalesced": connection.queue.coalesced
+            })
+        return {
+            "total": len(connections),
+            "queue_size": self.queue_size,
+            "policy": self.policy,
+            "connections": connections
+        }
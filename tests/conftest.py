@@ -0,0 +1,77 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.models import (  # noqa: E402
+    InspectionResult, SystemInfo, CPUInfo, MemoryInfo, DiskInfo, ServiceInfo
+)
+
+
+class FakeClock:
+    """可手动推进的 time.monotonic 替身"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr("time.monotonic", fake)
+    return fake
+
+
+def make_result(
+    host: str,
+    cpu: float = None,
+    memory: float = None,
+    swap_used: int = 0,
+    kernel: str = None,
+    disks: dict = None,
+    services: list = None,
+    errors: list = None
+) -> InspectionResult:
+    """按需填充巡检项的结果；disks 为 挂载点 -> 使用率，services 为开机启动的服务名"""
+    result = InspectionResult(host=host, timestamp=datetime(2024, 1, 1), errors=errors or [])
+    if kernel is not None:
+        result.system = SystemInfo(
+            os_name="Rocky Linux", os_version="9.3", kernel_version=kernel,
+            hostname=host, uptime="up 1 day", boot_time="2024-01-01 00:00"
+        )
+    if cpu is not None:
+        result.cpu = CPUInfo(cpu_count=4, cpu_usage=cpu, load_average=[0.5, 0.4, 0.3], cpu_model="Xeon")
+    if memory is not None:
+        result.memory = MemoryInfo(
+            total=100, available=100 - int(memory), used=int(memory), free=100 - int(memory),
+            usage_percent=memory, swap_total=1 << 30, swap_used=swap_used, swap_free=(1 << 30) - swap_used
+        )
+    if disks is not None:
+        result.disks = [
+            DiskInfo(
+                device=f"/dev/sd{chr(97 + i)}", mountpoint=mountpoint, filesystem="xfs",
+                total=100, used=int(usage), free=100 - int(usage), usage_percent=usage,
+                disk_type="root" if mountpoint == "/" else "data"
+            )
+            for i, (mountpoint, usage) in enumerate(disks.items())
+        ]
+    if services is not None:
+        result.services = [
+            ServiceInfo(name=name, status="running", enabled=True, description=name)
+            for name in services
+        ]
+    return result
+
+
+@pytest.fixture
+def result_factory():
+    return make_result
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from server.alerts import AlertEngine, AlertRule, load_rules
+from conftest import make_result
+
+
+def evaluate(engine, result):
+    return [(e["rule"], e["status"], e["instance"]) for e in engine._evaluate(result, None)]
+
+
+@pytest.mark.parametrize("expr, path, op, value, delta, scope", [
+    ("cpu.cpu_usage > 90", "cpu.cpu_usage", ">", 90.0, False, None),
+    ("disk.usage_percent >= 85.5", "disks[].usage_percent", ">=", 85.5, False, None),
+    ("disk.usage_percent > 90 for mountpoint /data*", "disks[].usage_percent", ">", 90.0, False, ("mountpoint", "/data*")),
+    ("network.bonds[].status == Inactive", "network.bonds[].status", "==", "Inactive", False, None),
+    ("bond.status != Active", "network.bonds[].status", "!=", "Active", False, None),
+    ("delta(memory.swap_used) > 536870912", "memory.swap_used", ">", 536870912.0, True, None),
+    ("  delta( memory.swap_used )<=0  ", "memory.swap_used", "<=", 0.0, True, None),
+])
+def test_rule_parser(expr, path, op, value, delta, scope):
+    rule = AlertRule("r", expr)
+    assert rule.path == path
+    assert rule.op == op
+    assert rule.value == value
+    assert rule.delta is delta
+    assert (rule.scope_field, rule.scope_glob) == (scope or (None, None))
+
+
+@pytest.mark.parametrize("expr", [
+    "cpu.cpu_usage",
+    "cpu.cpu_usage >> 90",
+    "cpu.cpu_usage > ",
+    "delta(memory.swap_used > 1",
+    "disk.usage_percent > 90 for mountpoint",
+    "cpu usage > 90",
+])
+def test_rule_parser_rejects_invalid(expr):
+    with pytest.raises(ValueError):
+        AlertRule("bad", expr)
+
+
+def test_default_rules_compile():
+    assert {rule.name for rule in load_rules()} >= {"memory_usage_high", "interface_down"}
+
+
+def test_extract_scopes_list_elements_by_instance():
+    rule = AlertRule("data_disk", "disk.usage_percent > 90 for mountpoint /data*")
+    result = make_result("h1", disks={"/": 95.0, "/data1": 91.0, "/data2": 50.0})
+    assert rule.extract(result) == [("/data1", 91.0), ("/data2", 50.0)]
+    # 没有采集磁盘时保持原有告警状态
+    assert rule.extract(make_result("h1")) is None
+
+
+def test_consecutive_rule_fires_and_resolves():
+    engine = AlertEngine([AlertRule("cpu_high", "cpu.cpu_usage > 90", consecutive=2)])
+    assert evaluate(engine, make_result("h1", cpu=95.0)) == []
+    assert evaluate(engine, make_result("h1", cpu=96.0)) == [("cpu_high", "firing", "")]
+    assert evaluate(engine, make_result("h1", cpu=97.0)) == []
+    assert evaluate(engine, make_result("h1", cpu=10.0)) == [("cpu_high", "resolved", "")]
+    assert engine.active() == []
+
+
+def test_delta_rule_compares_with_previous_result():
+    engine = AlertEngine([AlertRule("swap_growth", "delta(memory.swap_used) > 100")])
+    assert evaluate(engine, make_result("h1", memory=50.0, swap_used=0)) == []
+    assert evaluate(engine, make_result("h1", memory=50.0, swap_used=50)) == []
+    assert evaluate(engine, make_result("h1", memory=50.0, swap_used=500)) == [("swap_growth", "firing", "")]
+
+
+def test_observed_results_count_towards_streaks():
+    """多worker时其他worker的结果经 observe 更新状态，下一条结果在本worker上照常触发"""
+    rules = [
+        AlertRule("cpu_high", "cpu.cpu_usage > 90", consecutive=3),
+        AlertRule("swap_growth", "delta(memory.swap_used) > 100"),
+    ]
+    workers = [AlertEngine(rules), AlertEngine(rules)]
+    results = [make_result("h1", cpu=95.0, memory=50.0, swap_used=used) for used in (0, 10, 500)]
+
+    async def scenario():
+        fired = []
+        for i, result in enumerate(results):
+            owner, other = workers[i % 2], workers[(i + 1) % 2]
+            fired = await owner.process(result)
+            other.observe(result)
+        return fired
+
+    fired = asyncio.run(scenario())
+    assert sorted(e["rule"] for e in fired) == ["cpu_high", "swap_growth"]
+    assert len(workers[1].active()) == 2
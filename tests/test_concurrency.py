@@ -0,0 +1,106 @@
+import asyncio
+
+from server.concurrency import AdaptiveConcurrencyLimiter
+
+
+def saturate(limiter: AdaptiveConcurrencyLimiter):
+    limiter.in_flight = limiter.current_limit
+
+
+def test_additive_increase_only_when_saturated_and_flat():
+    limiter = AdaptiveConcurrencyLimiter(initial=4)
+    limiter.record_latency("connect", 0.1)
+
+    limiter.record_success()
+    assert limiter.current_limit == 4
+
+    saturate(limiter)
+    limiter.record_success()
+    assert limiter.current_limit == 5
+
+
+def test_no_increase_when_latency_rises():
+    limiter = AdaptiveConcurrencyLimiter(initial=4)
+    limiter.record_latency("connect", 0.1)
+    for _ in range(20):
+        limiter.record_latency("connect", 1.0)
+    saturate(limiter)
+    limiter.record_success()
+    assert limiter.current_limit == 4
+
+
+def test_increase_stops_at_max_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial=4, max_limit=5)
+    for _ in range(3):
+        saturate(limiter)
+        limiter.record_success()
+    assert limiter.current_limit == 5
+
+
+def test_multiplicative_decrease_once_per_cooldown(clock):
+    limiter = AdaptiveConcurrencyLimiter(initial=16, min_limit=2)
+    limiter.record_congestion()
+    assert limiter.current_limit == 8
+
+    # 同一批失败只减少一次
+    limiter.record_congestion()
+    assert limiter.current_limit == 8
+    assert limiter.congestion_events == 2
+
+    clock.advance(1)
+    limiter.record_congestion()
+    assert limiter.current_limit == 4
+    clock.advance(1)
+    limiter.record_congestion()
+    clock.advance(1)
+    limiter.record_congestion()
+    assert limiter.current_limit == 2
+
+
+def test_acquire_waits_for_a_released_slot():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial=2)
+        await limiter.acquire()
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        assert limiter.snapshot()["waiting"] == 1
+
+        limiter.release()
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.in_flight == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        limiter.release()
+        assert limiter.in_flight == 0
+        await limiter.acquire()
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_growing_limit_wakes_waiters():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+
+        limiter.record_success()
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.current_limit == 2
+        assert limiter.in_flight == 2
+
+    asyncio.run(scenario())
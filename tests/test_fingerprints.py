@@ -0,0 +1,71 @@
+import pytest
+
+from server.fingerprints import FingerprintIndex
+from conftest import make_result
+
+BASE_SERVICES = ["chronyd.service", "crond.service", "sshd.service"]
+
+
+def fleet():
+    index = FingerprintIndex()
+    for i in range(5):
+        index.update(make_result(f"h{i}", kernel="5.14.0-362", services=BASE_SERVICES))
+    index.update(make_result("h5", kernel="5.14.0-284", services=BASE_SERVICES))
+    index.update(make_result("h6", kernel="5.14.0-362", services=["crond.service", "sshd.service", "telnet.service"]))
+    return index
+
+
+def test_drift_against_majority():
+    drift = fleet().drift("kernel")
+    assert drift["baseline"]["value"] == ["5.14.0-362"]
+    assert drift["matching"] == 6
+    assert drift["drifted"] == 1
+    assert [(h["host"], h["value"]) for h in drift["hosts"]] == [("h5", ["5.14.0-284"])]
+
+
+def test_set_section_drift_lists_missing_and_extra_items():
+    drift = fleet().drift("services")
+    assert drift["drifted"] == 1
+    host = drift["hosts"][0]
+    assert host["host"] == "h6"
+    assert host["missing"] == ["chronyd.service"]
+    assert host["extra"] == ["telnet.service"]
+
+
+def test_drift_against_reference_host():
+    index = fleet()
+    drift = index.drift("kernel", reference="h5")
+    assert drift["matching"] == 1
+    assert sorted(h["host"] for h in drift["hosts"]) == ["h0", "h1", "h2", "h3", "h4", "h6"]
+    with pytest.raises(ValueError):
+        index.drift("kernel", reference="unknown")
+
+
+def test_update_moves_host_between_fingerprints():
+    index = fleet()
+    index.update(make_result("h5", kernel="5.14.0-362", services=BASE_SERVICES))
+    assert index.drift("kernel")["drifted"] == 0
+    assert index.overview()["sections"]["kernel"]["fingerprints"] == 1
+    # 旧指纹在最后一台主机离开后被清理
+    assert index.distribution("kernel")["total"] == 1
+
+
+def test_missing_section_keeps_host_out_of_that_section():
+    index = fleet()
+    # 本次没有采集服务：服务段移除该主机，内核段不变
+    index.update(make_result("h6", kernel="5.14.0-362"))
+    assert index.drift("services")["drifted"] == 0
+    assert index.overview()["sections"]["services"]["hosts"] == 6
+    assert "h6" in index.hosts_with("kernel", index.host("h0")["kernel"]["fingerprint"])
+
+
+def test_hosts_by_item_and_remove():
+    index = fleet()
+    assert index.hosts_by_item("services", "chronyd.service", missing=True) == ["h6"]
+    assert index.hosts_by_item("services", "telnet.service") == ["h6"]
+
+    index.remove("h6")
+    assert index.hosts_by_item("services", "telnet.service") == []
+    assert len(index) == 6
+    with pytest.raises(ValueError):
+        index.hosts_by_item("kernel", "5.14.0-362")
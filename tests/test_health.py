@@ -0,0 +1,76 @@
+from server.health import HostHealthTracker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+
+
+def open_breaker(tracker: HostHealthTracker, host: str = "10.0.0.1"):
+    for _ in range(tracker.failure_threshold):
+        assert tracker.allow(host)
+        tracker.record_failure(host, "timed out")
+
+
+def test_opens_after_threshold_and_rejects_during_cooldown(clock):
+    tracker = HostHealthTracker(failure_threshold=3, base_cooldown=30)
+    open_breaker(tracker)
+    assert tracker._hosts["10.0.0.1"].state == STATE_OPEN
+    assert not tracker.allow("10.0.0.1")
+    assert tracker.retry_after("10.0.0.1") == 30
+
+    clock.advance(29)
+    assert not tracker.allow("10.0.0.1")
+
+
+def test_half_open_lets_one_probe_through(clock):
+    tracker = HostHealthTracker(failure_threshold=3, base_cooldown=30)
+    open_breaker(tracker)
+    clock.advance(30)
+
+    assert tracker.allow("10.0.0.1")
+    assert tracker._hosts["10.0.0.1"].state == STATE_HALF_OPEN
+    # 探测进行中，其余请求被拒绝
+    assert not tracker.allow("10.0.0.1")
+
+    tracker.record_success("10.0.0.1")
+    assert tracker._hosts["10.0.0.1"].state == STATE_CLOSED
+    assert tracker.allow("10.0.0.1")
+
+
+def test_failed_probe_reopens_with_doubled_cooldown(clock):
+    tracker = HostHealthTracker(failure_threshold=3, base_cooldown=30)
+    open_breaker(tracker)
+    clock.advance(30)
+    assert tracker.allow("10.0.0.1")
+
+    tracker.record_failure("10.0.0.1", "timed out")
+    assert tracker._hosts["10.0.0.1"].state == STATE_OPEN
+    assert tracker.retry_after("10.0.0.1") == 60
+
+
+def test_lost_probe_expires_after_probe_timeout(clock):
+    tracker = HostHealthTracker(failure_threshold=3, base_cooldown=30, probe_timeout=300)
+    open_breaker(tracker)
+    clock.advance(30)
+    assert tracker.allow("10.0.0.1")
+
+    # 探测方没有记录结果就退出了
+    clock.advance(299)
+    assert not tracker.allow("10.0.0.1")
+    assert tracker.retry_after("10.0.0.1") == 1
+    clock.advance(1)
+    assert tracker.allow("10.0.0.1")
+
+
+def test_release_returns_the_probe_slot(clock):
+    tracker = HostHealthTracker(failure_threshold=3, base_cooldown=30)
+    open_breaker(tracker)
+    clock.advance(30)
+    assert tracker.allow("10.0.0.1")
+
+    tracker.release("10.0.0.1")
+    assert tracker.retry_after("10.0.0.1") == 0
+    assert tracker.allow("10.0.0.1")
+
+
+def test_other_hosts_are_unaffected(clock):
+    tracker = HostHealthTracker(failure_threshold=3)
+    open_breaker(tracker)
+    assert tracker.allow("10.0.0.2")
+    assert tracker.snapshot()["open"] == 1
@@ -0,0 +1,59 @@
+import pytest
+
+from server.inventory import Inventory, parse_host_spec
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("192.168.1.100:22:root:secret",
+     {"host": "192.168.1.100", "port": 22, "username": "root", "password": "secret"}),
+    ("192.168.1.101:2222:ops:/home/ops/.ssh/id_rsa",
+     {"host": "192.168.1.101", "port": 2222, "username": "ops", "key_path": "/home/ops/.ssh/id_rsa"}),
+    ("db1:22", {"host": "db1", "port": 22, "username": "root"}),
+    # 密码中可以包含冒号
+    ("10.0.0.1:22:root:pa:ss:word", {"host": "10.0.0.1", "port": 22, "username": "root", "password": "pa:ss:word"}),
+    # IPv6地址写在方括号中
+    ("[fe80::1]:22:root:password", {"host": "fe80::1", "port": 22, "username": "root", "password": "password"}),
+    ("[2001:db8::10]:2222:ops:a:b", {"host": "2001:db8::10", "port": 2222, "username": "ops", "password": "a:b"}),
+    ("  [::1]:22  ", {"host": "::1", "port": 22, "username": "root"}),
+])
+def test_parse_host_spec(spec, expected):
+    assert parse_host_spec(spec) == expected
+
+
+@pytest.mark.parametrize("spec", [
+    "192.168.1.100",
+    "192.168.1.100:ssh:root",
+    "fe80::1:22:root:password",
+    "[fe80::1:22:root",
+    "[fe80::1]22:root",
+    "[fe80::1]",
+    ":22:root",
+])
+def test_parse_host_spec_rejects_malformed(spec):
+    assert parse_host_spec(spec) is None
+
+
+def test_hosts_file_directives_and_errors(tmp_path):
+    path = tmp_path / "hosts.txt"
+    path.write_text(
+        "# 注释\n"
+        "10.0.0.1:22:root:pw\n"
+        "jump=bastion:22:ops:/keys/ops\n"
+        "group=db\n"
+        "[fd00::2]:22:root:p:w\n"
+        "jump=\n"
+        "10.0.0.3:22:root\n"
+        "not-a-host\n",
+        encoding="utf-8"
+    )
+    inventory = Inventory()
+    assert inventory.load(str(path)) == 3
+    assert len(inventory.errors) == 1 and "第8行" in inventory.errors[0]
+
+    v6 = inventory.select("host=fd00::2")[0].to_server()
+    assert v6["password"] == "p:w"
+    assert v6["jump_host"]["host"] == "bastion"
+    assert v6["group"] == "db"
+    last = inventory.select("host=10.0.0.3")[0].to_server()
+    assert "jump_host" not in last
+    assert last["group"] == "db"
@@ -0,0 +1,71 @@
+from server.journal import CheckpointJournal
+
+
+def write_run(path, records):
+    journal = CheckpointJournal(str(path))
+    journal.open(["system", "cpu"])
+    for host, status in records:
+        journal.record(host, 22, status, {"host": host, "timestamp": "2024-01-01T00:00:00", "errors": []})
+    journal.close()
+
+
+def test_resume_skips_only_successful_hosts(tmp_path):
+    path = tmp_path / "run.jsonl"
+    write_run(path, [("10.0.0.1", "success"), ("10.0.0.2", "error")])
+
+    journal = CheckpointJournal(str(path))
+    journal.load()
+    assert journal.checks == ["system", "cpu"]
+    assert journal.is_done("10.0.0.1", 22)
+    # 连接失败的主机续跑时重试
+    assert not journal.is_done("10.0.0.2", 22)
+    assert not journal.is_done("10.0.0.1", 2222)
+    assert [r.host for r in journal.completed_results()] == ["10.0.0.1"]
+
+
+def test_later_record_overrides_earlier_one(tmp_path):
+    path = tmp_path / "run.jsonl"
+    write_run(path, [("10.0.0.2", "error")])
+    journal = CheckpointJournal(str(path))
+    journal.load()
+    journal.open(["system", "cpu"])
+    journal.record("10.0.0.2", 22, "success", {"host": "10.0.0.2", "timestamp": "2024-01-01T00:00:00"})
+    journal.close()
+
+    reloaded = CheckpointJournal(str(path))
+    reloaded.load()
+    assert reloaded.is_done("10.0.0.2", 22)
+    # 续跑时不重复写头部
+    assert path.read_text(encoding="utf-8").count('"type": "header"') == 1
+
+
+def test_torn_last_line_is_ignored_and_truncated(tmp_path):
+    path = tmp_path / "run.jsonl"
+    write_run(path, [("10.0.0.1", "success")])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "result", "key": "10.0.0.2:22", "sta')
+
+    journal = CheckpointJournal(str(path))
+    journal.load()
+    assert list(journal.entries) == ["10.0.0.1:22"]
+
+    journal.open(["system", "cpu"])
+    journal.record("10.0.0.3", 22, "success", {"host": "10.0.0.3", "timestamp": "2024-01-01T00:00:00"})
+    journal.close()
+
+    reloaded = CheckpointJournal(str(path))
+    reloaded.load()
+    assert sorted(reloaded.entries) == ["10.0.0.1:22", "10.0.0.3:22"]
+    assert path.read_text(encoding="utf-8").endswith("}\n")
+
+
+def test_journal_with_only_a_torn_line_starts_over(tmp_path):
+    path = tmp_path / "run.jsonl"
+    path.write_text('{"type": "hea', encoding="utf-8")
+    journal = CheckpointJournal(str(path))
+    journal.open(["memory"])
+    journal.close()
+
+    reloaded = CheckpointJournal(str(path))
+    reloaded.load()
+    assert reloaded.checks == ["memory"]
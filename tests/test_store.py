@@ -0,0 +1,88 @@
+import pytest
+
+from server.store import ResultStore
+from conftest import make_result
+
+
+def build_store():
+    """30台主机：CPU使用率有重复值，每5台中1台没有CPU数据；前5台属于分组small"""
+    store = ResultStore()
+    for i in range(30):
+        host = f"10.0.0.{i:02d}"
+        cpu = None if i % 5 == 4 else float(i % 7) * 10
+        store.update(make_result(host, cpu=cpu, memory=50.0), group="small" if i < 5 else "large")
+    return store
+
+
+def expected_order(store, hosts, sort, desc):
+    present = sorted((store.rows[h][sort], h) for h in hosts if store.rows[h][sort] is not None)
+    missing = sorted(h for h in hosts if store.rows[h][sort] is None)
+    if desc:
+        present.reverse()
+        missing.reverse()
+    # 空值总是排在最后
+    return [h for _, h in present] + missing
+
+
+def collect_pages(store, limit, cursor=None, **kwargs):
+    hosts, pages = [], 0
+    while True:
+        page = store.query(limit=limit, cursor=cursor, **kwargs)
+        assert len(page["items"]) <= limit
+        hosts += [item["host"] for item in page["items"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return hosts, pages
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_pages_walk_the_index_in_order(order):
+    store = build_store()
+    hosts, pages = collect_pages(store, 7, sort="cpu.usage", order=order)
+    assert hosts == expected_order(store, store.rows, "cpu.usage", order == "desc")
+    assert pages == 5
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_pages_with_a_narrow_filter(order):
+    # 候选集远小于索引时改为直接排序，分页结果应一致
+    store = build_store()
+    hosts, _ = collect_pages(store, 2, sort="cpu.usage", order=order, filters=["group==small"])
+    small = [h for h in store.rows if store.rows[h]["group"] == "small"]
+    assert hosts == expected_order(store, small, "cpu.usage", order == "desc")
+
+
+def test_pages_stay_stable_when_rows_change_between_requests():
+    store = build_store()
+    first = store.query(sort="cpu.usage", limit=10)
+    seen = [item["host"] for item in first["items"]]
+    # 已翻过的主机值变大后排到后面，不应重复出现
+    store.update(make_result(seen[0], cpu=99.0, memory=50.0), group="small")
+    rest, _ = collect_pages(store, 10, sort="cpu.usage", cursor=first["next_cursor"])
+    assert seen[0] in rest
+    assert not set(seen[1:]) & set(rest)
+
+
+def test_category_sort_pages():
+    store = build_store()
+    hosts, _ = collect_pages(store, 4, sort="host", order="desc")
+    assert hosts == sorted(store.rows, reverse=True)
+
+
+def test_cursor_must_match_sort_and_order():
+    store = build_store()
+    cursor = store.query(sort="cpu.usage", limit=5)["next_cursor"]
+    with pytest.raises(ValueError):
+        store.query(sort="cpu.usage", order="desc", cursor=cursor)
+    with pytest.raises(ValueError):
+        store.query(sort="memory.usage_percent", cursor=cursor)
+    with pytest.raises(ValueError):
+        store.query(sort="cpu.usage", cursor="not-a-cursor")
+
+
+def test_cursor_value_type_is_checked():
+    store = build_store()
+    forged = ResultStore.encode_cursor("cpu.usage", "asc", False, "10.0.0.01", "10.0.0.01")
+    with pytest.raises(ValueError):
+        store.query(sort="cpu.usage", cursor=forged)